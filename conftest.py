@@ -0,0 +1,347 @@
+import os
+
+import pytest
+
+from harness.checkpoints import retry_report, retry_stats
+from harness.config import cache_dir
+from harness.contexts import SHARED_BROWSER_ENV, ContextPool
+from harness.driver_binary import resolver_stats as driver_resolver_stats
+from harness.durations import DurationStore
+from harness.fileutil import write_json_atomic
+from harness.impact import ImpactSelector, UrlRecorder
+from harness.netfilter import NetworkFilter, marker_rules
+from harness.artifact_store import active_store
+from harness.artifacts import flush_default_writer
+from harness.pool import default_pool
+from harness.prespawn import Prespawner, needs_browser
+from harness import preflight
+from harness.profiles import profile_rules
+from harness import stubserver
+from harness.tracing import CommandTracer
+from harness.variants import variant_stats
+from harness.wait_profiler import WaitProfiler
+
+# Installed by --wait-profile
+_wait_profiler = None
+# Installed by --trace-webdriver
+_tracer = None
+# Applies profile and @pytest.mark.network_filter rules to pooled browsers
+_network_filter = NetworkFilter()
+_network_reports = {}
+# Installed by --impact
+_impact = None
+_url_recorder = None
+# Source fingerprint and outcome ("passed", "failed" or "skipped") per test, for --impact
+_impact_sources = {}
+_impact_outcomes = {}
+# Launches pooled browsers ahead of the tests that need them (HARNESS_PRESPAWN)
+_prespawner = None
+# Generated modules checked before collection: path -> list of preflight Issues
+_preflight = {}
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("harness")
+    group.addoption("--wait-profile", action="store_true",
+                    help="record time blocked in implicit/explicit waits and sleeps")
+    group.addoption("--trace-webdriver", action="store_true",
+                    help="record every WebDriver command and write Chrome trace files")
+    group.addoption("--impact", action="store_true",
+                    help="deselect tests whose source and pages are unchanged since their last pass")
+    group.addoption("--no-preflight", action="store_true",
+                    help="collect generated modules even if static checks find errors")
+
+
+def pytest_configure(config):
+    global _wait_profiler, _tracer, _impact, _url_recorder
+    config.addinivalue_line(
+        "markers",
+        "network_filter(*rules): block resource types (image, font, media, stylesheet, "
+        "analytics) or URL patterns in pooled browsers via CDP",
+    )
+    # HARNESS_STUB=record|replay|auto routes page loads through a local stub
+    stubserver.start_from_env()
+    if config.getoption("wait_profile"):
+        _wait_profiler = WaitProfiler()
+        _wait_profiler.install()
+    if config.getoption("trace_webdriver"):
+        _tracer = CommandTracer()
+        _tracer.install()
+    if config.getoption("impact"):
+        _impact = ImpactSelector(str(config.rootpath))
+        _url_recorder = UrlRecorder()
+        _url_recorder.install()
+
+
+def pytest_unconfigure(config):
+    stubserver.stop_active()
+    # Reverse order of installation, all of them wrap WebDriver.execute
+    if _url_recorder is not None:
+        _url_recorder.uninstall()
+    if _tracer is not None:
+        _tracer.uninstall()
+    if _wait_profiler is not None:
+        _wait_profiler.uninstall()
+
+
+@pytest.fixture(scope="session")
+def browser_pool():
+    """
+    Session-wide pool of warm Chrome instances.
+    Tests lease browsers from it instead of launching their own.
+
+    Under python -m harness.parallel --shared-browser it hands out isolated
+    browser contexts of the runner's Chrome instead.
+    """
+    pool = ContextPool.from_env() or default_pool()
+    _network_filter.install(pool)
+    if _url_recorder is not None:
+        pool.on_acquire.append(_url_recorder.on_acquire)
+        pool.on_release.append(_url_recorder.on_release)
+    yield pool
+    pool.close()
+
+
+@pytest.fixture
+def pooled_driver(browser_pool):
+    """
+    Lease a clean browser for a single test and return it afterwards.
+    """
+    with browser_pool.lease() as driver:
+        yield driver
+
+
+def pytest_terminal_summary(terminalreporter):
+    """Report browser reuse, driver-resolution savings and wait hotspots."""
+    pool_stats = default_pool().stats
+    resolver_stats = driver_resolver_stats()
+    if pool_stats["created"] or resolver_stats["hits"] or resolver_stats["misses"]:
+        terminalreporter.write_sep("-", "harness")
+        terminalreporter.write_line(
+            "browser pool: {created} launched, {reused} reused, {recycled} recycled".format(**pool_stats)
+        )
+        terminalreporter.write_line(
+            "chromedriver cache: {hits} hits, {misses} misses, {seconds_saved:.2f}s saved".format(
+                **resolver_stats
+            )
+        )
+
+    if _network_filter.stats["requests"]:
+        terminalreporter.write_line(
+            "network filter: {requests} requests blocked in {tests} tests, "
+            "~{bytes} bytes saved (recorded sizes only)".format(**_network_filter.stats)
+        )
+
+    stub = stubserver.active_server()
+    if stub is not None:
+        terminalreporter.write_line(
+            f"stub server ({stub.mode}): {{replayed}} replayed, {{recorded}} recorded, "
+            "{misses} missing".format(**stub.stats)
+        )
+
+    same_page = variant_stats()
+    if same_page["resets"]:
+        terminalreporter.write_line(
+            "same-page variants: {resets} reset in place, {loads} page loads".format(**same_page)
+        )
+
+    step_retries = retry_stats()
+    if step_retries["retries"]:
+        terminalreporter.write_line(
+            "step retries: {retries} retried, {recovered} recovered from a checkpoint, "
+            "{seconds_saved:.2f}s saved vs whole-test retries".format(**step_retries)
+        )
+
+    store = active_store()
+    if store is not None and store.stats["written"]:
+        terminalreporter.write_line(
+            "artifacts: {written} stored, {duplicates} duplicates, {saved} bytes saved; "
+            "python -m harness.artifact_store list --run {run}".format(run=store.run, **store.stats)
+        )
+
+    if _prespawner is not None:
+        terminalreporter.write_line(
+            "prespawn: {spawned} browsers launched ahead, {hits} hits / {misses} misses "
+            "({hit_rate:.0%}), {wasted} unused, {wait_seconds:.2f}s waiting for starting "
+            "browsers, {memory_limited} times held back by memory".format(**_prespawner.summary())
+        )
+
+    if _impact is not None:
+        terminalreporter.write_line(
+            "impact: {skipped} unchanged tests deselected, {selected} selected".format(**_impact.stats)
+        )
+
+    excluded = {path: issues for path, issues in _preflight.items() if preflight.has_errors(issues)}
+    if excluded:
+        terminalreporter.write_sep("-", f"preflight: {len(excluded)} generated module(s) excluded")
+        for issues in excluded.values():
+            for issue in issues:
+                if issue.severity == preflight.ERROR:
+                    terminalreporter.write_line(str(issue))
+
+    if _wait_profiler is not None:
+        terminalreporter.write_sep("-", "wait hotspots")
+        for entry in _wait_profiler.hotspots()[:10]:
+            terminalreporter.write_line(
+                "{seconds:8.2f}s  {kind:<8} x{count:<3} {test} [{step}]".format(**entry)
+            )
+        for event in _wait_profiler.report()["compounded"][:10]:
+            terminalreporter.write_line(
+                "compounded: {test} [{step}] {wait}({timeout}s) with implicit wait {implicit}s "
+                "-> up to {worst_case}s per failure".format(**event)
+            )
+
+    if _tracer is not None:
+        terminalreporter.write_sep("-", "slowest webdriver commands")
+        for entry in _tracer.hotspots():
+            terminalreporter.write_line(
+                "{seconds:8.2f}s  x{count:<4} max {max_seconds:.2f}s  {command} {target}".format(**entry)
+            )
+        terminalreporter.write_line(f"traces written to {cache_dir('traces')}")
+
+
+# Wall time per test (setup + call + teardown), saved for the parallel scheduler
+_observed_durations = {}
+
+
+class PreflightExcluded(pytest.File):
+    """Stands in for a generated module that failed the preflight checks."""
+
+    def collect(self):
+        return []
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_pycollect_makemodule(module_path, parent):
+    """Check generated modules statically and exclude broken ones before import."""
+    if parent.config.getoption("no_preflight") or not preflight.GENERATED_PATTERN.match(module_path.name):
+        return None
+    # Fixtures from plugins and loaded conftests, which the static check cannot see
+    registered = getattr(parent.session, "_fixturemanager", None)
+    issues = preflight.check_file(
+        str(module_path), root=str(parent.config.rootpath),
+        registered=set(registered._arg2fixturedefs) if registered is not None else None,
+    )
+    _preflight[str(module_path)] = issues
+    if preflight.has_errors(issues):
+        return PreflightExcluded.from_parent(parent, path=module_path)
+    return None
+
+
+def pytest_collection_modifyitems(config, items):
+    """Keep only this worker's shard when run by harness.parallel, then apply --impact."""
+    shard_file = os.getenv("HARNESS_SHARD_FILE")
+    if shard_file:
+        with open(shard_file) as f:
+            shard = set(f.read().splitlines())
+        selected = [item for item in items if item.nodeid in shard]
+        deselected = [item for item in items if item.nodeid not in shard]
+        if deselected:
+            config.hook.pytest_deselected(items=deselected)
+            items[:] = selected
+    if _impact is not None:
+        _select_by_impact(config, items)
+
+
+def _select_by_impact(config, items):
+    selected, deselected = [], []
+    for item in items:
+        name = getattr(item, "originalname", None)
+        if name is None:
+            selected.append(item)
+            continue
+        source = _impact.source(str(item.path), name, item.cls.__name__ if item.cls else None)
+        _impact_sources[item.nodeid] = source
+        unchanged = _impact.unchanged(item.nodeid, source, uses_browser=needs_browser(item))
+        (deselected if unchanged else selected).append(item)
+    _impact.stats.update(skipped=len(deselected), selected=len(selected))
+    if deselected:
+        config.hook.pytest_deselected(items=deselected)
+        items[:] = selected
+
+
+def pytest_collection_finish(session):
+    """Hand the collected node ids to harness.parallel and start prespawning browsers."""
+    global _prespawner
+    out_file = os.getenv("HARNESS_COLLECT_OUT")
+    if out_file:
+        with open(out_file, "w") as f:
+            f.write("\n".join(item.nodeid for item in session.items))
+    # Shared-browser workers lease contexts, not pooled browsers
+    if session.config.option.collectonly or not Prespawner.enabled() or os.getenv(SHARED_BROWSER_ENV):
+        return
+    queue = [item.nodeid for item in session.items if needs_browser(item)]
+    if queue:
+        estimates = DurationStore().estimate(queue)
+        _prespawner = Prespawner(default_pool())
+        _prespawner.set_queue([(nodeid, estimates[nodeid]) for nodeid in queue])
+        _prespawner.start()
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_runtest_setup(item):
+    # Before fixtures run, so the browser leased for this test gets the rules
+    _network_filter.set_rules(profile_rules() + marker_rules(item))
+
+
+def pytest_runtest_logstart(nodeid):
+    if _prespawner is not None:
+        _prespawner.test_started(nodeid)
+    if _wait_profiler is not None:
+        _wait_profiler.current_test = nodeid
+    if _tracer is not None:
+        _tracer.current_test = nodeid
+    if _url_recorder is not None:
+        _url_recorder.test_started(nodeid)
+
+
+def pytest_runtest_logfinish(nodeid):
+    if _network_filter.rules:
+        _network_reports[nodeid] = _network_filter.current
+    if _wait_profiler is not None:
+        _wait_profiler.current_test = None
+    if _tracer is not None:
+        _tracer.current_test = None
+        _tracer.export_test(nodeid, cache_dir("traces"))
+    if _url_recorder is not None:
+        _url_recorder.test_finished()
+
+
+def pytest_runtest_logreport(report):
+    _observed_durations[report.nodeid] = _observed_durations.get(report.nodeid, 0.0) + report.duration
+    if _impact is not None and _impact_outcomes.get(report.nodeid) != "failed":
+        # A test counts as passed only if no phase failed and it was not skipped
+        if report.failed:
+            _impact_outcomes[report.nodeid] = "failed"
+        elif report.skipped:
+            _impact_outcomes[report.nodeid] = "skipped"
+        elif report.when == "call":
+            _impact_outcomes[report.nodeid] = "passed"
+
+
+def pytest_sessionfinish(session):
+    if _prespawner is not None:
+        _prespawner.stop()
+    # Screenshots are written in the background; make sure they hit the disk
+    flush_default_writer()
+    if not session.config.option.collectonly:
+        DurationStore().update(_observed_durations)
+    if _wait_profiler is not None:
+        write_json_atomic(
+            os.path.join(cache_dir(), "wait-report.json"), _wait_profiler.report(), indent=2
+        )
+    if _network_reports:
+        write_json_atomic(os.path.join(cache_dir(), "network-report.json"), _network_reports, indent=2)
+    if retry_report():
+        write_json_atomic(os.path.join(cache_dir(), "retry-report.json"), retry_report(), indent=2)
+    if _tracer is not None:
+        write_json_atomic(os.path.join(cache_dir(), "trace-report.json"), _tracer.report(), indent=2)
+    if _impact is not None and not session.config.option.collectonly:
+        for nodeid, outcome in _impact_outcomes.items():
+            if nodeid in _impact_sources and outcome != "skipped":
+                _impact.record(
+                    nodeid, _impact_sources[nodeid], _url_recorder.urls.get(nodeid, ()), outcome == "passed"
+                )
+    if _preflight:
+        report = {path: [issue.as_dict() for issue in issues] for path, issues in _preflight.items()}
+        write_json_atomic(os.path.join(cache_dir(), "preflight-report.json"), report, indent=2)
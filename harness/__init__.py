@@ -0,0 +1,9 @@
+"""
+Shared infrastructure for the Selenium test suite.
+
+The generated test modules (pysel*.py) and the fixtures in conftest.py use
+these helpers instead of launching and configuring Chrome themselves.
+"""
+from harness.pool import DriverPool, default_pool
+
+__all__ = ["DriverPool", "default_pool"]
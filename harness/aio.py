@@ -0,0 +1,711 @@
+"""
+asyncio facade over the WebDriver protocol.
+
+Every WebDriver call in the synchronous API blocks its thread until
+chromedriver answers, so one worker drives one browser at a time. The
+classes here speak the W3C protocol to chromedriver over asyncio streams
+instead: while one session waits for a page load or a push wait, the event
+loop sends the next command of another session. One process can run
+dozens of scenarios concurrently without a thread or process each.
+
+    async def scenario(driver):
+        await driver.get(route("https://www.demoblaze.com/"))
+        wait = AsyncWait(driver, 15)
+        await wait.until(EC.visibility_of_element_located((By.ID, "nava")))
+
+    results = asyncio.run(run_many(scenario, count=20, concurrency=10))
+
+Sessions come from an AsyncBrowserPool, which runs a single chromedriver
+and keeps its Chrome sessions warm between scenarios like DriverPool.
+Waits take the same conditions as PushWait (harness.waits). Ports of the
+suite's scenarios live in harness.aio_scenarios and run from the command
+line:
+
+    python -m harness.aio ecommerce -n 20 -c 10
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import subprocess
+import sys
+import time
+from contextlib import asynccontextmanager
+from urllib.parse import urlsplit
+
+from selenium.common.exceptions import (
+    InvalidSelectorException,
+    JavascriptException,
+    NoAlertPresentException,
+    TimeoutException,
+    WebDriverException,
+)
+from selenium.webdriver.common.by import By
+from selenium.webdriver.common.utils import free_port
+from selenium.webdriver.remote.errorhandler import ErrorHandler
+
+from harness.artifacts import default_writer
+from harness.driver_binary import chromedriver_path
+from harness.locators import normalize
+from harness.pool import CLEAR_STORAGE_SCRIPT, DEFAULT_TIMEOUTS
+from harness.profiles import chrome_options
+from harness.waits import BACKSTOP_INTERVAL_MS, MAX_SCRIPT_WAIT, WAIT_SCRIPT, DomCondition
+
+ELEMENT_KEY = "element-6066-11e4-a52e-4f735466cecf"
+
+SERVICE_START_TIMEOUT = 20.0
+
+
+class _Connection:
+    """
+    Keep-alive HTTP/1.1 connection carrying JSON to a WebDriver server.
+
+    Requests on one connection are sent one at a time; use a connection per
+    session so sessions do not queue behind each other.
+    """
+
+    def __init__(self, url):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.prefix = parts.path.rstrip("/")
+        self._reader = None
+        self._writer = None
+        self._lock = asyncio.Lock()
+
+    async def request(self, method, path, body=None):
+        """
+        Send one request.
+
+        Args:
+            method: HTTP method
+            path: Path below the server URL
+            body: JSON-serialisable request body
+
+        Returns:
+            tuple: (HTTP status, response text)
+        """
+        payload = json.dumps(body).encode() if body is not None else b""
+        head = (
+            f"{method} {self.prefix}{path} HTTP/1.1\r\n"
+            f"Host: {self.host}:{self.port}\r\n"
+            "Content-Type: application/json;charset=UTF-8\r\n"
+            "Accept: application/json\r\n"
+            f"Content-Length: {len(payload)}\r\n"
+            "\r\n"
+        ).encode("latin-1")
+        async with self._lock:
+            if self._writer is not None and self._reader.at_eof():
+                # The server already closed this idle keep-alive connection
+                self._close()
+            reused = self._writer is not None
+            if not reused:
+                self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+            sent = False
+            try:
+                self._writer.write(head + payload)
+                await self._writer.drain()
+                sent = True
+                return await self._read_response()
+            except (ConnectionError, asyncio.IncompleteReadError):
+                self._close()
+                # Once the request is out the server may have acted on it, so
+                # only a GET is safe to send twice; a POST (navigation, click)
+                # could run again
+                if not reused or (sent and method != "GET"):
+                    raise
+            # The server dropped an idle keep-alive connection; retry once on a new one
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+            self._writer.write(head + payload)
+            await self._writer.drain()
+            return await self._read_response()
+
+    async def _read_response(self):
+        status_line = await self._reader.readline()
+        if not status_line:
+            raise ConnectionResetError("Connection closed by the WebDriver server")
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await self._reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int((await self._reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    await self._reader.readline()
+                    break
+                chunks.append(await self._reader.readexactly(size))
+                await self._reader.readline()
+            body = b"".join(chunks)
+        else:
+            body = await self._reader.readexactly(int(headers.get("content-length", 0)))
+
+        if headers.get("connection", "").lower() == "close":
+            self._close()
+        return status, body.decode("utf-8")
+
+    def _close(self):
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+    async def close(self):
+        async with self._lock:
+            self._close()
+
+
+def _check(status, text):
+    # Errors carry a W3C error code; let Selenium map it to its exception types
+    if status >= 400:
+        ErrorHandler().check_response({"status": status, "value": text})
+        raise WebDriverException(f"HTTP {status}: {text[:200]}")
+    return json.loads(text)["value"] if text else None
+
+
+def w3c_locator(by, value):
+    """
+    Translate a locator to a strategy chromedriver accepts.
+
+    By.ID, By.NAME, By.CLASS_NAME and By.TAG_NAME become CSS selectors,
+    the same translation the in-page waits use (see locators.normalize).
+    """
+    return normalize((by, value))
+
+
+class AsyncDriver:
+    """
+    One WebDriver session driven from an event loop.
+
+    Method names follow the synchronous WebDriver; values Selenium exposes
+    as properties (title, current_url, window_handles) are coroutines here.
+    """
+
+    def __init__(self, url, session_id):
+        """
+        Args:
+            url: WebDriver server URL, e.g. "http://127.0.0.1:9515"
+            session_id: Existing session to drive
+        """
+        self.url = url
+        self.session_id = session_id
+        self._connection = _Connection(url)
+
+    @classmethod
+    def attach(cls, driver):
+        """
+        Drive the session of a synchronous WebDriver (e.g. from DriverPool).
+
+        Args:
+            driver: Selenium WebDriver; do not use it while the facade runs commands
+        """
+        return cls(driver.command_executor._client_config.remote_server_addr, driver.session_id)
+
+    async def command(self, method, path, body=None):
+        """
+        Send a command for this session.
+
+        Args:
+            method: "GET", "POST" or "DELETE"
+            path: Path below /session/{id}
+            body: JSON body for POST commands
+
+        Returns:
+            The unwrapped "value" of the response; elements become AsyncElements.
+
+        Raises:
+            WebDriverException: The matching Selenium exception for W3C errors
+        """
+        if method == "POST" and body is None:
+            body = {}
+        status, text = await self._connection.request(method, f"/session/{self.session_id}{path}", body)
+        return self._unwrap(_check(status, text))
+
+    def _unwrap(self, value):
+        if isinstance(value, dict):
+            if ELEMENT_KEY in value:
+                return AsyncElement(self, value[ELEMENT_KEY])
+            return {key: self._unwrap(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self._unwrap(item) for item in value]
+        return value
+
+    @classmethod
+    def _wrap(cls, value):
+        if isinstance(value, AsyncElement):
+            return {ELEMENT_KEY: value.id}
+        if isinstance(value, dict):
+            return {key: cls._wrap(item) for key, item in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [cls._wrap(item) for item in value]
+        return value
+
+    # -- navigation -------------------------------------------------------
+
+    async def get(self, url):
+        await self.command("POST", "/url", {"url": url})
+
+    async def title(self):
+        return await self.command("GET", "/title")
+
+    async def current_url(self):
+        return await self.command("GET", "/url")
+
+    async def page_source(self):
+        return await self.command("GET", "/source")
+
+    # -- elements and scripts ---------------------------------------------
+
+    async def find_element(self, by=By.ID, value=None):
+        using, value = w3c_locator(by, value)
+        return await self.command("POST", "/element", {"using": using, "value": value})
+
+    async def find_elements(self, by=By.ID, value=None):
+        using, value = w3c_locator(by, value)
+        return await self.command("POST", "/elements", {"using": using, "value": value})
+
+    async def execute_script(self, script, *args):
+        return await self.command("POST", "/execute/sync", {"script": script, "args": self._wrap(args)})
+
+    async def execute_async_script(self, script, *args):
+        return await self.command("POST", "/execute/async", {"script": script, "args": self._wrap(args)})
+
+    async def execute_cdp_cmd(self, cmd, cmd_args):
+        return await self.command("POST", "/goog/cdp/execute", {"cmd": cmd, "params": cmd_args})
+
+    # -- windows, alerts, cookies, timeouts -------------------------------
+
+    async def window_handles(self):
+        return await self.command("GET", "/window/handles")
+
+    async def switch_to_window(self, handle):
+        await self.command("POST", "/window", {"handle": handle})
+
+    async def close(self):
+        """Close the current window."""
+        return await self.command("DELETE", "/window")
+
+    async def alert_text(self):
+        return await self.command("GET", "/alert/text")
+
+    async def accept_alert(self):
+        await self.command("POST", "/alert/accept")
+
+    async def dismiss_alert(self):
+        await self.command("POST", "/alert/dismiss")
+
+    async def delete_all_cookies(self):
+        await self.command("DELETE", "/cookie")
+
+    async def set_timeouts(self, implicit=None, page_load=None, script=None):
+        """
+        Set session timeouts in seconds; None leaves a timeout unchanged.
+        """
+        values = {"implicit": implicit, "pageLoad": page_load, "script": script}
+        await self.command("POST", "/timeouts", {
+            name: int(seconds * 1000) for name, seconds in values.items() if seconds is not None
+        })
+
+    async def implicitly_wait(self, seconds):
+        await self.set_timeouts(implicit=seconds)
+
+    # -- screenshots and teardown -----------------------------------------
+
+    async def get_screenshot_as_base64(self):
+        return await self.command("GET", "/screenshot")
+
+    async def screenshot(self, name):
+        """
+        Capture a screenshot now and save it through the default ArtifactWriter.
+
+        Returns:
+            str: Name the screenshot is indexed under in the artifact store.
+        """
+        return default_writer().save_encoded(await self.get_screenshot_as_base64(), name)
+
+    async def quit(self):
+        """End the session and close the connection."""
+        try:
+            status, text = await self._connection.request("DELETE", f"/session/{self.session_id}")
+            _check(status, text)
+        finally:
+            await self._connection.close()
+
+
+class AsyncElement:
+    """
+    Element reference returned by AsyncDriver lookups.
+    """
+
+    def __init__(self, driver, element_id):
+        self.driver = driver
+        self.id = element_id
+
+    def _command(self, method, path, body=None):
+        return self.driver.command(method, f"/element/{self.id}{path}", body)
+
+    async def click(self):
+        await self._command("POST", "/click")
+
+    async def clear(self):
+        await self._command("POST", "/clear")
+
+    async def send_keys(self, *value):
+        text = "".join(str(item) for item in value)
+        await self._command("POST", "/value", {"text": text, "value": list(text)})
+
+    async def text(self):
+        return await self._command("GET", "/text")
+
+    async def get_attribute(self, name):
+        return await self._command("GET", f"/attribute/{name}")
+
+    async def get_property(self, name):
+        return await self._command("GET", f"/property/{name}")
+
+    async def is_displayed(self):
+        return await self._command("GET", "/displayed")
+
+    async def is_enabled(self):
+        return await self._command("GET", "/enabled")
+
+    async def find_element(self, by=By.ID, value=None):
+        using, value = w3c_locator(by, value)
+        return await self._command("POST", "/element", {"using": using, "value": value})
+
+    async def find_elements(self, by=By.ID, value=None):
+        using, value = w3c_locator(by, value)
+        return await self._command("POST", "/elements", {"using": using, "value": value})
+
+    def __eq__(self, other):
+        return isinstance(other, AsyncElement) and other.id == self.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def __repr__(self):
+        return f"AsyncElement({self.id!r})"
+
+
+def alert_is_present():
+    """Condition met (with the alert text) once an alert is open."""
+    async def condition(driver):
+        try:
+            text = await driver.alert_text()
+        except NoAlertPresentException:
+            return False
+        return text or True
+    return condition
+
+
+class AsyncWait:
+    """
+    PushWait for AsyncDriver.
+
+    DomConditions (harness.waits) resolve in the page through one async
+    script per chunk; other conditions are coroutine functions taking the
+    driver and are polled with asyncio.sleep, so waiting never blocks the
+    event loop.
+    """
+
+    def __init__(self, driver, timeout, poll_frequency=0.5):
+        """
+        Args:
+            driver: AsyncDriver instance
+            timeout: Seconds before TimeoutException is raised
+            poll_frequency: Poll interval for conditions that are not DomConditions
+        """
+        self._driver = driver
+        self._timeout = timeout
+        self._poll = poll_frequency
+
+    async def until(self, method, message=""):
+        """
+        Wait until the condition is met.
+
+        Args:
+            method: DomCondition or async callable taking the driver
+            message: Text for the TimeoutException
+
+        Returns:
+            The condition's value (AsyncElement, list of AsyncElements or True).
+        """
+        deadline = time.monotonic() + self._timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutException(message or f"{method!r} not met after {self._timeout}s")
+            if isinstance(method, DomCondition):
+                value = await self._push(method, remaining)
+            else:
+                value = await method(self._driver)
+                if not value:
+                    await asyncio.sleep(min(self._poll, max(remaining, 0)))
+            if value:
+                return value
+
+    async def _push(self, condition, remaining):
+        chunk_ms = int(min(remaining, MAX_SCRIPT_WAIT) * 1000)
+        try:
+            result = await self._driver.execute_async_script(
+                WAIT_SCRIPT, condition.kind, condition.strategy, condition.value,
+                chunk_ms, BACKSTOP_INTERVAL_MS,
+            )
+        except JavascriptException as e:
+            # Navigation replaced the document; start again on the new page
+            if "unloaded" in str(e) or "detached" in str(e):
+                return None
+            raise
+        except TimeoutException:
+            # The session's script timeout is shorter than the chunk
+            return None
+        if result.get("error"):
+            raise InvalidSelectorException(result["error"])
+        return result.get("value")
+
+
+async def reset_driver(driver):
+    """
+    Async counterpart of harness.pool.reset_driver.
+
+    Args:
+        driver: AsyncDriver to return to a blank state
+    """
+    try:
+        await driver.dismiss_alert()
+    except NoAlertPresentException:
+        pass
+    handles = await driver.window_handles()
+    for handle in handles[1:]:
+        await driver.switch_to_window(handle)
+        await driver.close()
+    await driver.switch_to_window(handles[0])
+    await driver.execute_script(CLEAR_STORAGE_SCRIPT)
+    await driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+    await driver.set_timeouts(
+        implicit=DEFAULT_TIMEOUTS.implicit_wait,
+        page_load=DEFAULT_TIMEOUTS.page_load,
+        script=DEFAULT_TIMEOUTS.script,
+    )
+    await driver.get("about:blank")
+
+
+class AsyncBrowserPool:
+    """
+    Warm Chrome sessions behind one chromedriver, leased from coroutines.
+
+    Like DriverPool, browsers are reset between leases and replaced when the
+    reset fails; a lease waits while max_size sessions are in use.
+    """
+
+    def __init__(self, max_size=8, options_factory=chrome_options, url=None):
+        """
+        Args:
+            max_size: Maximum number of concurrent Chrome sessions
+            options_factory: Callable returning Chrome options for new sessions
+            url: Existing chromedriver to use instead of starting one
+        """
+        self.max_size = max_size
+        self.options_factory = options_factory
+        self.url = url
+        self.stats = {"created": 0, "reused": 0, "recycled": 0}
+        self._process = None
+        self._idle = []
+        self._live = 0
+        self._cond = asyncio.Condition()
+        self._started = None
+        self._closed = False
+
+    async def start(self):
+        """Start chromedriver unless a URL was given; called by the first acquire()."""
+        if self.url is not None:
+            return
+        port = free_port()
+        self._process = await asyncio.create_subprocess_exec(
+            chromedriver_path(), f"--port={port}",
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        self.url = f"http://127.0.0.1:{port}"
+        connection = _Connection(self.url)
+        deadline = time.monotonic() + SERVICE_START_TIMEOUT
+        try:
+            while True:
+                try:
+                    status, text = await connection.request("GET", "/status")
+                    if status == 200 and _check(status, text).get("ready"):
+                        return
+                except OSError:
+                    pass
+                if time.monotonic() > deadline or self._process.returncode is not None:
+                    raise WebDriverException(f"chromedriver did not start on port {port}")
+                await asyncio.sleep(0.05)
+        finally:
+            await connection.close()
+
+    async def _new_session(self):
+        connection = _Connection(self.url)
+        capabilities = self.options_factory().to_capabilities()
+        try:
+            status, text = await connection.request(
+                "POST", "/session", {"capabilities": {"firstMatch": [{}], "alwaysMatch": capabilities}}
+            )
+        finally:
+            await connection.close()
+        return AsyncDriver(self.url, _check(status, text)["sessionId"])
+
+    async def acquire(self):
+        """
+        Lease a browser, starting a new session if none is idle.
+
+        Returns:
+            AsyncDriver: A session in a clean state.
+        """
+        # Concurrent first leases share one chromedriver start
+        if self._started is None:
+            self._started = asyncio.ensure_future(self.start())
+        await self._started
+        async with self._cond:
+            while not self._idle and self._live >= self.max_size:
+                await self._cond.wait()
+            if self._idle:
+                self.stats["reused"] += 1
+                return self._idle.pop()
+            self._live += 1
+        try:
+            driver = await self._new_session()
+        except BaseException:
+            async with self._cond:
+                self._live -= 1
+                self._cond.notify()
+            raise
+        self.stats["created"] += 1
+        return driver
+
+    async def release(self, driver, discard=False):
+        """
+        Return a leased browser.
+
+        Args:
+            driver: AsyncDriver from acquire()
+            discard: Quit the session instead of reusing it
+        """
+        keep = not discard and not self._closed
+        if keep:
+            try:
+                await reset_driver(driver)
+            except Exception:
+                keep = False
+        if not keep:
+            await self._quit(driver)
+        async with self._cond:
+            if keep and not self._closed:
+                self._idle.append(driver)
+            else:
+                self._live -= 1
+                if not discard:
+                    self.stats["recycled"] += 1
+            self._cond.notify()
+
+    @asynccontextmanager
+    async def lease(self):
+        driver = await self.acquire()
+        try:
+            yield driver
+        finally:
+            await self.release(driver)
+
+    async def close(self):
+        """Quit idle sessions and stop chromedriver if this pool started it."""
+        self._closed = True
+        idle, self._idle = self._idle, []
+        await asyncio.gather(*(self._quit(driver) for driver in idle))
+        if self._process is not None and self._process.returncode is None:
+            self._process.terminate()
+            await self._process.wait()
+
+    @staticmethod
+    async def _quit(driver):
+        try:
+            await driver.quit()
+        except Exception:
+            pass
+
+
+async def run_many(scenario, count, concurrency=8, pool=None):
+    """
+    Run a scenario count times, up to concurrency sessions at once.
+
+    Args:
+        scenario: Coroutine function taking an AsyncDriver
+        count: Number of runs
+        concurrency: Sessions used when no pool is given
+        pool: AsyncBrowserPool to lease from (closed only if created here)
+
+    Returns:
+        list: One dict per run with "index", "seconds" and "error" (None if it passed).
+    """
+    own_pool = pool is None
+    if own_pool:
+        pool = AsyncBrowserPool(max_size=concurrency)
+
+    async def one(index):
+        started = time.perf_counter()
+        error = None
+        try:
+            async with pool.lease() as driver:
+                await scenario(driver)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        return {"index": index, "seconds": time.perf_counter() - started, "error": error}
+
+    try:
+        return await asyncio.gather(*(one(index) for index in range(count)))
+    finally:
+        if own_pool:
+            await pool.close()
+
+
+def load_scenario(name):
+    """
+    Find a scenario by name in harness.aio_scenarios, or as "module:function".
+    """
+    if ":" in name:
+        module, _, attribute = name.partition(":")
+        return getattr(importlib.import_module(module), attribute)
+    from harness.aio_scenarios import SCENARIOS
+
+    if name not in SCENARIOS:
+        raise SystemExit(f"Unknown scenario {name!r}, expected one of {sorted(SCENARIOS)} or module:function")
+    return SCENARIOS[name]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Run an async scenario many times concurrently in one process.",
+    )
+    parser.add_argument("scenario", help="name from harness.aio_scenarios, or module:function")
+    parser.add_argument("-n", "--count", type=int, default=10, help="number of runs (default 10)")
+    parser.add_argument("-c", "--concurrency", type=int, default=8,
+                        help="browser sessions used at once (default 8)")
+    options = parser.parse_args(argv)
+
+    scenario = load_scenario(options.scenario)
+    started = time.perf_counter()
+    results = asyncio.run(run_many(scenario, options.count, options.concurrency))
+    elapsed = time.perf_counter() - started
+
+    failed = [result for result in results if result["error"]]
+    for result in failed:
+        print(f"run {result['index']}: {result['error']}")
+    print(f"{len(results) - len(failed)}/{len(results)} runs passed in {elapsed:.1f}s "
+          f"({len(results) / elapsed:.2f} runs/s, {options.concurrency} sessions)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+"""
+Async ports of the suite's scenarios, for harness.aio.
+
+Each scenario is a coroutine function taking an AsyncDriver and follows
+the steps of the test it is ported from:
+
+    placeholder  pysel9ay.test_placeholder_scenario
+    ecommerce    pysel52b TestECommerceWorkflow.test_product_search_and_add_to_cart
+    acdc         pysel55e ACDCDeviceManagementTests.test_tc001_prevent_serial_number_change
+
+Locators are copied from the page objects of those modules (which are
+test modules and, for pysel52b, not importable). The ACDC port always logs
+in through the form: the saved-session cache (harness.sessions) works on
+synchronous drivers only.
+"""
+import os
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.common.keys import Keys
+
+from harness import waits as EC
+from harness.aio import AsyncWait, alert_is_present
+from harness.stubserver import route
+
+STORE_URL = "https://www.demoblaze.com/"
+
+
+async def placeholder(driver):
+    """Search example.com and expect at least one result."""
+    wait = AsyncWait(driver, 15)
+    await driver.get(route("https://example.com"))
+    await wait.until(EC.document_ready())
+
+    search_box = await wait.until(EC.visibility_of_element_located((By.NAME, "q")))
+    await search_box.send_keys("Selenium Test", Keys.RETURN)
+
+    results = await wait.until(EC.presence_of_all_elements_located((By.CSS_SELECTOR, ".result")))
+    assert len(results) > 0, "No search results found."
+
+
+async def ecommerce(driver):
+    """Open the MacBook Pro from the Laptops category and add it to the cart."""
+    wait = AsyncWait(driver, 15)
+    await driver.get(route(STORE_URL))
+    await wait.until(EC.presence_of_element_located((By.ID, "nava")))
+
+    laptops = await wait.until(EC.element_to_be_clickable((By.XPATH, "//a[contains(text(),'Laptops')]")))
+    await laptops.click()
+    await wait.until(EC.visibility_of_element_located(
+        (By.CSS_SELECTOR, 'div[class="card-block"] h4[class="card-title"]')
+    ))
+
+    product = await wait.until(EC.element_to_be_clickable((By.XPATH, "//a[contains(text(),'MacBook Pro')]")))
+    await product.click()
+    heading = await wait.until(EC.visibility_of_element_located((By.XPATH, "//h2[contains(text(),'MacBook Pro')]")))
+    product_title = await heading.text()
+    assert "MacBook Pro" in product_title, f"Expected 'MacBook Pro' in title, but got '{product_title}'"
+
+    add_to_cart = await wait.until(EC.element_to_be_clickable((By.XPATH, "//a[contains(text(),'Add to cart')]")))
+    await add_to_cart.click()
+    await wait.until(alert_is_present())
+    await driver.accept_alert()
+
+    cart = await wait.until(EC.element_to_be_clickable((By.ID, "cartur")))
+    await cart.click()
+    await wait.until(EC.visibility_of_element_located((By.XPATH, "//h2[contains(text(),'Products')]")))
+
+    rows = await wait.until(EC.presence_of_all_elements_located(
+        (By.CSS_SELECTOR, 'tr[class="success"] td:nth-of-type(2)')
+    ))
+    cart_texts = [await row.text() for row in rows]
+    assert any("MacBook Pro" in text for text in cart_texts), "Product 'MacBook Pro' was not found in the cart"
+
+
+async def acdc(driver, serial_number="SN12345", new_serial_number="SN12345-NEW"):
+    """Log in, open a device and check its serial number cannot be changed."""
+    wait = AsyncWait(driver, 20)
+
+    # Login through the form
+    await driver.get(route(os.getenv("ACDC_URL", "https://acdc-app.example.com")))
+    username = await wait.until(EC.visibility_of_element_located((By.ID, "username")))
+    await username.send_keys(os.getenv("ACDC_USERNAME", "test_user"))
+    password = await driver.find_element(By.ID, "password")
+    await password.send_keys(os.getenv("ACDC_PASSWORD", "test_password"))
+    login = await wait.until(EC.element_to_be_clickable((By.XPATH, "//button[contains(text(), 'Login')]")))
+    await login.click()
+    await wait.until(EC.visibility_of_element_located((By.XPATH, "//h1[contains(text(), 'Dashboard')]")))
+
+    # Device management
+    link = await wait.until(EC.element_to_be_clickable((By.XPATH, "//a[contains(text(), 'Device Management')]")))
+    await link.click()
+    await wait.until(EC.visibility_of_element_located((By.XPATH, "//h1[contains(text(), 'Device Management')]")))
+
+    # Select the device
+    search = await wait.until(EC.visibility_of_element_located((By.ID, "device-search")))
+    await search.clear()
+    await search.send_keys(serial_number)
+    search_button = await wait.until(EC.element_to_be_clickable((By.XPATH, "//button[contains(text(), 'Search')]")))
+    await search_button.click()
+    row = await wait.until(EC.element_to_be_clickable((By.XPATH, f"//tr[contains(., '{serial_number}')]")))
+    await row.click()
+
+    # Attempt the edit
+    edit = await wait.until(EC.element_to_be_clickable((By.XPATH, "//button[contains(text(), 'Edit')]")))
+    await edit.click()
+    field = await wait.until(EC.presence_of_element_located((By.ID, "serial-number")))
+    is_editable = not await field.get_attribute("disabled")
+    error_message = None
+    if is_editable:
+        await field.clear()
+        await field.send_keys(new_serial_number)
+        save = await wait.until(EC.element_to_be_clickable((By.XPATH, "//button[contains(text(), 'Save')]")))
+        await save.click()
+        try:
+            message = await wait.until(EC.visibility_of_element_located((By.CLASS_NAME, "error-message")))
+            error_message = await message.text()
+        except TimeoutException:
+            pass
+
+    assert not is_editable or error_message is not None, "Serial number should not be editable"
+
+
+SCENARIOS = {
+    "placeholder": placeholder,
+    "ecommerce": ecommerce,
+    "acdc": acdc,
+}
@@ -0,0 +1,496 @@
+"""
+Content-addressed store for run artifacts.
+
+Screenshots used to land in a flat screenshots/ directory as
+{name}_{timestamp}.png, which grows without bound, collides when two
+failures happen in the same second and can only be searched by listing it.
+The store keeps artifacts in .harness/artifacts/ instead:
+
+- blobs/ab/cdef...: one file per distinct content, named by the SHA-256
+  of the uncompressed bytes, so identical screenshots, logs or page
+  sources are kept once however many tests produce them. Text-like
+  artifacts are gzip-compressed; formats that are compressed already
+  (PNG, JPEG, video, archives) are stored as they are, because gzip would
+  only cost CPU;
+- index.sqlite: one row per artifact with its run, test node id, step,
+  kind and name, indexed by test and by run, so a test's artifacts are
+  found without scanning anything.
+
+Writes are streamed: ArtifactStore.open_write() hashes and compresses
+chunks as they arrive, and the blob appears under its final name only
+when complete. Retention runs when the store is opened and whenever a new
+blob takes it over budget: artifacts older than HARNESS_ARTIFACT_MAX_DAYS
+(default 14) are dropped, then the oldest runs until the blobs fit in
+HARNESS_ARTIFACT_MAX_MB (default 200). Blobs no artifact refers to any
+more are deleted.
+
+Every artifact of one pytest session shares a run id (HARNESS_RUN_ID,
+which harness.parallel passes to all of its workers). Browse the store
+with
+
+    python -m harness.artifact_store list --test "pysel51a.py::TestLogin::test_successful_login"
+    python -m harness.artifact_store export 42 /tmp/failure.png
+    python -m harness.artifact_store prune
+"""
+import argparse
+import gzip
+import hashlib
+import os
+import shutil
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+import zlib
+from contextlib import contextmanager
+
+from harness.config import cache_dir
+from harness.fileutil import file_lock
+
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+DEFAULT_MAX_DAYS = 14
+CHUNK_SIZE = 64 * 1024
+
+# Already compressed; gzip would not shrink them
+_STORED_AS_IS = (".png", ".jpg", ".jpeg", ".gif", ".webp", ".webm", ".mp4", ".zip", ".gz", ".br", ".zst")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    digest TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    stored_size INTEGER NOT NULL,
+    encoding TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS artifacts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run TEXT NOT NULL,
+    test TEXT,
+    step TEXT,
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL,
+    digest TEXT NOT NULL REFERENCES blobs(digest),
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS artifacts_test ON artifacts(test);
+CREATE INDEX IF NOT EXISTS artifacts_run ON artifacts(run, created);
+CREATE INDEX IF NOT EXISTS artifacts_digest ON artifacts(digest);
+"""
+
+_COLUMNS = ("id", "run", "test", "step", "kind", "name", "digest", "created", "size", "stored_size", "encoding")
+
+
+def new_run_id():
+    """Return a sortable, unique id for a test run."""
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+
+
+def encoding_for(name):
+    """
+    Choose how a blob is stored from its artifact name.
+
+    Returns:
+        str: "identity" for formats that are already compressed, else "gzip".
+    """
+    return "identity" if name.lower().endswith(_STORED_AS_IS) else "gzip"
+
+
+class BlobWriter:
+    """
+    File-like sink for one artifact; returned by ArtifactStore.open_write().
+
+    Data is hashed and compressed chunk by chunk into a temporary file.
+    close() files it under its digest and indexes it; abort() throws it away.
+
+    Attributes:
+        artifact: Index row of the artifact once closed (see ArtifactStore.get)
+    """
+
+    def __init__(self, store, metadata, encoding):
+        self.store = store
+        self.metadata = metadata
+        self.encoding = encoding
+        self.artifact = None
+        self._hash = hashlib.sha256()
+        self._size = 0
+        self._tmp = os.path.join(store.root, "tmp", f"{os.getpid()}-{uuid.uuid4().hex}")
+        os.makedirs(os.path.dirname(self._tmp), exist_ok=True)
+        self._file = open(self._tmp, "wb")
+        # wbits=31 writes a gzip container, so blobs can also be read with zcat
+        self._compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if encoding == "gzip" else None
+
+    def write(self, data):
+        self._hash.update(data)
+        self._size += len(data)
+        self._file.write(self._compressor.compress(data) if self._compressor else data)
+        return len(data)
+
+    def close(self):
+        """
+        Finish the blob and index the artifact.
+
+        Returns:
+            dict: The artifact's index row.
+        """
+        if self.artifact is not None:
+            return self.artifact
+        if self._compressor is not None:
+            self._file.write(self._compressor.flush())
+        self._file.close()
+        self.artifact = self.store._commit(self._tmp, self._hash.hexdigest(), self._size,
+                                           self.encoding, self.metadata)
+        return self.artifact
+
+    def abort(self):
+        """Discard what was written."""
+        self._file.close()
+        try:
+            os.remove(self._tmp)
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class ArtifactStore:
+    """
+    Content-addressed, compressed artifact blobs with a SQLite index.
+
+    Safe to share between threads and worker processes: every call opens
+    its own connection, and blob files are only created or deleted under
+    a file lock on the index.
+
+    Attributes:
+        run: Run id recorded with new artifacts
+        stats: Counts of artifacts "written", blobs that were "duplicates"
+            of stored content, artifacts "evicted" by retention and bytes
+            "saved" by compression and deduplication
+    """
+
+    def __init__(self, root=None, max_bytes=None, max_age=None, run=None):
+        """
+        Args:
+            root: Store directory, defaults to .harness/artifacts
+            max_bytes: Budget for stored blobs
+                (HARNESS_ARTIFACT_MAX_MB, default 200 MB)
+            max_age: Seconds artifacts are kept
+                (HARNESS_ARTIFACT_MAX_DAYS, default 14 days)
+            run: Run id, defaults to HARNESS_RUN_ID or a new id
+        """
+        self.root = root or cache_dir("artifacts")
+        self.index = os.path.join(self.root, "index.sqlite")
+        if max_bytes is None:
+            max_bytes = int(float(os.getenv("HARNESS_ARTIFACT_MAX_MB", DEFAULT_MAX_BYTES / 1024 / 1024))
+                            * 1024 * 1024)
+        if max_age is None:
+            max_age = float(os.getenv("HARNESS_ARTIFACT_MAX_DAYS", DEFAULT_MAX_DAYS)) * 24 * 3600
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.run = run or os.getenv("HARNESS_RUN_ID") or new_run_id()
+        self.stats = {"written": 0, "duplicates": 0, "evicted": 0, "saved": 0}
+        self._lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+        with self._connect() as db:
+            db.executescript(_SCHEMA)
+        self.prune()
+
+    @contextmanager
+    def _connect(self):
+        db = sqlite3.connect(self.index, timeout=30)
+        try:
+            db.execute("PRAGMA journal_mode=WAL")
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def blob_path(self, digest):
+        """Return the file a blob is stored in."""
+        return os.path.join(self.root, "blobs", digest[:2], digest[2:])
+
+    def open_write(self, name, kind="artifact", test=None, step=None, encoding=None):
+        """
+        Start streaming an artifact into the store.
+
+        Args:
+            name: Artifact name, e.g. "login_failure.png"
+            kind: Category such as "screenshot", "page_source" or "log"
+            test: Pytest node id the artifact belongs to
+            step: Test step it was captured in
+            encoding: "gzip" or "identity", chosen from name by default
+
+        Returns:
+            BlobWriter: Use as a context manager, or call close().
+        """
+        metadata = {"run": self.run, "test": test, "step": step, "kind": kind, "name": name}
+        return BlobWriter(self, metadata, encoding or encoding_for(name))
+
+    def put(self, data, name, kind="artifact", test=None, step=None):
+        """
+        Store bytes (or an iterable of byte chunks) as one artifact.
+
+        Returns:
+            dict: The artifact's index row (see get()).
+        """
+        with self.open_write(name, kind=kind, test=test, step=step) as writer:
+            for chunk in [data] if isinstance(data, (bytes, bytearray, memoryview)) else data:
+                writer.write(chunk)
+        return writer.artifact
+
+    def _commit(self, tmp, digest, size, encoding, metadata):
+        stored_size = os.path.getsize(tmp)
+        created = time.time()
+        with file_lock(self.index):
+            with self._connect() as db:
+                inserted = db.execute(
+                    "INSERT OR IGNORE INTO blobs (digest, size, stored_size, encoding) VALUES (?, ?, ?, ?)",
+                    (digest, size, stored_size, encoding),
+                ).rowcount
+                cursor = db.execute(
+                    "INSERT INTO artifacts (run, test, step, kind, name, digest, created) "
+                    "VALUES (:run, :test, :step, :kind, :name, :digest, :created)",
+                    dict(metadata, digest=digest, created=created),
+                )
+                artifact_id = cursor.lastrowid
+            path = self.blob_path(digest)
+            if inserted or not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(tmp, path)
+            else:
+                os.remove(tmp)
+        with self._lock:
+            self.stats["written"] += 1
+            if inserted:
+                self.stats["saved"] += size - stored_size
+            else:
+                self.stats["duplicates"] += 1
+                self.stats["saved"] += size
+        if inserted and self.stored_bytes() > self.max_bytes:
+            self.prune(keep=digest)
+        return self.get(artifact_id)
+
+    def get(self, artifact_id):
+        """
+        Return one artifact's index row.
+
+        Returns:
+            dict or None: id, run, test, step, kind, name, digest, created,
+                size (uncompressed), stored_size and encoding.
+        """
+        rows = self._select("a.id = ?", (artifact_id,))
+        return rows[0] if rows else None
+
+    def artifacts(self, test=None, run=None, kind=None):
+        """
+        Look artifacts up through the index, oldest first.
+
+        Args:
+            test: Pytest node id
+            run: Run id
+            kind: Artifact kind
+
+        Returns:
+            list[dict]: Index rows (see get()).
+        """
+        clauses, params = [], []
+        for column, value in (("test", test), ("run", run), ("kind", kind)):
+            if value is not None:
+                clauses.append(f"a.{column} = ?")
+                params.append(value)
+        return self._select(" AND ".join(clauses) or "1", params)
+
+    def _select(self, where, params):
+        with self._connect() as db:
+            rows = db.execute(
+                "SELECT a.id, a.run, a.test, a.step, a.kind, a.name, a.digest, a.created, "
+                "b.size, b.stored_size, b.encoding FROM artifacts a JOIN blobs b ON b.digest = a.digest "
+                f"WHERE {where} ORDER BY a.created, a.id",
+                params,
+            ).fetchall()
+        return [dict(zip(_COLUMNS, row)) for row in rows]
+
+    def runs(self):
+        """Return (run id, artifact count, first created) of every run, newest first."""
+        with self._connect() as db:
+            return db.execute(
+                "SELECT run, COUNT(*), MIN(created) FROM artifacts GROUP BY run ORDER BY MIN(created) DESC"
+            ).fetchall()
+
+    def open(self, artifact):
+        """
+        Open an artifact's content for reading, decompressed.
+
+        Args:
+            artifact: Index row (from get() or artifacts())
+
+        Returns:
+            A binary file object.
+        """
+        path = self.blob_path(artifact["digest"])
+        return gzip.open(path, "rb") if artifact["encoding"] == "gzip" else open(path, "rb")
+
+    def read(self, artifact):
+        """Return an artifact's content as bytes."""
+        with self.open(artifact) as f:
+            return f.read()
+
+    def export(self, artifact, path):
+        """Copy an artifact's content to path, decompressed."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self.open(artifact) as source, open(path, "wb") as target:
+            shutil.copyfileobj(source, target, CHUNK_SIZE)
+
+    def stored_bytes(self):
+        """Return the disk space taken by blobs."""
+        with self._connect() as db:
+            return db.execute("SELECT COALESCE(SUM(stored_size), 0) FROM blobs").fetchone()[0]
+
+    def prune(self, now=None, keep=None):
+        """
+        Enforce retention: drop expired artifacts, then the oldest runs over budget.
+
+        The current run is only trimmed when it alone exceeds the budget,
+        and the blob named by keep (the one just written) is never deleted.
+
+        Args:
+            now: Current time, for tests
+            keep: Digest that must survive
+
+        Returns:
+            int: Artifacts removed from the index.
+        """
+        now = time.time() if now is None else now
+        with file_lock(self.index):
+            with self._connect() as db:
+                removed = db.execute("DELETE FROM artifacts WHERE created < ?", (now - self.max_age,)).rowcount
+                removed += self._trim(db, keep)
+                orphans = [row[0] for row in db.execute(
+                    "SELECT digest FROM blobs WHERE digest NOT IN (SELECT digest FROM artifacts)"
+                )]
+                db.executemany("DELETE FROM blobs WHERE digest = ?", [(d,) for d in orphans])
+            # Deleted under the lock, so no writer can re-reference a blob in between
+            for digest in orphans:
+                try:
+                    os.remove(self.blob_path(digest))
+                except FileNotFoundError:
+                    pass
+            self._remove_stale_tmp(now)
+        with self._lock:
+            self.stats["evicted"] += removed
+        return removed
+
+    def _trim(self, db, keep):
+        total = db.execute("SELECT COALESCE(SUM(stored_size), 0) FROM blobs").fetchone()[0]
+        if total <= self.max_bytes:
+            return 0
+        removed = 0
+        # Other runs go first, oldest first; then this run's oldest artifacts
+        rows = db.execute(
+            "SELECT id, digest FROM artifacts ORDER BY run = ?, created, id", (self.run,)
+        ).fetchall()
+        references = dict(db.execute("SELECT digest, COUNT(*) FROM artifacts GROUP BY digest").fetchall())
+        sizes = dict(db.execute("SELECT digest, stored_size FROM blobs").fetchall())
+        for artifact_id, digest in rows:
+            if total <= self.max_bytes:
+                break
+            if digest == keep:
+                continue
+            db.execute("DELETE FROM artifacts WHERE id = ?", (artifact_id,))
+            removed += 1
+            references[digest] -= 1
+            if references[digest] == 0:
+                total -= sizes[digest]
+        return removed
+
+    def _remove_stale_tmp(self, now):
+        # Writes abandoned by killed processes
+        directory = os.path.join(self.root, "tmp")
+        if not os.path.isdir(directory):
+            return
+        for entry in os.scandir(directory):
+            try:
+                if entry.stat().st_mtime < now - 3600:
+                    os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def default_store():
+    """
+    Return the process-wide artifact store.
+
+    Returns:
+        ArtifactStore: The shared store, created (and pruned) on first use.
+    """
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = ArtifactStore()
+        return _default_store
+
+
+def active_store():
+    """Return the process-wide store if something has used it, else None."""
+    return _default_store
+
+
+def _format_size(size):
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m harness.artifact_store",
+                                     description="Browse the run artifact store.")
+    parser.add_argument("--root", help="store directory (default .harness/artifacts)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    listing = commands.add_parser("list", help="list artifacts, or runs without filters")
+    listing.add_argument("--test", help="pytest node id")
+    listing.add_argument("--run", help="run id")
+    listing.add_argument("--kind", help="artifact kind")
+    export = commands.add_parser("export", help="write an artifact's content to a file")
+    export.add_argument("id", type=int)
+    export.add_argument("path")
+    commands.add_parser("prune", help="apply retention now")
+    args = parser.parse_args(argv)
+
+    store = ArtifactStore(root=args.root)
+    if args.command == "list":
+        if not (args.test or args.run or args.kind):
+            for run, count, created in store.runs():
+                print(f"{run}  {count:>5} artifacts  {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(created))}")
+            return 0
+        for row in store.artifacts(test=args.test, run=args.run, kind=args.kind):
+            print(f"{row['id']:>6}  {row['run']}  {row['kind']:<12} {row['name']:<32} "
+                  f"{_format_size(row['size']):>8}  {row['test'] or '-'}  [{row['step'] or '-'}]")
+        return 0
+    if args.command == "export":
+        row = store.get(args.id)
+        if row is None:
+            print(f"no artifact {args.id}", file=sys.stderr)
+            return 1
+        store.export(row, args.path)
+        print(f"{row['name']} written to {args.path}")
+        return 0
+    # prune already ran when the store was opened
+    print(f"{_format_size(store.stored_bytes())} of {_format_size(store.max_bytes)} used, "
+          f"{store.stats['evicted']} artifacts removed")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,235 @@
+"""
+Asynchronous, deduplicated writer for failure artifacts.
+
+Saving a screenshot used to block the test: the PNG was base64-decoded and
+written to disk on the test thread. ArtifactWriter only grabs the encoded
+screenshot from the browser (one WebDriver round trip, which has to happen
+while the page is still in the failing state) and hands decoding, hashing
+and disk I/O to a background thread pool.
+
+The shared writer (default_writer()) saves into the content-addressed
+artifact store (harness.artifact_store), indexed by run, test and step. A
+writer given a directory instead stores byte-identical images once and
+caps the directory's size by evicting the oldest files first.
+"""
+import atexit
+import base64
+import functools
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from harness.artifact_store import default_store
+from harness.steps import current_step, current_test
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DIRECTORY = "screenshots"
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+
+
+class ArtifactWriter:
+    """
+    Writes screenshots in the background.
+
+    Call flush() (done automatically at the end of the pytest session) to
+    wait for pending writes.
+    """
+
+    def __init__(self, directory=DEFAULT_DIRECTORY, max_bytes=DEFAULT_MAX_BYTES, workers=2, store=None):
+        """
+        Args:
+            directory: Where artifacts are written
+            max_bytes: Disk budget for the directory; oldest files are evicted beyond it
+            workers: Background writer threads
+            store: ArtifactStore to save into instead of directory; it
+                deduplicates and enforces its own retention
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.store = store
+        self.stats = {"written": 0, "duplicates": 0, "evicted": 0, "errors": 0}
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="artifacts")
+        self._pending = []
+        self._digests = {}
+        self._sizes = None
+        self._lock = threading.Lock()
+
+    def screenshot(self, driver, name):
+        """
+        Capture a screenshot now and save it in the background.
+
+        Args:
+            driver: WebDriver instance
+            name: File name prefix
+
+        Returns:
+            str: Path the screenshot will be written to. If an identical image
+                was already saved, no new file appears at this path. With a
+                store, the name it is indexed under for the running test.
+        """
+        return self.save_encoded(driver.get_screenshot_as_base64(), name)
+
+    def save_encoded(self, encoded, name):
+        """
+        Save a base64 PNG already fetched from the browser in the background.
+
+        Args:
+            encoded: Base64 screenshot data
+            name: File name prefix
+
+        Returns:
+            str: Path or artifact name (see screenshot()).
+        """
+        if self.store is not None:
+            path = f"{name}.png"
+        else:
+            timestamp = time.strftime("%Y%m%d-%H%M%S")
+            path = os.path.join(self.directory, f"{name}_{timestamp}.png")
+        self.submit(path, lambda: base64.b64decode(encoded), kind="screenshot")
+        return path
+
+    def submit(self, path, produce, kind="artifact"):
+        """
+        Schedule an artifact write.
+
+        Args:
+            path: Destination file; with a store, its base name is the
+                artifact name
+            produce: Callable returning the bytes to write, run on a writer thread
+            kind: Artifact kind recorded in the store
+
+        Returns:
+            concurrent.futures.Future: Resolves to the path written, or the
+                path of an identical earlier artifact. With a store, to the
+                artifact's index row.
+        """
+        if self.store is not None:
+            # Test and step are only known on the calling thread
+            job = functools.partial(self._store, os.path.basename(path), produce, kind,
+                                    current_test(), current_step())
+        else:
+            job = functools.partial(self._write, path, produce)
+        future = self._executor.submit(job)
+        with self._lock:
+            self._pending = [f for f in self._pending if not f.done()]
+            self._pending.append(future)
+        return future
+
+    def _store(self, name, produce, kind, test, step):
+        try:
+            artifact = self.store.put(produce(), name, kind=kind, test=test, step=step)
+        except (OSError, sqlite3.Error):
+            with self._lock:
+                self.stats["errors"] += 1
+            raise
+        with self._lock:
+            self.stats["written"] += 1
+        return artifact
+
+    def _write(self, path, produce):
+        try:
+            data = produce()
+            digest = hashlib.sha256(data).hexdigest()
+            with self._lock:
+                existing = self._digests.get(digest)
+                if existing is not None and os.path.exists(existing):
+                    self.stats["duplicates"] += 1
+                    return existing
+                self._digests[digest] = path
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            tmp = f"{path}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+            self._account(path, len(data))
+            return path
+        except OSError:
+            with self._lock:
+                self.stats["errors"] += 1
+            raise
+
+    def _account(self, path, size):
+        with self._lock:
+            if self._sizes is None:
+                self._sizes = self._scan()
+            self._sizes[path] = size
+            self.stats["written"] += 1
+            total = sum(self._sizes.values())
+            if total <= self.max_bytes:
+                return
+            # Oldest first; the file just written is never evicted
+            for victim in sorted(self._sizes, key=self._mtime):
+                if total <= self.max_bytes:
+                    break
+                if victim == path:
+                    continue
+                try:
+                    os.remove(victim)
+                except FileNotFoundError:
+                    pass
+                total -= self._sizes.pop(victim)
+                self.stats["evicted"] += 1
+
+    def _scan(self):
+        # Files left by earlier runs count against the budget too
+        sizes = {}
+        if os.path.isdir(self.directory):
+            for entry in os.scandir(self.directory):
+                if entry.is_file() and not entry.name.endswith(".tmp"):
+                    sizes[entry.path] = entry.stat().st_size
+        return sizes
+
+    @staticmethod
+    def _mtime(path):
+        try:
+            return os.path.getmtime(path)
+        except FileNotFoundError:
+            return 0.0
+
+    def flush(self):
+        """Block until every scheduled artifact has been written."""
+        with self._lock:
+            pending, self._pending = self._pending, []
+        for future in pending:
+            try:
+                future.result()
+            except (OSError, sqlite3.Error) as e:
+                logger.warning("Could not write artifact: %s", e)
+
+    def close(self):
+        """Flush and stop the writer threads."""
+        self.flush()
+        self._executor.shutdown(wait=True)
+
+
+_default_writer = None
+_default_writer_lock = threading.Lock()
+
+
+def default_writer():
+    """
+    Return the process-wide artifact writer.
+
+    It saves into default_store(), whose retention is set by
+    HARNESS_ARTIFACT_MAX_MB and HARNESS_ARTIFACT_MAX_DAYS.
+
+    Returns:
+        ArtifactWriter: The shared writer, created on first use.
+    """
+    global _default_writer
+    with _default_writer_lock:
+        if _default_writer is None:
+            _default_writer = ArtifactWriter(store=default_store())
+            atexit.register(_default_writer.close)
+        return _default_writer
+
+
+def flush_default_writer():
+    """Wait for the shared writer's pending artifacts, if it was ever used."""
+    if _default_writer is not None:
+        _default_writer.flush()
@@ -0,0 +1,163 @@
+"""
+Batched DOM reads and actions.
+
+Reading item.text for every row of a table, or calling find/clear/send_keys
+/click for every field of a form, costs one WebDriver round trip per call.
+The helpers here do the whole job in a single script execution:
+
+    rows = read_all(driver, (By.XPATH, "//tr[@class='success']//td[2]"))
+    perform(driver, [
+        fill((By.ID, "email"), "user@example.com"),
+        fill((By.ID, "password"), "secret"),
+        click((By.XPATH, "//button[@type='submit']")),
+    ])
+
+Actions run through DOM APIs, so the events they raise are not "trusted"
+(event.isTrusted is false). Use real send_keys/click for flows that care,
+such as key-by-key validation or anti-bot checks.
+"""
+from selenium.common.exceptions import (
+    ElementNotInteractableException,
+    InvalidSelectorException,
+    NoSuchElementException,
+)
+
+from harness.locators import FIND_JS, normalize
+
+_READ_SCRIPT = FIND_JS + r"""
+var strategy = arguments[0], value = arguments[1], attributes = arguments[2];
+var withElements = arguments[3];
+var elements;
+try { elements = __harnessFind(strategy, value, true); }
+catch (e) { return {error: String(e && e.message || e)}; }
+return {items: elements.map(function (el) {
+  var visible = __harnessVisible(el);
+  var attrs = {};
+  attributes.forEach(function (name) {
+    var prop = el[name];
+    attrs[name] = (prop !== undefined && prop !== null && typeof prop !== 'object'
+                   && typeof prop !== 'function') ? prop : el.getAttribute(name);
+  });
+  var item = {text: visible ? (el.innerText || '').trim() : '', visible: visible, attributes: attrs};
+  if (withElements) { item.element = el; }
+  return item;
+})};
+"""
+
+_PERFORM_SCRIPT = FIND_JS + r"""
+var actions = arguments[0];
+
+function setValue(el, value) {
+  var proto = el instanceof HTMLTextAreaElement ? HTMLTextAreaElement.prototype
+            : el instanceof HTMLSelectElement ? HTMLSelectElement.prototype
+            : HTMLInputElement.prototype;
+  // Use the native setter so framework-controlled inputs notice the change
+  var setter = Object.getOwnPropertyDescriptor(proto, 'value').set;
+  setter.call(el, value);
+  el.dispatchEvent(new Event('input', {bubbles: true}));
+  el.dispatchEvent(new Event('change', {bubbles: true}));
+}
+
+for (var i = 0; i < actions.length; i++) {
+  var action = actions[i], el;
+  try { el = __harnessFind(action.strategy, action.value, false); }
+  catch (e) { return {done: i, error: 'invalid', message: String(e && e.message || e)}; }
+  if (!el) { return {done: i, error: 'missing', message: 'No element matches ' + action.value}; }
+  if (!__harnessVisible(el) || el.disabled) {
+    return {done: i, error: 'not_interactable', message: action.value + ' is hidden or disabled'};
+  }
+  if (action.type === 'click') {
+    el.click();
+  } else {
+    el.focus();
+    setValue(el, action.type === 'clear' ? '' : action.text);
+  }
+}
+return {done: actions.length};
+"""
+
+
+def _raise_script_error(result):
+    error, message = result["error"], result["message"]
+    if error == "missing":
+        raise NoSuchElementException(message)
+    if error == "not_interactable":
+        raise ElementNotInteractableException(message)
+    raise InvalidSelectorException(message)
+
+
+def read_all(driver, locator, attributes=(), with_elements=False):
+    """
+    Read text, visibility and attributes of every match in one round trip.
+
+    Args:
+        driver: WebDriver instance
+        locator: (By.X, value) tuple
+        attributes: Attribute/property names to read from each element
+        with_elements: Also return the WebElement of each match
+
+    Returns:
+        list: One dict per match with "text" (as WebElement.text would give
+            it: empty for hidden elements), "visible", "attributes" and
+            optionally "element".
+    """
+    strategy, value = normalize(locator)
+    result = driver.execute_script(_READ_SCRIPT, strategy, value, list(attributes), with_elements)
+    if "error" in result:
+        raise InvalidSelectorException(result["error"])
+    return result["items"]
+
+
+def texts(driver, locator):
+    """
+    Return the visible text of every match in one round trip.
+
+    Args:
+        driver: WebDriver instance
+        locator: (By.X, value) tuple
+
+    Returns:
+        list: One string per matching element.
+    """
+    return [item["text"] for item in read_all(driver, locator)]
+
+
+def fill(locator, text):
+    """Action: replace the value of an input, textarea or select."""
+    return {"type": "fill", "locator": locator, "text": str(text)}
+
+
+def clear(locator):
+    """Action: empty an input or textarea."""
+    return {"type": "clear", "locator": locator}
+
+
+def click(locator):
+    """Action: click an element."""
+    return {"type": "click", "locator": locator}
+
+
+def perform(driver, actions):
+    """
+    Apply a sequence of fill/clear/click actions in one script execution.
+
+    Every target must be visible and enabled, mirroring the visibility and
+    clickability conditions the step-by-step version waits for. Execution
+    stops at the first failing action.
+
+    Args:
+        driver: WebDriver instance
+        actions: List built with fill(), clear() and click()
+
+    Raises:
+        NoSuchElementException: A target does not exist
+        ElementNotInteractableException: A target is hidden or disabled
+    """
+    payload = []
+    for action in actions:
+        strategy, value = normalize(action["locator"])
+        payload.append({"type": action["type"], "strategy": strategy, "value": value,
+                        "text": action.get("text")})
+    result = driver.execute_script(_PERFORM_SCRIPT, payload)
+    if "error" in result:
+        _raise_script_error(result)
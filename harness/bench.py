@@ -0,0 +1,536 @@
+"""
+Benchmarks for the browser automation stack.
+
+Usage:
+    python -m harness.bench [--iterations 20] [--only navigation locator] [--profile fast-ci]
+                            [--out results.json]
+    python -m harness.bench --baseline baseline.json [--threshold 0.15]
+    python -m harness.bench --compare baseline.json results.json [--threshold 0.15]
+    python -m harness.bench --profiles fast-ci debug visual
+
+Every benchmark runs against a small demoblaze-like site served from
+127.0.0.1, so results do not depend on the network. Each benchmark reports
+min/mean/p50/p90/p95/p99/max in seconds. With --baseline (or --compare) a
+benchmark whose p50 is more than --threshold slower than the baseline is a
+regression, and the command exits with status 1. --profiles runs the start,
+navigation and workflow benchmarks once per Chrome profile (see
+harness.profiles) and prints them side by side.
+
+Benchmarks:
+    start.cold             launch Chrome with the selected profile's options
+    start.fresh_profile    the same, on a new empty user-data-dir instead of a
+                           clone of the profile template (harness.userdata)
+    start.headless_old     launch Chrome with --headless
+    start.headless_new     launch Chrome with --headless=new
+    start.warm             lease a pooled browser (reset + health check)
+    navigation             driver.get of the fixture store page
+    locator.<strategy>     find_element by id, name, class name, css, xpath, xpath text()
+    wait.push / wait.poll  extra latency over an element appearing after 100 ms,
+                           PushWait vs WebDriverWait (0.5 s polling)
+    screenshot.save        driver.save_screenshot (decode + write on the test thread)
+    screenshot.async       ArtifactWriter.screenshot (capture only, write in background)
+    workflow.ecommerce     the TestECommerceWorkflow product -> cart flow
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions
+from selenium.webdriver.support.ui import WebDriverWait
+
+from harness import waits as EC
+from harness.artifacts import ArtifactWriter
+from harness.config import cache_dir
+from harness.fileutil import write_json_atomic
+from harness.pages import CLICKABLE, PRESENT, Element, Page
+from harness.pool import DriverPool, create_chrome_driver
+from harness.profiles import PROFILES, chrome_options
+from harness.waits import PushWait
+
+DEFAULT_THRESHOLD = 0.15
+APPEAR_AFTER = 0.1
+
+# -- fixture site ------------------------------------------------------------
+
+_INDEX = """<!DOCTYPE html>
+<html><head><title>Bench store</title></head><body>
+<nav id="nava">Bench store <a id="cartur" href="/cart.html">Cart</a></nav>
+<a href="#" onclick="showLaptops(); return false;">Laptops</a>
+<div id="tbodyid"></div>
+<form><input id="username" name="username" class="field"><button id="login" type="button">Log in</button></form>
+<ul>%(items)s</ul>
+<script>
+function showLaptops() {
+  setTimeout(function () {
+    document.getElementById('tbodyid').innerHTML =
+      '<div class="card-block"><h4 class="card-title"><a href="/prod.html">MacBook Pro</a></h4></div>';
+  }, 50);
+}
+function appearAfter(ms) {
+  var old = document.getElementById('late');
+  if (old) { old.remove(); }
+  setTimeout(function () {
+    var el = document.createElement('div');
+    el.id = 'late';
+    el.textContent = 'late';
+    document.body.appendChild(el);
+  }, ms);
+}
+</script>
+</body></html>
+"""
+
+_PRODUCT = """<!DOCTYPE html>
+<html><head><title>MacBook Pro</title></head><body>
+<nav id="nava">Bench store <a id="cartur" href="/cart.html">Cart</a></nav>
+<h2 class="name">MacBook Pro</h2>
+<a href="#" onclick="localStorage.setItem('cart', 'MacBook Pro'); alert('Product added'); return false;">Add to cart</a>
+</body></html>
+"""
+
+_CART = """<!DOCTYPE html>
+<html><head><title>Cart</title></head><body>
+<h2>Products</h2>
+<table><tbody id="cart"></tbody></table>
+<script>
+var item = localStorage.getItem('cart');
+if (item) {
+  document.getElementById('cart').innerHTML = '<tr class="success"><td>img</td><td>' + item + '</td></tr>';
+}
+</script>
+</body></html>
+"""
+
+# Enough elements that lookups have something to scan
+_ITEMS = "".join(f'<li class="item" data-index="{i}">Item {i}</li>' for i in range(500))
+
+SITE = {
+    "/": _INDEX % {"items": _ITEMS},
+    "/index.html": _INDEX % {"items": _ITEMS},
+    "/prod.html": _PRODUCT,
+    "/cart.html": _CART,
+}
+
+
+class _SiteHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        body = SITE.get(self.path.split("?")[0])
+        status = 200 if body is not None else 404
+        payload = (body or "Not found").encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+@contextmanager
+def fixture_site():
+    """
+    Serve the fixture store on a free local port.
+
+    Yields:
+        str: Base URL, e.g. "http://127.0.0.1:41234".
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _SiteHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+class _StorePage(Page):
+    # Same elements and conditions as StorePage in pysel52b.py
+    navbar = Element(By.ID, "nava", until=PRESENT)
+    laptops_category = Element(By.XPATH, "//a[contains(text(),'Laptops')]", until=CLICKABLE)
+    product_titles = Element(By.CSS_SELECTOR, 'div[class="card-block"] h4[class="card-title"]')
+    macbook_link = Element(By.XPATH, "//a[contains(text(),'MacBook Pro')]", until=CLICKABLE)
+    macbook_heading = Element(By.XPATH, "//h2[contains(text(),'MacBook Pro')]")
+    add_to_cart_button = Element(By.XPATH, "//a[contains(text(),'Add to cart')]", until=CLICKABLE)
+    cart_link = Element(By.ID, "cartur", until=CLICKABLE)
+    products_heading = Element(By.XPATH, "//h2[contains(text(),'Products')]")
+
+
+# -- statistics --------------------------------------------------------------
+
+def percentile(values, q):
+    """
+    Linear-interpolated percentile.
+
+    Args:
+        values: Non-empty list of numbers
+        q: Percentile between 0 and 100
+
+    Returns:
+        float: The q-th percentile.
+    """
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100.0
+    low, high = math.floor(rank), math.ceil(rank)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(samples):
+    """
+    Returns:
+        dict: n, min, mean, p50, p90, p95, p99 and max of samples (seconds).
+    """
+    return {
+        "n": len(samples),
+        "min": min(samples),
+        "mean": sum(samples) / len(samples),
+        "p50": percentile(samples, 50),
+        "p90": percentile(samples, 90),
+        "p95": percentile(samples, 95),
+        "p99": percentile(samples, 99),
+        "max": max(samples),
+    }
+
+
+def _timed(action):
+    started = time.perf_counter()
+    action()
+    return time.perf_counter() - started
+
+
+# -- benchmarks --------------------------------------------------------------
+
+def _bench_start(headless=None, fresh_profile=False):
+    def run(context, iterations):
+        samples = []
+        for _ in range(iterations):
+            options = context["options"]()
+            if headless:
+                options.arguments[:] = [arg for arg in options.arguments if not arg.startswith("--headless")]
+                options.add_argument(headless)
+            profile = None
+            if fresh_profile:
+                # An empty directory bypasses the profile template: first-run setup on disk
+                profile = tempfile.mkdtemp(prefix="harness-bench-profile-")
+                options.add_argument(f"--user-data-dir={profile}")
+            started = time.perf_counter()
+            driver = create_chrome_driver(options)
+            samples.append(time.perf_counter() - started)
+            driver.quit()
+            if profile is not None:
+                shutil.rmtree(profile, ignore_errors=True)
+        return samples
+    return run
+
+
+def bench_warm_start(context, iterations):
+    pool = DriverPool(factory=lambda: create_chrome_driver(context["options"]()), max_size=1)
+    try:
+        # The first lease launches; the rest measure reset + reuse
+        with pool.lease():
+            pass
+        samples = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            with pool.lease() as driver:
+                samples.append(time.perf_counter() - started)
+                driver.get(context["base_url"])
+        return samples
+    finally:
+        pool.close()
+
+
+def bench_navigation(context, iterations):
+    driver = context["driver"]
+    return [_timed(lambda: driver.get(context["base_url"] + "/")) for _ in range(iterations)]
+
+
+LOCATORS = {
+    "id": (By.ID, "username"),
+    "name": (By.NAME, "username"),
+    "class_name": (By.CLASS_NAME, "field"),
+    "css": (By.CSS_SELECTOR, 'li[data-index="499"]'),
+    "xpath": (By.XPATH, "//li[@data-index='499']"),
+    "xpath_text": (By.XPATH, "//li[contains(text(), 'Item 499')]"),
+}
+
+
+def _bench_locator(locator):
+    def run(context, iterations):
+        driver = context["driver"]
+        driver.get(context["base_url"] + "/")
+        return [_timed(lambda: driver.find_element(*locator)) for _ in range(iterations)]
+    return run
+
+
+def _bench_wait(make_wait, condition):
+    def run(context, iterations):
+        driver = context["driver"]
+        driver.get(context["base_url"] + "/")
+        samples = []
+        for _ in range(iterations):
+            wait = make_wait(driver)
+            driver.execute_script(f"appearAfter({int(APPEAR_AFTER * 1000)})")
+            started = time.perf_counter()
+            wait.until(condition)
+            # Only the latency beyond the element's own delay is interesting
+            samples.append(max(0.0, time.perf_counter() - started - APPEAR_AFTER))
+        return samples
+    return run
+
+
+def bench_screenshot_save(context, iterations):
+    driver = context["driver"]
+    driver.get(context["base_url"] + "/")
+    with tempfile.TemporaryDirectory() as directory:
+        return [_timed(lambda: driver.save_screenshot(os.path.join(directory, "shot.png")))
+                for _ in range(iterations)]
+
+
+def bench_screenshot_async(context, iterations):
+    driver = context["driver"]
+    driver.get(context["base_url"] + "/")
+    with tempfile.TemporaryDirectory() as directory:
+        writer = ArtifactWriter(directory=directory)
+        try:
+            return [_timed(lambda: writer.screenshot(driver, "shot")) for _ in range(iterations)]
+        finally:
+            writer.close()
+
+
+def bench_workflow(context, iterations):
+    driver = context["driver"]
+    samples = []
+    for _ in range(iterations):
+        driver.execute_script("try { localStorage.clear(); } catch (e) {}")
+        started = time.perf_counter()
+        store = _StorePage(driver, wait=PushWait(driver, 15))
+        store.open(context["base_url"] + "/")
+        store.navbar.resolve()
+        store.laptops_category.click()
+        store.product_titles.resolve()
+        store.macbook_link.click()
+        assert "MacBook Pro" in store.macbook_heading.text
+        store.add_to_cart_button.click()
+        PushWait(driver, 15).until(EC.alert_is_present())
+        driver.switch_to.alert.accept()
+        store.cart_link.click()
+        store.products_heading.resolve()
+        cart = (By.CSS_SELECTOR, 'tr[class="success"] td:nth-of-type(2)')
+        PushWait(driver, 15).until(EC.presence_of_all_elements_located(cart))
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def _build_benchmarks():
+    benchmarks = {
+        "start.cold": _bench_start(),
+        "start.fresh_profile": _bench_start(fresh_profile=True),
+        "start.headless_old": _bench_start("--headless"),
+        "start.headless_new": _bench_start("--headless=new"),
+        "start.warm": bench_warm_start,
+        "navigation": bench_navigation,
+    }
+    for name, locator in LOCATORS.items():
+        benchmarks[f"locator.{name}"] = _bench_locator(locator)
+    late = (By.ID, "late")
+    benchmarks["wait.push"] = _bench_wait(lambda d: PushWait(d, 10), EC.presence_of_element_located(late))
+    benchmarks["wait.poll"] = _bench_wait(
+        lambda d: WebDriverWait(d, 10), expected_conditions.presence_of_element_located(late)
+    )
+    benchmarks["screenshot.save"] = bench_screenshot_save
+    benchmarks["screenshot.async"] = bench_screenshot_async
+    benchmarks["workflow.ecommerce"] = bench_workflow
+    return benchmarks
+
+
+BENCHMARKS = _build_benchmarks()
+
+# Launching Chrome is slow; these get fewer iterations
+_START_ITERATIONS = 5
+
+
+def select(names, only=None):
+    """
+    Filter benchmark names by prefixes.
+
+    Args:
+        names: All benchmark names
+        only: Prefixes such as ["locator", "wait.push"], or None for all
+
+    Returns:
+        list: Selected names in their original order.
+    """
+    if not only:
+        return list(names)
+    return [name for name in names if any(name == p or name.startswith(p + ".") for p in only)]
+
+
+def run(names, iterations, options_factory=chrome_options):
+    """
+    Run benchmarks and summarise their samples.
+
+    Args:
+        names: Benchmark names from BENCHMARKS
+        iterations: Samples per benchmark (Chrome launches use at most 5)
+        options_factory: Callable returning Chrome options for the shared browser
+
+    Returns:
+        dict: {"meta": {...}, "results": {name: summary}}
+    """
+    results = {}
+    with fixture_site() as base_url:
+        context = {"base_url": base_url, "options": options_factory, "driver": None}
+        try:
+            for name in names:
+                if not name.startswith("start.") and context["driver"] is None:
+                    context["driver"] = create_chrome_driver(options_factory())
+                    context["driver"].get(base_url + "/")
+                count = min(iterations, _START_ITERATIONS) if name.startswith("start.") else iterations
+                print(f"{name} ...", file=sys.stderr, flush=True)
+                results[name] = summarize(BENCHMARKS[name](context, count))
+        finally:
+            if context["driver"] is not None:
+                context["driver"].quit()
+    meta = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "iterations": iterations,
+        "chrome_arguments": options_factory().arguments,
+        "page_load_strategy": options_factory().page_load_strategy,
+    }
+    return {"meta": meta, "results": results}
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD, metric="p50"):
+    """
+    Compare two result documents.
+
+    Args:
+        baseline: Result dict from an earlier run
+        current: Result dict from this run
+        threshold: Allowed relative slowdown (0.15 = 15 %)
+        metric: Summary field to compare
+
+    Returns:
+        list: One dict per benchmark present in both, with name, baseline,
+            current, change (relative) and regression (bool).
+    """
+    rows = []
+    for name, summary in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        before, after = base[metric], summary[metric]
+        change = (after - before) / before if before else 0.0
+        rows.append({"name": name, "baseline": before, "current": after, "change": change,
+                     "regression": change > threshold})
+    return rows
+
+
+def print_results(document):
+    print(f"{'benchmark':<22} {'n':>4} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for name, s in document["results"].items():
+        print(f"{name:<22} {s['n']:>4} {s['p50'] * 1000:>9.2f} {s['p90'] * 1000:>9.2f} "
+              f"{s['p99'] * 1000:>9.2f} {s['max'] * 1000:>9.2f}")
+
+
+def print_comparison(rows):
+    print(f"{'benchmark':<22} {'base ms':>9} {'now ms':>9} {'change':>8}")
+    for row in rows:
+        flag = "  REGRESSION" if row["regression"] else ""
+        print(f"{row['name']:<22} {row['baseline'] * 1000:>9.2f} {row['current'] * 1000:>9.2f} "
+              f"{row['change']:>+8.1%}{flag}")
+
+
+PROFILE_BENCHMARKS = ("start.cold", "navigation", "workflow.ecommerce")
+
+
+def measure_profiles(profiles, iterations):
+    """
+    Run the start, navigation and workflow benchmarks for each profile.
+
+    Args:
+        profiles: Profile names from harness.profiles.PROFILES
+        iterations: Samples per benchmark
+
+    Returns:
+        dict: profile -> {benchmark name -> summary}.
+    """
+    return {
+        name: run(PROFILE_BENCHMARKS, iterations,
+                  options_factory=lambda name=name: chrome_options(name))["results"]
+        for name in profiles
+    }
+
+
+def print_profiles(results):
+    print(f"{'profile':<10}" + "".join(f" {name + ' p50 ms':>24}" for name in PROFILE_BENCHMARKS))
+    for profile, summaries in results.items():
+        print(f"{profile:<10}" + "".join(f" {summaries[name]['p50'] * 1000:>24.1f}"
+                                         for name in PROFILE_BENCHMARKS))
+
+
+def _load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m harness.bench", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20, help="samples per benchmark")
+    parser.add_argument("--only", nargs="+", help="run only benchmarks with these name prefixes")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default=None,
+                        help="Chrome profile for every benchmark (default: HARNESS_PROFILE or fast-ci)")
+    parser.add_argument("--profiles", nargs="+", choices=sorted(PROFILES),
+                        help="compare start/navigation/workflow across these profiles")
+    parser.add_argument("--out", help="write results JSON here (default .harness/bench/<timestamp>.json)")
+    parser.add_argument("--baseline", help="fail if this run regresses against a results file")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"),
+                        help="compare two results files without running anything")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed relative slowdown of p50 (default 0.15)")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        rows = compare(_load(args.compare[0]), _load(args.compare[1]), args.threshold)
+        print_comparison(rows)
+        return 1 if any(row["regression"] for row in rows) else 0
+
+    if args.profiles:
+        results = measure_profiles(args.profiles, args.iterations)
+        out = args.out or os.path.join(cache_dir("bench"), "profiles.json")
+        write_json_atomic(out, results, indent=2)
+        print_profiles(results)
+        print(f"results written to {out}")
+        return 0
+
+    document = run(select(BENCHMARKS, args.only), args.iterations,
+                   options_factory=lambda: chrome_options(args.profile))
+    out = args.out or os.path.join(cache_dir("bench"), time.strftime("%Y%m%d-%H%M%S") + ".json")
+    write_json_atomic(out, document, indent=2)
+    print_results(document)
+    print(f"results written to {out}")
+
+    if args.baseline:
+        rows = compare(_load(args.baseline), document, args.threshold)
+        print_comparison(rows)
+        return 1 if any(row["regression"] for row in rows) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
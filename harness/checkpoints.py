@@ -0,0 +1,179 @@
+"""
+Step checkpoints: retry the failed step instead of the whole test.
+
+Long flows (log in, open device management, select a device, edit) are
+run as steps of a Flow:
+
+    flow = Flow(driver)
+    flow.step("login", self.login_to_acdc, driver)
+    flow.step("navigate", self.navigate_to_device_management, driver)
+    result = flow.step("edit", self.attempt_edit_serial_number, driver, "SN-NEW")
+
+After every step that succeeds, the browser state is checkpointed: URL,
+cookies (all domains via CDP) and local/session storage. When a step fails
+with a WebDriver error (timeout, missing or stale element, crashed
+renderer), raised directly or wrapped by a helper, the browser is reset as
+the pool does between tests, the last checkpoint is restored and only the
+failing step runs again. HARNESS_STEP_RETRIES sets how many step retries a
+flow may use (default 1). Assertion failures are never retried.
+
+A checkpoint cannot hold in-memory page state (unsaved form input, JS
+variables) or undo server-side effects of the failed attempt, so a step
+should work from its start URL plus session state, as the helpers of the
+generated modules do.
+
+Retries are reported at the end of the run and in
+.harness/retry-report.json, with the time saved compared with rerunning
+the whole test (the steps that did not have to run again).
+"""
+import os
+import threading
+import time
+
+from selenium.common.exceptions import WebDriverException
+
+from harness.pool import reset_driver
+from harness.sessions import capture_state, origin_of, restore_state
+from harness.steps import current_test, step
+
+DEFAULT_RETRIES = 1
+
+_stats = {"retries": 0, "recovered": 0, "seconds_saved": 0.0}
+_events = []
+_stats_lock = threading.Lock()
+
+
+def is_retryable(error):
+    """
+    Return True if error is a WebDriver failure worth retrying.
+
+    The exception chain is followed, so helpers that wrap errors in a plain
+    Exception are still retried; an AssertionError anywhere before the
+    WebDriver error means the test checked something and it was false.
+    """
+    seen = set()
+    while error is not None and id(error) not in seen:
+        if isinstance(error, AssertionError):
+            return False
+        if isinstance(error, WebDriverException):
+            return True
+        seen.add(id(error))
+        error = error.__cause__ or error.__context__
+    return False
+
+
+class Flow:
+    """
+    Runs the steps of one test, checkpointing after each.
+
+    Attributes:
+        completed: (step name, seconds) of the steps that succeeded
+        retries_left: Step retries this flow may still use
+    """
+
+    def __init__(self, driver, retries=None, test=None, reset=reset_driver):
+        """
+        Args:
+            driver: WebDriver the steps use
+            retries: Step retries for the whole flow
+                (HARNESS_STEP_RETRIES, default 1)
+            test: Name for reports, defaults to the running pytest test
+            reset: Callable(driver) that cleans the browser before a restore
+        """
+        self.driver = driver
+        self.retries_left = int(os.getenv("HARNESS_STEP_RETRIES", DEFAULT_RETRIES)) if retries is None else retries
+        self.test = test or current_test()
+        self.reset = reset
+        self.completed = []
+        self.checkpoint = None
+        # False while the last completed step could not be checkpointed;
+        # restoring an older checkpoint would silently skip that step
+        self._resumable = True
+
+    def step(self, name, action, *args, **kwargs):
+        """
+        Run one step, retrying it from the last checkpoint on WebDriver errors.
+
+        Args:
+            name: Step name for reports (also set as harness.steps.step)
+            action: Callable running the step
+            *args, **kwargs: Passed to action
+
+        Returns:
+            Whatever action returns.
+        """
+        started = time.perf_counter()
+        events = []
+        while True:
+            try:
+                with step(name):
+                    result = action(*args, **kwargs)
+                break
+            except Exception as e:
+                if self.retries_left <= 0 or not self._resumable or not is_retryable(e):
+                    self._report(events, recovered=False)
+                    raise
+                events.append({"test": self.test, "step": name, "attempt": len(events) + 1,
+                               "error": f"{type(e).__name__}: {str(e).strip()[:200]}"})
+                self.retries_left -= 1
+                if not self._resume():
+                    self._report(events, recovered=False)
+                    raise
+        self._report(events, recovered=True)
+        self.completed.append((name, time.perf_counter() - started))
+        self._capture()
+        return result
+
+    def _capture(self):
+        try:
+            url = self.driver.current_url
+            state = capture_state(self.driver) if url.startswith(("http://", "https://")) else None
+        except WebDriverException:
+            # e.g. an alert left open by the step; retry later steps only after a new checkpoint
+            self.checkpoint, self._resumable = None, False
+            return
+        self.checkpoint, self._resumable = {"url": url, "state": state}, True
+
+    def _resume(self):
+        """Reset the browser and restore the last checkpoint; False if the browser is gone."""
+        try:
+            self.reset(self.driver)
+            if self.checkpoint is not None and self.checkpoint["state"] is not None:
+                restore_state(self.driver, origin_of(self.checkpoint["url"]), self.checkpoint["state"])
+                self.driver.get(self.checkpoint["url"])
+        except WebDriverException:
+            return False
+        return True
+
+    def _report(self, events, recovered):
+        if not events:
+            return
+        # A whole-test retry would have run every completed step again
+        saved = sum(seconds for _, seconds in self.completed) if recovered else 0.0
+        with _stats_lock:
+            _stats["retries"] += len(events)
+            if recovered:
+                _stats["recovered"] += 1
+                _stats["seconds_saved"] += saved
+            for event in events:
+                event["recovered"] = recovered
+            events[-1]["seconds_saved"] = round(saved, 3)
+            _events.extend(events)
+
+
+def retry_stats():
+    """
+    Return step retry counts and seconds saved in this process.
+
+    Returns:
+        dict: retries (attempts repeated), recovered (steps that passed on
+            a retry) and seconds_saved.
+    """
+    with _stats_lock:
+        return dict(_stats)
+
+
+def retry_report():
+    """Return one entry per step retry: test, step, attempt, error, recovered."""
+    with _stats_lock:
+        return [dict(event) for event in _events]
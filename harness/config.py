@@ -0,0 +1,37 @@
+"""
+Environment-driven settings shared by the harness modules.
+"""
+import os
+
+
+def cache_dir(*parts):
+    """
+    Return a directory for harness state such as caches and reports.
+
+    Args:
+        *parts: Optional sub-directory components
+
+    Returns:
+        str: HARNESS_CACHE_DIR (default ".harness") joined with parts, created if missing.
+    """
+    path = os.path.join(os.getenv("HARNESS_CACHE_DIR", ".harness"), *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def env_flag(name):
+    """
+    Read a boolean environment variable.
+
+    Args:
+        name: Variable name
+
+    Returns:
+        bool: True for "1", "true" or "yes" (case-insensitive).
+    """
+    return os.getenv(name, "").lower() in ("1", "true", "yes")
+
+
+def is_offline():
+    """Return True when HARNESS_OFFLINE forbids network lookups."""
+    return env_flag("HARNESS_OFFLINE")
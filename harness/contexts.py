@@ -0,0 +1,417 @@
+"""
+Many isolated browser contexts inside one Chrome process.
+
+A browser context (Target.createBrowserContext) has its own cookie jar,
+storage and cache, like an incognito profile, but shares the Chrome
+process with every other context. SharedBrowser launches one Chrome and
+publishes its chromedriver session; each ContextDriver attaches to that
+session, creates a context with its own window and behaves like a normal
+WebDriver bound to that window. Disposing the context on quit() throws its
+state away, so no reset between tests is needed.
+
+    python -m harness.parallel -n 8 --shared-browser
+
+runs eight pytest workers against a single Chrome instead of eight.
+
+All contexts drive the same chromedriver session, whose "current window"
+and timeouts are global. Every command therefore runs under a lock (a file
+lock, so it also works across worker processes) that first switches the
+session to the context's window when needed. Which window and script
+timeout this process last set is kept in memory; the only shared state is
+a token in the lock file naming the process that switched last, so a
+command that finds its own token skips the switch without any other
+I/O. chromedriver runs one command per session at a time anyway, so the
+lock costs little beyond that. To keep it short, the shared
+browser uses the "none" page-load strategy and ContextDriver waits for the
+document itself between commands, implicit waits are emulated on the
+client, and PushWait waits in chunks of at most max_script_wait seconds.
+"""
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from selenium.common.exceptions import NoSuchElementException, NoSuchWindowException, TimeoutException
+from selenium.webdriver.chrome.options import Options as ChromeOptions
+from selenium.webdriver.chromium.remote_connection import ChromiumRemoteConnection
+from selenium.webdriver.remote.command import Command
+from selenium.webdriver.remote.webdriver import WebDriver as RemoteWebDriver
+
+from harness.profiles import chrome_options
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+SHARED_BROWSER_ENV = "HARNESS_SHARED_BROWSER"
+_TOKEN_SIZE = 64
+
+_FIND_COMMANDS = {
+    Command.FIND_ELEMENT,
+    Command.FIND_ELEMENTS,
+    Command.FIND_CHILD_ELEMENT,
+    Command.FIND_CHILD_ELEMENTS,
+}
+_IMPLICIT_POLL = 0.1
+_LOAD_POLL = 0.05
+
+# Marks the current document so a navigation is only complete once it is gone
+_MARK_DOCUMENT_SCRIPT = "window.__harnessNavigating = true;"
+_LOAD_STATE_SCRIPT = """
+return {fresh: !window.__harnessNavigating, state: document.readyState, href: location.href};
+"""
+
+
+class SharedBrowser:
+    """
+    One Chrome instance whose session is shared by ContextDrivers.
+    """
+
+    def __init__(self, state_dir=None):
+        """
+        Args:
+            state_dir: Directory for the session lock file
+        """
+        self.state_dir = state_dir or tempfile.mkdtemp(prefix="harness-shared-")
+        self.driver = None
+        self.spec = None
+
+    def start(self, factory=None):
+        """
+        Launch Chrome and return the spec ContextDrivers attach with.
+
+        Args:
+            factory: Callable(options) returning a WebDriver, defaults to
+                harness.pool.create_chrome_driver
+
+        Returns:
+            dict: url, session, anchor window handle and "state", the path
+                the session lock file is derived from.
+        """
+        if factory is None:
+            from harness.pool import create_chrome_driver as factory
+
+        options = chrome_options()
+        # Navigation must not hold the shared session; ContextDriver waits instead
+        options.page_load_strategy = "none"
+        self.driver = factory(options)
+        self.spec = {
+            "url": self.driver.service.service_url,
+            "session": self.driver.session_id,
+            "anchor": self.driver.current_window_handle,
+            "state": os.path.abspath(os.path.join(self.state_dir, "session.json")),
+        }
+        return self.spec
+
+    def environment(self):
+        """Return {SHARED_BROWSER_ENV: spec as JSON} for worker processes."""
+        return {SHARED_BROWSER_ENV: json.dumps(self.spec)}
+
+    def stop(self):
+        if self.driver is not None:
+            self.driver.quit()
+            self.driver = None
+
+
+class _SessionGate:
+    """
+    This process's side of the lock on a shared session.
+
+    Attributes:
+        handle: Window this process last switched the session to
+        script: Script timeout this process last set
+    """
+
+    def __init__(self, path):
+        self.path = f"{path}.lock"
+        self.handle = None
+        self.script = None
+        self._token = None
+        self._fd = None
+        self._lock = threading.RLock()
+
+    @contextmanager
+    def hold(self):
+        with self._lock:
+            if self._fd is None:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                yield self
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def owned(self):
+        """True if no other process has touched the session since this one did (lock held)."""
+        return self._token is not None and os.pread(self._fd, _TOKEN_SIZE, 0) == self._token
+
+    def claim(self):
+        """Mark the session as last set by this process (lock held)."""
+        if not self.owned():
+            self._token = f"{os.getpid()}-{uuid.uuid4().hex}".encode().ljust(_TOKEN_SIZE)
+            os.pwrite(self._fd, self._token, 0)
+
+
+_gates = {}
+_gates_lock = threading.Lock()
+
+
+def _gate(path):
+    with _gates_lock:
+        if path not in _gates:
+            _gates[path] = _SessionGate(path)
+        return _gates[path]
+
+
+class ContextDriver(RemoteWebDriver):
+    """
+    WebDriver bound to one browser context of a SharedBrowser.
+
+    Attributes:
+        context_id: CDP browser context id
+        max_script_wait: Longest single async script PushWait should run
+    """
+
+    max_script_wait = 0.5
+
+    def __init__(self, spec, page_load_strategy=None, command_executor=None):
+        """
+        Args:
+            spec: dict returned by SharedBrowser.start()
+            page_load_strategy: "normal" or "eager" navigation to emulate,
+                defaults to the selected profile's strategy
+            command_executor: RemoteConnection override (for tests)
+        """
+        self._spec = spec
+        self._handle = None
+        self._handles = []
+        self._timeouts = {"implicit": 0, "pageLoad": 300000, "script": 30000}
+        self._page_load_strategy = page_load_strategy or chrome_options().page_load_strategy
+        executor = command_executor or ChromiumRemoteConnection(
+            spec["url"], vendor_prefix="goog", browser_name="chrome"
+        )
+        super().__init__(command_executor=executor, options=ChromeOptions())
+        with self._session():
+            self.context_id = self._raw_cdp("Target.createBrowserContext", {"disposeOnDetach": False})[
+                "browserContextId"
+            ]
+            self._open_window()
+        self._handle = self._handles[0]
+
+    def start_session(self, capabilities):
+        # Attach to the shared session instead of creating a new one
+        self.session_id = self._spec["session"]
+        self.caps = {"browserName": "chrome"}
+
+    # -- session sharing ---------------------------------------------------
+
+    def _raw(self, command, params=None):
+        return super().execute(command, dict(params or {}))
+
+    def _raw_cdp(self, cmd, params):
+        return self._raw("executeCdpCommand", {"cmd": cmd, "params": params})["value"]
+
+    def _open_window(self):
+        target = self._raw_cdp("Target.createTarget", {
+            "url": "about:blank", "browserContextId": self.context_id, "newWindow": True,
+        })["targetId"]
+        handles = self._raw(Command.W3C_GET_WINDOW_HANDLES)["value"]
+        # chromedriver window handles are (or end with) the DevTools target id
+        handle = next((h for h in handles if h == target or h.endswith(target)), target)
+        self._handles.append(handle)
+        return handle
+
+    @contextmanager
+    def _session(self):
+        """Hold the shared session with it switched to this context's window."""
+        with _gate(self._spec["state"]).hold() as gate:
+            if not gate.owned():
+                # Another process switched since; what this one set is stale
+                gate.handle = gate.script = None
+            wanted = self._handle or self._spec.get("anchor")
+            if wanted and gate.handle != wanted:
+                gate.handle = None
+                gate.claim()
+                self._raw(Command.SWITCH_TO_WINDOW, {"handle": wanted})
+                gate.handle = wanted
+            if gate.script != self._timeouts["script"]:
+                gate.script = None
+                gate.claim()
+                self._raw(Command.SET_TIMEOUTS, {"script": self._timeouts["script"]})
+                gate.script = self._timeouts["script"]
+            yield gate
+
+    # -- command routing ---------------------------------------------------
+
+    def execute(self, driver_command, params=None):
+        if driver_command == Command.SET_TIMEOUTS:
+            self._timeouts.update({k: v for k, v in (params or {}).items() if k in self._timeouts})
+            return {"value": None}
+        if driver_command == Command.GET_TIMEOUTS:
+            return {"value": dict(self._timeouts)}
+        if driver_command == Command.GET:
+            return self._navigate(params)
+        if driver_command in _FIND_COMMANDS and self._timeouts["implicit"]:
+            return self._find_with_implicit_wait(driver_command, params)
+        if driver_command == Command.W3C_GET_WINDOW_HANDLES:
+            return {"value": list(self._handles)}
+        if driver_command == Command.SWITCH_TO_WINDOW:
+            handle = (params or {}).get("handle")
+            if handle not in self._handles:
+                raise NoSuchWindowException(f"Window {handle} does not belong to this context")
+            self._handle = handle
+            return {"value": None}
+        if driver_command == Command.W3C_GET_CURRENT_WINDOW_HANDLE:
+            return {"value": self._handle}
+        if driver_command == Command.NEW_WINDOW:
+            with self._session():
+                handle = self._open_window()
+            return {"value": {"handle": handle, "type": "window"}}
+        if driver_command == Command.CLOSE:
+            return self._close_window()
+        if driver_command == Command.QUIT:
+            self.dispose()
+            return {"value": None}
+        with self._session():
+            return self._raw(driver_command, params)
+
+    def _navigate(self, params):
+        with self._session():
+            self._raw(Command.W3C_EXECUTE_SCRIPT, {"script": _MARK_DOCUMENT_SCRIPT, "args": []})
+            response = self._raw(Command.GET, params)
+        wanted = ("interactive", "complete") if self._page_load_strategy == "eager" else ("complete",)
+        started = time.monotonic()
+        deadline = started + self._timeouts["pageLoad"] / 1000.0
+        while True:
+            with self._session():
+                load = self._raw(Command.W3C_EXECUTE_SCRIPT, {"script": _LOAD_STATE_SCRIPT, "args": []})["value"]
+            # A fragment-only navigation keeps the document (and the mark)
+            same_document = load["href"] == params.get("url") and time.monotonic() - started > 1.0
+            if load["state"] in wanted and (load["fresh"] or same_document):
+                return response
+            if time.monotonic() > deadline:
+                raise TimeoutException(f"Page load of {params.get('url')} timed out")
+            time.sleep(_LOAD_POLL)
+
+    def _find_with_implicit_wait(self, driver_command, params):
+        deadline = time.monotonic() + self._timeouts["implicit"] / 1000.0
+        while True:
+            try:
+                with self._session():
+                    response = self._raw(driver_command, params)
+            except NoSuchElementException:
+                # Only a missing element is waited for; NoSuchWindowException
+                # (the context's window is gone) fails at once
+                if time.monotonic() >= deadline:
+                    raise
+            else:
+                # find_elements waits for at least one match, like a real implicit wait
+                if response.get("value") or driver_command not in (
+                    Command.FIND_ELEMENTS, Command.FIND_CHILD_ELEMENTS
+                ) or time.monotonic() >= deadline:
+                    return response
+            time.sleep(_IMPLICIT_POLL)
+
+    def _close_window(self):
+        handle = self._handle
+        with self._session() as gate:
+            self._raw(Command.CLOSE)
+            # The session has no current window now; park it on the anchor
+            # so commands from other contexts keep working
+            gate.handle = None
+            self._raw(Command.SWITCH_TO_WINDOW, {"handle": self._spec["anchor"]})
+            gate.handle = self._spec["anchor"]
+        self._handles.remove(handle)
+        self._handle = self._handles[0] if self._handles else None
+        return {"value": list(self._handles)}
+
+    def execute_cdp_cmd(self, cmd, cmd_args):
+        """Run a DevTools command against this context's window."""
+        return self.execute("executeCdpCommand", {"cmd": cmd, "params": cmd_args})["value"]
+
+    def dispose(self):
+        """Close every window of the context and discard its state."""
+        if self.context_id is None:
+            return
+        self._handle = None
+        with self._session():
+            self._raw_cdp("Target.disposeBrowserContext", {"browserContextId": self.context_id})
+        self.context_id = None
+        self._handles = []
+
+
+class ContextPool:
+    """
+    DriverPool look-alike that hands out a fresh browser context per lease.
+
+    Contexts are cheap to create and disposing one wipes its state, so they
+    are never reused.
+    """
+
+    def __init__(self, spec, factory=None):
+        """
+        Args:
+            spec: dict returned by SharedBrowser.start()
+            factory: Callable(spec) returning a ContextDriver (for tests)
+        """
+        self.spec = spec
+        self.factory = factory or ContextDriver
+        self.stats = {"created": 0, "reused": 0, "recycled": 0}
+        self.on_acquire = []
+        self.on_release = []
+        self._leased = set()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        """Return a pool for the browser in HARNESS_SHARED_BROWSER, or None."""
+        spec = os.getenv(SHARED_BROWSER_ENV)
+        return cls(json.loads(spec)) if spec else None
+
+    def acquire(self):
+        driver = self.factory(self.spec)
+        with self._lock:
+            self._leased.add(driver)
+            self.stats["created"] += 1
+        try:
+            for hook in self.on_acquire:
+                hook(driver)
+        except Exception:
+            self.release(driver)
+            raise
+        return driver
+
+    def release(self, driver, discard=False):
+        for hook in self.on_release:
+            try:
+                hook(driver)
+            except Exception as e:
+                logger.warning("Release hook %r failed: %s", hook, e)
+        with self._lock:
+            self._leased.discard(driver)
+        driver.quit()
+
+    @contextmanager
+    def lease(self):
+        driver = self.acquire()
+        try:
+            yield driver
+        finally:
+            self.release(driver)
+
+    def close(self):
+        """Dispose contexts that are still leased."""
+        with self._lock:
+            leased, self._leased = list(self._leased), set()
+        for driver in leased:
+            driver.quit()
@@ -0,0 +1,196 @@
+"""
+Process-wide, offline-capable chromedriver resolution.
+
+ChromeDriverManager().install() resolves the matching driver version on
+every call and may go to the network each time. This module resolves the
+binary once per process, persists the result on disk keyed by the
+installed Chrome build, and answers from that cache without any network
+access once it is warm.
+"""
+import logging
+import os
+import shutil
+import subprocess
+import threading
+import time
+
+from webdriver_manager.chrome import ChromeDriverManager
+from webdriver_manager.core.os_manager import ChromeType, OperationSystemManager
+
+from harness.config import cache_dir, is_offline
+from harness.fileutil import file_lock, read_json, write_json_atomic
+
+logger = logging.getLogger(__name__)
+
+UNKNOWN_BUILD = "unknown"
+
+
+class DriverResolutionError(RuntimeError):
+    """Raised when no chromedriver can be found without network access."""
+
+
+def installed_chrome_build():
+    """
+    Detect the version of the locally installed Chrome without the network.
+
+    Returns:
+        str: Full version string such as "126.0.6478.126", or UNKNOWN_BUILD.
+    """
+    try:
+        version = OperationSystemManager().get_browser_version_from_os(ChromeType.GOOGLE)
+    except Exception as e:
+        logger.debug("Could not detect Chrome version: %s", e)
+        version = None
+    return version or UNKNOWN_BUILD
+
+
+def chromedriver_version(path):
+    """
+    Ask a chromedriver binary for its version.
+
+    Args:
+        path: Path to the chromedriver executable
+
+    Returns:
+        str: Version string, or None if the binary could not be run.
+    """
+    try:
+        output = subprocess.run(
+            [path, "--version"], capture_output=True, text=True, timeout=10
+        ).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    # "ChromeDriver 126.0.6478.126 (abc...)"
+    parts = output.split()
+    return parts[1] if len(parts) > 1 else None
+
+
+class DriverBinaryResolver:
+    """
+    Resolve the chromedriver path once and remember it on disk.
+
+    Lookup order: in-process memo, HARNESS_CHROMEDRIVER, on-disk cache
+    entry for the installed Chrome build, PATH when offline, and finally
+    ChromeDriverManager().install(). Only installer results are cached,
+    and only for a detected Chrome build. A file lock keeps concurrent workers
+    from downloading the same driver in parallel.
+    """
+
+    def __init__(self, cache_file=None, installer=None, build_detector=installed_chrome_build):
+        """
+        Args:
+            cache_file: JSON file holding resolved paths, defaults to the harness cache dir
+            installer: Callable returning a driver path, defaults to ChromeDriverManager().install
+            build_detector: Callable returning the installed Chrome build
+        """
+        self.cache_file = cache_file or os.path.join(cache_dir(), "chromedriver.json")
+        self.installer = installer or (lambda: ChromeDriverManager().install())
+        self.build_detector = build_detector
+        self._lock = threading.Lock()
+        self._path = None
+        self._resolve_seconds = 0.0
+        self.stats = {"hits": 0, "misses": 0, "seconds_saved": 0.0}
+
+    def path(self):
+        """
+        Return the chromedriver path, resolving it on first use.
+
+        Returns:
+            str: Absolute path to a chromedriver binary.
+        """
+        with self._lock:
+            if self._path is None:
+                self._path = self._resolve()
+            else:
+                self._record_hit(self._resolve_seconds)
+            return self._path
+
+    def _record_hit(self, seconds):
+        self.stats["hits"] += 1
+        self.stats["seconds_saved"] += seconds
+
+    def _resolve(self):
+        # An explicit binary wins over the cache and is never persisted, so
+        # changing HARNESS_CHROMEDRIVER takes effect on the next run
+        explicit = os.getenv("HARNESS_CHROMEDRIVER")
+        if explicit:
+            self.stats["misses"] += 1
+            return os.path.abspath(explicit)
+
+        build = self.build_detector()
+        # An entry for an undetected build would outlive Chrome upgrades and
+        # hand out a stale driver, so the cache is only used for known builds
+        cacheable = build != UNKNOWN_BUILD
+        with file_lock(self.cache_file):
+            entries = read_json(self.cache_file)
+            entry = entries.get(build) if cacheable else None
+            if entry and os.path.exists(entry["path"]):
+                self._resolve_seconds = entry.get("resolve_seconds", 0.0)
+                self._record_hit(self._resolve_seconds)
+                return entry["path"]
+
+            self.stats["misses"] += 1
+            if is_offline():
+                # PATH can change between runs too, so it is not cached either
+                path = shutil.which("chromedriver")
+                if not path:
+                    raise DriverResolutionError(
+                        f"No cached chromedriver for Chrome {build} and HARNESS_OFFLINE is set; "
+                        "warm the cache on a connected machine or set HARNESS_CHROMEDRIVER"
+                    )
+                return os.path.abspath(path)
+
+            started = time.perf_counter()
+            path = self.installer()
+            resolve_seconds = time.perf_counter() - started
+            self._resolve_seconds = resolve_seconds
+            if not cacheable:
+                return os.path.abspath(path)
+            entries[build] = {
+                "path": os.path.abspath(path),
+                "driver_version": chromedriver_version(path),
+                "resolve_seconds": round(resolve_seconds, 3),
+                "resolved_at": time.time(),
+            }
+            write_json_atomic(self.cache_file, entries, indent=2, sort_keys=True)
+            return entries[build]["path"]
+
+
+_resolver = None
+_resolver_lock = threading.Lock()
+
+
+def default_resolver():
+    """
+    Return the resolver shared by everything in this process.
+
+    Returns:
+        DriverBinaryResolver: The process-wide resolver.
+    """
+    global _resolver
+    with _resolver_lock:
+        if _resolver is None:
+            _resolver = DriverBinaryResolver()
+        return _resolver
+
+
+def chromedriver_path():
+    """
+    Drop-in replacement for ChromeDriverManager().install().
+
+    Returns:
+        str: Path to the chromedriver matching the installed Chrome.
+    """
+    return default_resolver().path()
+
+
+def resolver_stats():
+    """
+    Return cache hit/miss counts and the seconds saved in this process.
+
+    Returns:
+        dict: hits, misses and seconds_saved; all zero if nothing was resolved.
+    """
+    if _resolver is None:
+        return {"hits": 0, "misses": 0, "seconds_saved": 0.0}
+    return dict(_resolver.stats)
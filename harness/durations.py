@@ -0,0 +1,72 @@
+"""
+Per-test durations recorded from earlier runs.
+
+Every pytest process adds the wall time of each test (setup, call and
+teardown) to a shared JSON file. Schedulers use these numbers to put the
+longest work first.
+"""
+import os
+import statistics
+
+from harness.config import cache_dir
+from harness.fileutil import file_lock, read_json, write_json_atomic
+
+# Weight of the newest observation in the moving average
+SMOOTHING = 0.5
+DEFAULT_DURATION = 1.0
+
+
+class DurationStore:
+    """
+    JSON-backed map of test node id to smoothed duration in seconds.
+
+    Writes are merged under a file lock so several workers can finish at
+    the same time without losing each other's results.
+    """
+
+    def __init__(self, path=None):
+        """
+        Args:
+            path: JSON file to use, defaults to .harness/durations.json
+        """
+        self.path = path or os.path.join(cache_dir(), "durations.json")
+
+    def load(self):
+        """
+        Returns:
+            dict: node id -> seconds, empty if nothing was recorded yet.
+        """
+        return read_json(self.path)
+
+    def update(self, observed):
+        """
+        Merge new observations into the store.
+
+        Args:
+            observed: dict of node id -> seconds measured in this run
+        """
+        if not observed:
+            return
+        with file_lock(self.path):
+            durations = self.load()
+            for nodeid, seconds in observed.items():
+                previous = durations.get(nodeid)
+                if previous is None:
+                    durations[nodeid] = round(seconds, 4)
+                else:
+                    durations[nodeid] = round(SMOOTHING * seconds + (1 - SMOOTHING) * previous, 4)
+            write_json_atomic(self.path, durations, indent=0, sort_keys=True)
+
+    def estimate(self, nodeids):
+        """
+        Estimate durations, filling unknown tests with the median of known ones.
+
+        Args:
+            nodeids: Iterable of test node ids
+
+        Returns:
+            dict: node id -> estimated seconds
+        """
+        durations = self.load()
+        fallback = statistics.median(durations.values()) if durations else DEFAULT_DURATION
+        return {nodeid: durations.get(nodeid, fallback) for nodeid in nodeids}
@@ -0,0 +1,76 @@
+"""
+Small file helpers for state shared between worker processes.
+"""
+import json
+import os
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+
+@contextmanager
+def file_lock(path):
+    """
+    Hold an exclusive advisory lock on path + ".lock".
+
+    Args:
+        path: File the lock protects
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(f"{path}.lock", "w") as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def read_json(path, default=None):
+    """
+    Load a JSON file, returning default if it is missing or unreadable.
+
+    Args:
+        path: File to read
+        default: Value returned on failure (an empty dict if None)
+    """
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {} if default is None else default
+
+
+def write_json_atomic(path, data, mode=None, **dump_kwargs):
+    """
+    Write JSON through a temporary file so readers never see a partial file.
+
+    Args:
+        path: Destination file
+        data: JSON-serialisable object
+        mode: Permission bits the file is created with; the umask default if None
+        **dump_kwargs: Passed to json.dump
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    if mode is None:
+        f = open(tmp, "w")
+    else:
+        # Create the file with its final permissions before anything is
+        # written; a chmod afterwards leaves a window where it is readable.
+        # A leftover tmp file would keep its old mode, so remove it first
+        try:
+            os.remove(tmp)
+        except FileNotFoundError:
+            pass
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, mode)
+        # The umask can only narrow mode, never widen it, but be explicit
+        os.fchmod(fd, mode)
+        f = os.fdopen(fd, "w")
+    with f:
+        json.dump(data, f, **dump_kwargs)
+    os.replace(tmp, path)
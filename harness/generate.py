@@ -0,0 +1,344 @@
+"""
+Incremental generation of test modules from a ticket feed.
+
+The feed is JSON Lines, one ticket per line (an object with an "id" or
+"request_id", plus whatever the generator needs, usually "title" and
+"body"). Each ticket is hashed together with the generator's identity,
+and the generated module is cached under that hash in
+.harness/generated/, so
+
+- unchanged tickets are skipped;
+- a ticket that changes back to an earlier version is restored from the
+  cache without running the generator;
+- only new or changed tickets reach the generator.
+
+The feed is read line by line and every result is reported as soon as
+that ticket is done, so large feeds never sit in memory:
+
+    python -m harness.generate tickets.jsonl --command "agent-cli generate"
+    python -m harness.generate tickets.jsonl --jobs 4 --prune
+
+--command runs a generator that reads the ticket JSON on stdin and writes
+the module source to stdout. Without it a skipped placeholder module is
+written for each ticket (the same shape as pysel9ay.py).
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import subprocess
+import sys
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from harness.config import cache_dir
+from harness.fileutil import file_lock, read_json, write_json_atomic
+
+# Bump when the placeholder template changes so cached output is regenerated
+TEMPLATE_VERSION = "1"
+
+_PLACEHOLDER_TEMPLATE = '''import pytest
+
+pytestmark = pytest.mark.skip(
+    reason="Agent-generated E2E test requires real application UI; skipped in CI"
+)
+
+
+def test_placeholder_scenario():
+    """
+    {title}
+
+    Placeholder generated from ticket {ticket_id}; replace with real steps.
+    """
+    pytest.skip("Scenario not generated yet")
+'''
+
+
+class GenerationError(RuntimeError):
+    """Raised when the generator fails for a ticket."""
+
+
+def iter_tickets(lines):
+    """
+    Parse a JSON Lines feed lazily.
+
+    Args:
+        lines: Iterable of lines, e.g. an open file
+
+    Yields:
+        tuple: (line number, ticket dict). Blank lines are skipped.
+
+    Raises:
+        ValueError: A line is not a JSON object with an id
+    """
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            ticket = json.loads(line)
+        except ValueError as e:
+            raise ValueError(f"line {number}: invalid JSON ({e})") from None
+        if not isinstance(ticket, dict) or not ticket_id(ticket):
+            raise ValueError(f"line {number}: expected an object with an \"id\" or \"request_id\"")
+        yield number, ticket
+
+
+def ticket_id(ticket):
+    return str(ticket.get("id") or ticket.get("request_id") or "")
+
+
+def ticket_hash(ticket, generator_key):
+    """
+    Hash a ticket's content together with the generator that turns it into code.
+
+    Key order and whitespace in the feed do not change the hash.
+    """
+    canonical = json.dumps(ticket, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(f"{generator_key}\n{canonical}".encode("utf-8")).hexdigest()
+
+
+def module_name(ticket):
+    """
+    Return the file name generated for a ticket.
+
+    Tickets may name their module ("module": "pysel55e"); otherwise it is
+    derived from the id.
+
+    Raises:
+        ValueError: The ticket names a module outside the output directory
+            (an absolute path or one containing "..").
+    """
+    name = ticket.get("module") or "pysel_" + re.sub(r"\W+", "_", ticket_id(ticket)).strip("_").lower()
+    name = str(name)
+    if os.path.isabs(name) or ".." in re.split(r"[\\/]", name):
+        raise ValueError(f"module {name!r} must be a path inside the output directory")
+    return name if name.endswith(".py") else f"{name}.py"
+
+
+def placeholder_generator(ticket):
+    """Default generator: a skipped placeholder test carrying the ticket title."""
+    title = str(ticket.get("title") or ticket_id(ticket)).replace('"""', "'''")
+    return _PLACEHOLDER_TEMPLATE.format(title=title, ticket_id=ticket_id(ticket))
+
+
+def command_generator(command):
+    """
+    Wrap an external generator command.
+
+    Args:
+        command: Shell command reading ticket JSON on stdin and printing module source
+
+    Returns:
+        callable: Generator function for Pipeline.
+    """
+    def generate(ticket):
+        result = subprocess.run(
+            command, shell=True, input=json.dumps(ticket), capture_output=True, text=True,
+        )
+        if result.returncode != 0:
+            raise GenerationError(
+                f"{command!r} exited with {result.returncode}: {result.stderr.strip()[-500:]}"
+            )
+        return result.stdout
+    return generate
+
+
+def _write_atomic(path, text):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+class Pipeline:
+    """
+    Generates modules for a feed, reusing cached output by ticket hash.
+
+    Attributes:
+        stats: Counts of "unchanged", "cached", "generated" and "failed" tickets
+    """
+
+    def __init__(self, output_dir=".", generator=placeholder_generator, generator_key=None, cache=None,
+                 feed=None):
+        """
+        Args:
+            output_dir: Where generated modules are written
+            generator: Callable(ticket) returning module source
+            generator_key: Identity of the generator, part of every hash;
+                change it to invalidate cached output
+            cache: Cache directory, defaults to .harness/generated
+            feed: Identity of the feed (its path); the manifest records
+                which feed wrote each module, and prune() only touches
+                modules of this feed
+        """
+        self.output_dir = output_dir
+        self.feed = feed
+        self.generator = generator
+        self.generator_key = generator_key or f"placeholder-{TEMPLATE_VERSION}"
+        self.cache = cache or cache_dir("generated")
+        os.makedirs(self.cache, exist_ok=True)
+        self.manifest_path = os.path.join(self.cache, "manifest.json")
+        self.stats = {"unchanged": 0, "cached": 0, "generated": 0, "failed": 0}
+
+    def _cached_path(self, digest):
+        return os.path.join(self.cache, f"{digest}.py")
+
+    def plan(self, ticket, manifest):
+        """
+        Decide what a ticket needs.
+
+        Returns:
+            tuple: (action, digest, output path); action is "unchanged",
+                "cached" or "generate".
+        """
+        digest = ticket_hash(ticket, self.generator_key)
+        output = os.path.join(self.output_dir, module_name(ticket))
+        entry = manifest.get(ticket_id(ticket))
+        if (entry and entry["hash"] == digest and entry["module"] == output
+                and entry.get("feed") == self.feed and os.path.exists(output)):
+            return "unchanged", digest, output
+        if os.path.exists(self._cached_path(digest)):
+            return "cached", digest, output
+        return "generate", digest, output
+
+    def _produce(self, ticket, action, digest, output):
+        if action == "generate":
+            source = self.generator(ticket)
+            _write_atomic(self._cached_path(digest), source)
+        if action != "unchanged":
+            with open(self._cached_path(digest)) as f:
+                _write_atomic(output, f.read())
+        return action
+
+    def run(self, lines, jobs=1):
+        """
+        Process a feed, yielding one result per ticket as soon as it is done.
+
+        At most jobs tickets are generated at once and at most 2 * jobs are
+        read ahead, so memory use does not grow with the feed.
+
+        Args:
+            lines: Iterable of JSON lines
+            jobs: Tickets generated in parallel (for slow external generators)
+
+        Yields:
+            dict: "id", "line", "action" ("unchanged", "cached",
+                "generated" or "failed"), "module" and, on failure, "error".
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        manifest = read_json(self.manifest_path)
+        window = deque()
+        with ThreadPoolExecutor(max_workers=max(jobs, 1)) as executor:
+            for number, ticket in iter_tickets(lines):
+                try:
+                    action, digest, output = self.plan(ticket, manifest)
+                except ValueError as e:
+                    # Reported as a failed ticket, in feed order
+                    future = Future()
+                    future.set_exception(e)
+                    window.append((number, ticket, None, None, future))
+                    continue
+                future = executor.submit(self._produce, ticket, action, digest, output)
+                window.append((number, ticket, digest, output, future))
+                if len(window) >= 2 * max(jobs, 1):
+                    yield self._finish(window.popleft(), manifest)
+            while window:
+                yield self._finish(window.popleft(), manifest)
+
+    def _finish(self, item, manifest):
+        number, ticket, digest, output, future = item
+        result = {"id": ticket_id(ticket), "line": number, "module": output}
+        try:
+            action = future.result()
+        except Exception as e:
+            self.stats["failed"] += 1
+            result.update(action="failed", error=f"{type(e).__name__}: {e}")
+            return result
+        action = "generated" if action == "generate" else action
+        self.stats[action] += 1
+        result["action"] = action
+        if action != "unchanged":
+            manifest[result["id"]] = {"hash": digest, "module": output, "feed": self.feed}
+            self._save_manifest(result["id"], manifest[result["id"]])
+        return result
+
+    def _save_manifest(self, key, entry):
+        # Re-read under the lock so concurrent runs on other feeds are kept
+        with file_lock(self.manifest_path):
+            current = read_json(self.manifest_path)
+            current[key] = entry
+            write_json_atomic(self.manifest_path, current, indent=1, sort_keys=True)
+
+    def prune(self, seen_ids):
+        """
+        Delete modules of tickets that are no longer in the feed.
+
+        Only modules this feed generated into this output directory are
+        removed; other feeds sharing the manifest are left alone.
+
+        Args:
+            seen_ids: Ticket ids of the feed just processed
+
+        Returns:
+            list: Paths removed.
+        """
+        removed = []
+        output_dir = os.path.realpath(self.output_dir)
+        with file_lock(self.manifest_path):
+            manifest = read_json(self.manifest_path)
+            for key in [key for key, entry in manifest.items()
+                        if key not in seen_ids and entry.get("feed") == self.feed]:
+                path = manifest[key]["module"]
+                if os.path.commonpath([os.path.realpath(path), output_dir]) != output_dir:
+                    continue
+                del manifest[key]
+                if os.path.exists(path):
+                    os.remove(path)
+                    removed.append(path)
+            write_json_atomic(self.manifest_path, manifest, indent=1, sort_keys=True)
+        return removed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate test modules for new or changed tickets.")
+    parser.add_argument("feed", help="JSON Lines ticket feed ('-' for stdin)")
+    parser.add_argument("--out", default=".", help="directory for generated modules (default: .)")
+    parser.add_argument("--command", help="generator command: ticket JSON on stdin, module source on stdout")
+    parser.add_argument("--jobs", type=int, default=1, help="tickets generated in parallel (default 1)")
+    parser.add_argument("--prune", action="store_true",
+                        help="delete modules of tickets no longer in the feed")
+    options = parser.parse_args(argv)
+
+    feed_key = "-" if options.feed == "-" else os.path.abspath(options.feed)
+    if options.command:
+        pipeline = Pipeline(options.out, command_generator(options.command), f"command:{options.command}",
+                            feed=feed_key)
+    else:
+        pipeline = Pipeline(options.out, feed=feed_key)
+
+    feed = sys.stdin if options.feed == "-" else open(options.feed)
+    seen = set()
+    try:
+        for result in pipeline.run(feed, jobs=options.jobs):
+            seen.add(result["id"])
+            detail = f" ({result['error']})" if result["action"] == "failed" else ""
+            print(f"{result['action']:>9} {result['id']} -> {result['module']}{detail}", flush=True)
+    except ValueError as e:
+        print(f"{options.feed}: {e}", file=sys.stderr)
+        return 2
+    finally:
+        if feed is not sys.stdin:
+            feed.close()
+
+    if options.prune:
+        for path in pipeline.prune(seen):
+            print(f"  removed {path}")
+    print("{generated} generated, {cached} from cache, {unchanged} unchanged, {failed} failed".format(
+        **pipeline.stats
+    ))
+    return 1 if pipeline.stats["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
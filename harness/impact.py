@@ -0,0 +1,374 @@
+"""
+Test-impact selection: skip browser tests whose inputs have not changed.
+
+A test's result can only change if its code or the pages it drives
+change. For every passing test the harness stores a fingerprint of
+
+- its source: the test function plus everything in its module that is not
+  another test (helpers, page objects, fixtures), and the shared harness
+  code (conftest.py files, harness/*.py, requirements.txt);
+- every page it loaded: the HTML of the URL plus the scripts and
+  stylesheets it references, fetched over plain HTTP (no browser).
+
+With ``pytest --impact`` a test is deselected when its source fingerprint
+matches its last passing run and every recorded page still hashes the
+same. Pages are fetched through the stub server when one runs, so replays
+are stable; pages with per-request content (tokens, timestamps) always
+count as changed, which only costs a re-run.
+
+A full run is forced when HARNESS_IMPACT_FULL is set (e.g. by a scheduled
+CI job) and for any test whose last pass is older than
+HARNESS_IMPACT_MAX_AGE seconds (default one day).
+
+Results live in .harness/impact.sqlite, shared safely by parallel workers.
+"""
+import ast
+import glob
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.parse import urljoin
+
+from selenium.webdriver.remote.command import Command
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from harness import stubserver
+from harness.config import cache_dir, env_flag
+
+DEFAULT_MAX_AGE = 24 * 3600
+FETCH_TIMEOUT = 10
+MAX_ASSETS = 20
+
+_ASSET_RE = re.compile(
+    rb"""<(?:script[^>]*\ssrc|link[^>]*\shref)\s*=\s*["']([^"']+)["']""", re.IGNORECASE
+)
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    nodeid TEXT PRIMARY KEY,
+    source TEXT NOT NULL,
+    pages TEXT NOT NULL,
+    passed_at REAL NOT NULL
+)
+"""
+
+
+def _sha256(*chunks):
+    digest = hashlib.sha256()
+    for chunk in chunks:
+        digest.update(chunk if isinstance(chunk, bytes) else chunk.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def environment_fingerprint(root):
+    """
+    Hash the code every test depends on: conftest files, harness and requirements.
+
+    Args:
+        root: Repository root
+    """
+    paths = sorted(
+        glob.glob(os.path.join(root, "conftest.py"))
+        + glob.glob(os.path.join(root, "*", "conftest.py"))
+        + glob.glob(os.path.join(root, "harness", "*.py"))
+        + glob.glob(os.path.join(root, "requirements.txt"))
+    )
+    chunks = []
+    for path in paths:
+        with open(path, "rb") as f:
+            chunks += [os.path.relpath(path, root), f.read()]
+    return _sha256(*chunks)
+
+
+def _test_ranges(tree):
+    # (name, class name, first line, last line) of every test, decorators included
+    ranges = []
+    for node in tree.body:
+        members = [(node, None)]
+        if isinstance(node, ast.ClassDef):
+            members = [(item, node.name) for item in node.body]
+        for item, class_name in members:
+            if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)) and item.name.startswith("test"):
+                first = min([item.lineno] + [d.lineno for d in item.decorator_list])
+                ranges.append((item.name, class_name, first, item.end_lineno))
+    return ranges
+
+
+def source_fingerprint(path, test_name, class_name=None):
+    """
+    Hash the source a single test depends on.
+
+    Other tests in the same module are left out, so editing one test does
+    not invalidate its neighbours.
+
+    Args:
+        path: Test module
+        test_name: Function name (without parametrize ids)
+        class_name: Enclosing class, if any
+    """
+    with open(path, encoding="utf-8") as f:
+        source = f.read()
+    try:
+        ranges = _test_ranges(ast.parse(source))
+    except SyntaxError:
+        return _sha256(source)
+    lines = source.splitlines(keepends=True)
+    skipped = set()
+    for name, owner, first, last in ranges:
+        if (name, owner) != (test_name, class_name):
+            skipped.update(range(first, last + 1))
+    return _sha256("".join(line for number, line in enumerate(lines, 1) if number not in skipped))
+
+
+def _fetch(url):
+    with urllib.request.urlopen(stubserver.route(url), timeout=FETCH_TIMEOUT) as response:
+        return response.read()
+
+
+def page_fingerprint(url, fetch=_fetch):
+    """
+    Hash a page's HTML and the scripts and stylesheets it references.
+
+    Args:
+        url: Real (not stub) URL
+        fetch: Callable(url) returning the body, for tests
+
+    Returns:
+        str or None: Hex digest, or None if the page could not be fetched.
+    """
+    try:
+        html = fetch(url)
+    except Exception:
+        return None
+    chunks = [html]
+    for asset in sorted(set(_ASSET_RE.findall(html)))[:MAX_ASSETS]:
+        asset_url = urljoin(url, asset.decode("utf-8", "replace"))
+        try:
+            chunks += [asset_url, fetch(stubserver.upstream_url(asset_url))]
+        except Exception:
+            # An asset that cannot be fetched is part of the page's state too
+            chunks += [asset_url, b"<unavailable>"]
+    return _sha256(*chunks)
+
+
+class ImpactStore:
+    """
+    Last passing fingerprint per test, in SQLite.
+
+    Each call opens its own connection, so the store can be used from
+    several threads and worker processes at once.
+    """
+
+    def __init__(self, path=None):
+        """
+        Args:
+            path: Database file, defaults to .harness/impact.sqlite
+        """
+        self.path = path or os.path.join(cache_dir(), "impact.sqlite")
+        with self._connect() as db:
+            db.execute(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=30)
+        try:
+            # WAL lets readers proceed while another worker writes
+            db.execute("PRAGMA journal_mode=WAL")
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def get(self, nodeid):
+        """Return {"source", "pages", "passed_at"} of the last pass, or None."""
+        with self._connect() as db:
+            row = db.execute(
+                "SELECT source, pages, passed_at FROM results WHERE nodeid = ?", (nodeid,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"source": row[0], "pages": json.loads(row[1]), "passed_at": row[2]}
+
+    def record(self, nodeid, source, pages, passed_at=None):
+        """
+        Store a passing run.
+
+        Args:
+            nodeid: Test node id
+            source: Source fingerprint
+            pages: dict of URL -> page fingerprint
+        """
+        with self._connect() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO results (nodeid, source, pages, passed_at) VALUES (?, ?, ?, ?)",
+                (nodeid, source, json.dumps(pages, sort_keys=True), passed_at or time.time()),
+            )
+
+    def forget(self, nodeid):
+        with self._connect() as db:
+            db.execute("DELETE FROM results WHERE nodeid = ?", (nodeid,))
+
+
+class UrlRecorder:
+    """
+    Records the URLs each test navigates to while installed.
+
+    Wraps WebDriver.execute like the tracer. URLs reached by clicking links
+    are added from the browser's current URL when a pooled browser is
+    released (see on_release), and from every browser still leased when a
+    test starts and ends (see test_started), so tests working on a page a
+    class-scoped fixture loaded earlier record it too.
+    """
+
+    def __init__(self):
+        self.current_test = None
+        self.urls = {}
+        self._leased = []
+        self._lock = threading.Lock()
+        self._original = None
+
+    def add(self, url):
+        if self.current_test is None or not url or not url.startswith(("http://", "https://")):
+            return
+        with self._lock:
+            self.urls.setdefault(self.current_test, set()).add(stubserver.upstream_url(url))
+
+    def _patched_execute(self, original):
+        recorder = self
+
+        def execute(driver, driver_command, params=None):
+            if driver_command == Command.GET and params:
+                recorder.add(params.get("url"))
+            return original(driver, driver_command, params)
+
+        return execute
+
+    def on_acquire(self, driver):
+        """Pool acquire hook: track the browser until it is released."""
+        with self._lock:
+            self._leased.append(driver)
+
+    def on_release(self, driver):
+        """Pool release hook: remember where the test left the browser."""
+        with self._lock:
+            if driver in self._leased:
+                self._leased.remove(driver)
+        self._add_current(driver)
+
+    def _add_current(self, driver):
+        try:
+            self.add(driver.current_url)
+        except Exception:
+            pass
+
+    def test_started(self, nodeid):
+        """Start recording for nodeid, beginning with the pages leased browsers are on."""
+        self.current_test = nodeid
+        self._add_leased()
+
+    def test_finished(self):
+        """Record where leased browsers are now and stop recording."""
+        self._add_leased()
+        self.current_test = None
+
+    def _add_leased(self):
+        with self._lock:
+            leased = list(self._leased)
+        for driver in leased:
+            self._add_current(driver)
+
+    def install(self):
+        self._original = WebDriver.execute
+        WebDriver.execute = self._patched_execute(WebDriver.execute)
+
+    def uninstall(self):
+        if self._original is not None:
+            WebDriver.execute = self._original
+            self._original = None
+
+
+class ImpactSelector:
+    """
+    Decides which tests to run and records the ones that passed.
+    """
+
+    def __init__(self, root, store=None, max_age=None, full=None, fetch=_fetch):
+        """
+        Args:
+            root: Repository root
+            store: ImpactStore, defaults to .harness/impact.sqlite
+            max_age: Seconds after which a pass no longer counts
+                (HARNESS_IMPACT_MAX_AGE, default one day)
+            full: Run everything (HARNESS_IMPACT_FULL)
+            fetch: Callable(url) returning a page body, for tests
+        """
+        self.root = root
+        self.store = store or ImpactStore()
+        self.max_age = max_age if max_age is not None else float(
+            os.getenv("HARNESS_IMPACT_MAX_AGE", DEFAULT_MAX_AGE)
+        )
+        self.full = env_flag("HARNESS_IMPACT_FULL") if full is None else full
+        self.fetch = fetch
+        self.stats = {"skipped": 0, "selected": 0}
+        self._environment = environment_fingerprint(root)
+        self._pages = {}
+
+    def source(self, path, test_name, class_name=None):
+        return _sha256(self._environment, source_fingerprint(path, test_name, class_name))
+
+    def pages(self, urls):
+        """Fingerprint URLs (in parallel, once per URL per run)."""
+        missing = [url for url in urls if url not in self._pages]
+        if missing:
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                for url, digest in zip(missing, executor.map(lambda u: page_fingerprint(u, self.fetch), missing)):
+                    self._pages[url] = digest
+        return {url: self._pages[url] for url in urls}
+
+    def unchanged(self, nodeid, source, uses_browser=False):
+        """
+        Return True if a test can be skipped.
+
+        Args:
+            nodeid: Test node id
+            source: Current source fingerprint (see source())
+            uses_browser: The test leases a browser
+        """
+        if self.full:
+            return False
+        last = self.store.get(nodeid)
+        if last is None or last["source"] != source or time.time() - last["passed_at"] > self.max_age:
+            return False
+        if uses_browser and not last["pages"]:
+            # It drove a page that was not recorded, so nothing shows whether that page changed
+            return False
+        # A test that never loaded a page is decided by its source alone
+        current = self.pages(list(last["pages"]))
+        return all(digest is not None and current[url] == digest for url, digest in last["pages"].items())
+
+    def record(self, nodeid, source, urls, passed):
+        """
+        Store the outcome of a test that ran.
+
+        Args:
+            nodeid: Test node id
+            source: Source fingerprint at collection time
+            urls: URLs the test loaded
+            passed: Whether every phase passed
+        """
+        if not passed:
+            self.store.forget(nodeid)
+            return
+        pages = self.pages(sorted(urls))
+        if any(digest is None for digest in pages.values()):
+            # Without a page fingerprint the next run could not tell; run again
+            self.store.forget(nodeid)
+            return
+        self.store.record(nodeid, source, pages)
@@ -0,0 +1,442 @@
+"""
+Selector cost analyzer and fast-locator rewriter.
+
+Usage:
+    python -m harness.locator_audit pysel55e.py pysel52b.py
+    python -m harness.locator_audit pysel52b.py --snapshot cart.html --apply
+    python -m harness.locator_audit pysel55e.py --snapshot devices.html \\
+        --param serial_number=SN12345
+
+Every (By.X, "...") locator in the given files is checked statically for
+patterns that are slow on large DOMs: text matching, and predicates on the
+string value of "." which concatenates the text of a whole subtree for
+every candidate element. Simple XPath (attribute predicates, descendant
+and child steps, positions) is translated to an equivalent CSS selector.
+
+With --snapshot, each locator is timed against the captured DOM in a
+pooled browser, and candidates (the CSS translation plus the id or
+data-testid of a uniquely matched element) are timed too and only kept if
+they select exactly the same nodes. --apply (which requires --snapshot)
+rewrites plain string locators in place with the fastest verified
+candidate; without a snapshot the CSS translation is only printed.
+"""
+import argparse
+import ast
+import os
+import re
+import sys
+
+from selenium.webdriver.common.by import By
+
+from harness.locators import FIND_JS, normalize
+
+# (By.X, "value") or (By.X, f"value {expr}") as written in test code
+_LOCATOR_RE = re.compile(
+    r"""By\.(?P<by>[A-Z_]+)\s*,\s*(?P<literal>(?P<prefix>[fFrR]{0,2})(?P<quote>["'])(?P<body>(?:\\.|(?!(?P=quote)).)*)(?P=quote))"""
+)
+_PLACEHOLDER_RE = re.compile(r"\{([^{}]+)\}")
+_IDENT_RE = re.compile(r"^[A-Za-z_][\w-]*$")
+_NAME_RE = re.compile(r"^(\*|[A-Za-z_][\w-]*)")
+_STRING = r"""(?:'([^']*)'|"([^"]*)")"""
+_PREDICATES = [
+    (re.compile(rf"^@([\w-]+)\s*=\s*{_STRING}$"), "="),
+    (re.compile(rf"^contains\(\s*@([\w-]+)\s*,\s*{_STRING}\s*\)$"), "*="),
+    (re.compile(rf"^starts-with\(\s*@([\w-]+)\s*,\s*{_STRING}\s*\)$"), "^="),
+]
+
+TEXT_MATCH = "text-match"
+STRING_VALUE_SCAN = "string-value-scan"
+DYNAMIC = "dynamic"
+
+_ISSUE_TEXT = {
+    TEXT_MATCH: "matches on text(); slow and brittle, prefer an id or data-testid",
+    STRING_VALUE_SCAN: "predicate on '.' concatenates the text of every candidate's subtree "
+                       "(whole-document scan); scope it or use an id/data-testid",
+    DYNAMIC: "built with an f-string; benchmarked with --param values, never rewritten",
+}
+
+# Speed-up a candidate needs before it is suggested over the original
+MIN_SPEEDUP = 1.2
+
+
+class Locator:
+    """A locator found in source code, with its position for rewriting."""
+
+    def __init__(self, path, line, by, value, start, end, dynamic):
+        self.path = path
+        self.line = line
+        self.by = by
+        self.value = value
+        self.start = start
+        self.end = end
+        self.dynamic = dynamic
+        self.issues = []
+        self.static_css = None
+        self.timing = None
+        self.suggestion = None
+
+    @property
+    def locator(self):
+        return (self.by, self.value)
+
+
+def extract_locators(path):
+    """
+    Find every (By.X, "...") locator in a source file.
+
+    Works on the raw text, so files with syntax errors are still analysed.
+
+    Args:
+        path: Python source file
+
+    Returns:
+        list: Locator objects in file order.
+    """
+    with open(path) as f:
+        source = f.read()
+    found = []
+    for match in _LOCATOR_RE.finditer(source):
+        attribute = match.group("by")
+        if not hasattr(By, attribute):
+            continue
+        dynamic = "f" in match.group("prefix").lower()
+        if dynamic:
+            value = match.group("body")
+        else:
+            try:
+                value = ast.literal_eval(match.group("literal"))
+            except (ValueError, SyntaxError):
+                continue
+        found.append(Locator(
+            path, source.count("\n", 0, match.start()) + 1, getattr(By, attribute), value,
+            match.start(), match.end(), dynamic,
+        ))
+    return found
+
+
+def _split_steps(xpath):
+    """Split '//a/b[...]//c' into [('//', 'a'), ('/', 'b[...]'), ('//', 'c')]."""
+    steps, depth, quote, current, axis = [], 0, None, "", None
+    i = 0
+    while i < len(xpath):
+        char = xpath[i]
+        if quote:
+            quote = None if char == quote else quote
+        elif char in "'\"":
+            quote = char
+        elif char in "[(":
+            depth += 1
+        elif char in "])":
+            depth -= 1
+        elif char == "/" and depth == 0:
+            if axis is not None:
+                steps.append((axis, current))
+            axis = "//" if xpath.startswith("//", i) else "/"
+            i += len(axis)
+            current = ""
+            continue
+        current += char
+        i += 1
+    if axis is None or quote or depth:
+        return None
+    steps.append((axis, current))
+    return steps
+
+
+def _split_predicates(step):
+    """Split 'td[@a='b'][2]' into ('td', ["@a='b'", "2"])."""
+    match = _NAME_RE.match(step)
+    if not match:
+        return None, None
+    name, rest, predicates = match.group(1), step[match.end():], []
+    while rest:
+        if not rest.startswith("["):
+            return None, None
+        depth, quote = 0, None
+        for i, char in enumerate(rest):
+            if quote:
+                quote = None if char == quote else quote
+            elif char in "'\"":
+                quote = char
+            elif char == "[":
+                depth += 1
+            elif char == "]":
+                depth -= 1
+                if depth == 0:
+                    predicates.append(rest[1:i].strip())
+                    rest = rest[i + 1:]
+                    break
+        else:
+            return None, None
+    return name, predicates
+
+
+def _css_string(value):
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def xpath_to_css(xpath):
+    """
+    Translate a simple XPath to an equivalent CSS selector.
+
+    Supported: descendant (//) and child (/) steps with element names or *,
+    predicates [@a='v'], [@a], [contains(@a,'v')], [starts-with(@a,'v')]
+    and [n] positions as the first predicate of a named step. Anything
+    else returns None.
+
+    Args:
+        xpath: XPath expression starting with //
+
+    Returns:
+        str: CSS selector, or None if there is no exact equivalent.
+    """
+    if not xpath.startswith("//"):
+        return None
+    steps = _split_steps(xpath)
+    if not steps:
+        return None
+    parts = []
+    for index, (axis, step) in enumerate(steps):
+        name, predicates = _split_predicates(step.strip())
+        if name is None:
+            return None
+        css = "" if name == "*" and predicates else name
+        for position, predicate in enumerate(predicates):
+            if predicate.isdigit():
+                # After a filter, [n] counts only the filtered nodes, which
+                # :nth-of-type cannot express
+                if name == "*" or position:
+                    return None
+                css += f":nth-of-type({predicate})"
+                continue
+            if re.fullmatch(r"@[\w-]+", predicate):
+                css += f"[{predicate[1:]}]"
+                continue
+            for pattern, operator in _PREDICATES:
+                match = pattern.match(predicate)
+                if match:
+                    attribute = match.group(1)
+                    value = match.group(2) if match.group(2) is not None else match.group(3)
+                    if attribute == "id" and operator == "=" and _IDENT_RE.match(value):
+                        css += f"#{value}"
+                    else:
+                        css += f"[{attribute}{operator}{_css_string(value)}]"
+                    break
+            else:
+                return None
+        if index:
+            parts.append(" " if axis == "//" else " > ")
+        parts.append(css or "*")
+    return "".join(parts)
+
+
+def analyse_static(locator):
+    """
+    Fill in issues and the static CSS translation of a locator.
+
+    Args:
+        locator: Locator to analyse in place
+    """
+    value = locator.value
+    if locator.dynamic:
+        locator.issues.append(DYNAMIC)
+    if locator.by != By.XPATH:
+        return
+    if re.search(r"text\(\)", value):
+        locator.issues.append(TEXT_MATCH)
+    if re.search(r"(contains|starts-with|normalize-space|string)\(\s*\.\s*[,)]|\[\s*\.\s*=", value):
+        locator.issues.append(STRING_VALUE_SCAN)
+    css = xpath_to_css(value)
+    if css:
+        locator.static_css = css
+
+
+def _as_selenium(css):
+    """Prefer By.ID for a bare #id selector."""
+    if css.startswith("#") and _IDENT_RE.match(css[1:]):
+        return (By.ID, css[1:])
+    return (By.CSS_SELECTOR, css)
+
+
+_BENCH_SCRIPT = FIND_JS + r"""
+var entries = arguments[0], iterations = arguments[1];
+
+function time(strategy, value) {
+  var nodes = __harnessFind(strategy, value, true);
+  var started = performance.now();
+  for (var i = 0; i < iterations; i++) { __harnessFind(strategy, value, true); }
+  return {ms: (performance.now() - started) / iterations, nodes: nodes};
+}
+function same(a, b) {
+  if (a.length !== b.length) { return false; }
+  for (var i = 0; i < a.length; i++) { if (a[i] !== b[i]) { return false; } }
+  return true;
+}
+
+return entries.map(function (entry) {
+  var original;
+  try { original = time(entry.strategy, entry.value); }
+  catch (e) { return {error: String(e && e.message || e)}; }
+  var candidates = entry.candidates.slice();
+  if (original.nodes.length === 1) {
+    var el = original.nodes[0];
+    if (el.getAttribute('data-testid')) {
+      candidates.push({by: 'css selector', strategy: 'css selector',
+                       value: '[data-testid="' + el.getAttribute('data-testid') + '"]'});
+    }
+    if (el.id) {
+      candidates.push({by: 'id', strategy: 'css selector', value: '[id="' + el.id + '"]',
+                       selenium: el.id});
+    }
+  }
+  var results = candidates.map(function (candidate) {
+    try {
+      var timing = time(candidate.strategy, candidate.value);
+      return {by: candidate.by, value: candidate.selenium || candidate.value,
+              ms: timing.ms, equivalent: same(timing.nodes, original.nodes)};
+    } catch (e) { return {by: candidate.by, value: candidate.value, error: String(e)}; }
+  });
+  return {ms: original.ms, matches: original.nodes.length, candidates: results};
+});
+"""
+
+
+def _substitute(value, params):
+    return _PLACEHOLDER_RE.sub(lambda match: params.get(match.group(1).strip(), ""), value)
+
+
+def benchmark(driver, locators, snapshot, iterations=50, params=None):
+    """
+    Time each locator and its candidates against a captured DOM snapshot.
+
+    Args:
+        driver: WebDriver to load the snapshot into
+        locators: Locator objects (already passed through analyse_static)
+        snapshot: Path to an HTML file captured with capture_snapshot()
+        iterations: Lookups per locator for the timing
+        params: Values for f-string placeholders, e.g. {"serial_number": "SN12345"}
+    """
+    params = params or {}
+    driver.get("file://" + os.path.abspath(snapshot))
+    entries = []
+    for locator in locators:
+        strategy, value = normalize((locator.by, _substitute(locator.value, params)))
+        candidates = []
+        if locator.static_css and not locator.dynamic:
+            by, selenium_value = _as_selenium(locator.static_css)
+            candidates.append({"by": by, "strategy": By.CSS_SELECTOR,
+                               "value": locator.static_css, "selenium": selenium_value})
+        entries.append({"strategy": strategy, "value": value, "candidates": candidates})
+
+    for locator, result in zip(locators, driver.execute_script(_BENCH_SCRIPT, entries, iterations)):
+        locator.timing = result
+        if "error" in result or locator.dynamic:
+            continue
+        verified = [c for c in result["candidates"] if c.get("equivalent")]
+        if verified:
+            best = min(verified, key=lambda c: c["ms"])
+            if best["ms"] * MIN_SPEEDUP <= result["ms"]:
+                locator.suggestion = (best["by"], best["value"])
+
+
+def capture_snapshot(driver, path):
+    """
+    Save the current page's DOM for later benchmarking.
+
+    Args:
+        driver: WebDriver on the page to capture
+        path: Destination HTML file
+    """
+    html = driver.execute_script("return document.documentElement.outerHTML")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("<!DOCTYPE html>\n" + html)
+
+
+def apply_suggestions(path, locators):
+    """
+    Rewrite locators in place with their suggestions.
+
+    Args:
+        path: Source file the locators came from
+        locators: Locator objects with .suggestion set (others are left alone)
+
+    Returns:
+        int: Number of locators rewritten.
+    """
+    with open(path) as f:
+        source = f.read()
+    rewritten = 0
+    # Work backwards so earlier offsets stay valid
+    for locator in sorted(locators, key=lambda item: item.start, reverse=True):
+        if not locator.suggestion or locator.dynamic:
+            continue
+        by, value = locator.suggestion
+        attribute = next(name for name in dir(By) if getattr(By, name) == by)
+        source = source[:locator.start] + f"By.{attribute}, {value!r}" + source[locator.end:]
+        rewritten += 1
+    if rewritten:
+        with open(path, "w") as f:
+            f.write(source)
+    return rewritten
+
+
+def _format(locator):
+    lines = [f"{locator.path}:{locator.line}  ({locator.by}, {locator.value!r})"]
+    timing = locator.timing
+    if timing and "error" in timing:
+        lines.append(f"    error: {timing['error']}")
+    elif timing:
+        lines.append(f"    {timing['ms'] * 1000:.1f} us/lookup, {timing['matches']} match(es)")
+        for candidate in timing["candidates"]:
+            if "error" in candidate:
+                continue
+            verdict = "same nodes" if candidate["equivalent"] else "DIFFERENT nodes"
+            lines.append(f"      candidate ({candidate['by']}, {candidate['value']!r}): "
+                         f"{candidate['ms'] * 1000:.1f} us, {verdict}")
+    for issue in locator.issues:
+        lines.append(f"    ! {_ISSUE_TEXT[issue]}")
+    if locator.suggestion:
+        lines.append(f"    -> use {locator.suggestion!r}")
+    elif locator.static_css and not timing:
+        lines.append(f"    -> CSS translation (unverified, check with --snapshot): {locator.static_css!r}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyse and optimise Selenium locators.")
+    parser.add_argument("files", nargs="+", help="test modules to analyse")
+    parser.add_argument("--snapshot", help="captured DOM (HTML) to benchmark against")
+    parser.add_argument("--iterations", type=int, default=50, help="lookups per timing")
+    parser.add_argument("--param", action="append", default=[], metavar="NAME=VALUE",
+                        help="value for an f-string placeholder, e.g. serial_number=SN12345")
+    parser.add_argument("--apply", action="store_true", help="rewrite locators in place")
+    options = parser.parse_args(argv)
+    if options.apply and not options.snapshot:
+        # Only rewrites checked to select the same nodes are applied
+        parser.error("--apply requires --snapshot")
+    params = dict(item.split("=", 1) for item in options.param)
+
+    per_file = {path: extract_locators(path) for path in options.files}
+    everything = [locator for locators in per_file.values() for locator in locators]
+    for locator in everything:
+        analyse_static(locator)
+
+    if options.snapshot:
+        from harness.pool import default_pool
+
+        with default_pool().lease() as driver:
+            benchmark(driver, everything, options.snapshot, options.iterations, params)
+        everything.sort(key=lambda item: (item.timing or {}).get("ms", 0), reverse=True)
+
+    for locator in everything:
+        print(_format(locator))
+
+    if options.apply:
+        for path, locators in per_file.items():
+            count = apply_suggestions(path, locators)
+            print(f"{path}: rewrote {count} locator(s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
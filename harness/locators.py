@@ -0,0 +1,87 @@
+"""
+Locator handling shared by the in-page scripts.
+
+Selenium locators are (By.X, value) tuples. In-browser scripts only need to
+understand CSS, XPath and the two link-text strategies, so the remaining
+strategies are rewritten to CSS the same way the W3C remote driver does.
+"""
+from selenium.webdriver.common.by import By
+
+# JavaScript helpers injected in front of every in-page script. find() takes
+# a normalised (strategy, value) pair and returns the first match, or every
+# match when all is true.
+FIND_JS = r"""
+function __harnessFind(strategy, value, all, root) {
+  root = root || document;
+  if (strategy === 'css selector') {
+    return all ? Array.prototype.slice.call(root.querySelectorAll(value))
+               : root.querySelector(value);
+  }
+  if (strategy === 'xpath') {
+    var doc = root.ownerDocument || root;
+    if (!all) {
+      return doc.evaluate(value, root, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null)
+                .singleNodeValue;
+    }
+    var snapshot = doc.evaluate(value, root, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+    var nodes = [];
+    for (var i = 0; i < snapshot.snapshotLength; i++) { nodes.push(snapshot.snapshotItem(i)); }
+    return nodes;
+  }
+  if (strategy === 'link text' || strategy === 'partial link text') {
+    var links = root.querySelectorAll('a'), matches = [];
+    for (var j = 0; j < links.length; j++) {
+      var text = (links[j].innerText || links[j].textContent || '').trim();
+      if (strategy === 'link text' ? text === value : text.indexOf(value) !== -1) {
+        if (!all) { return links[j]; }
+        matches.push(links[j]);
+      }
+    }
+    return all ? matches : null;
+  }
+  throw new Error('Unsupported locator strategy: ' + strategy);
+}
+
+function __harnessVisible(el) {
+  if (!el || !el.isConnected) { return false; }
+  for (var node = el; node && node.nodeType === 1; node = node.parentElement) {
+    var style = window.getComputedStyle(node);
+    if (style.display === 'none') { return false; }
+    if (node === el && (style.visibility === 'hidden' || style.visibility === 'collapse')) {
+      return false;
+    }
+    if (parseFloat(style.opacity) === 0) { return false; }
+  }
+  var rect = el.getBoundingClientRect();
+  return rect.width > 0 && rect.height > 0;
+}
+"""
+
+
+def _css_escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def normalize(locator):
+    """
+    Convert a Selenium locator into a strategy the in-page scripts support.
+
+    Args:
+        locator: (By.X, value) tuple
+
+    Returns:
+        tuple: (strategy, value) where strategy is "css selector", "xpath",
+            "link text" or "partial link text".
+    """
+    by, value = locator
+    if by == By.ID:
+        return By.CSS_SELECTOR, f'[id="{_css_escape(value)}"]'
+    if by == By.NAME:
+        return By.CSS_SELECTOR, f'[name="{_css_escape(value)}"]'
+    if by == By.CLASS_NAME:
+        return By.CSS_SELECTOR, f".{value}"
+    if by == By.TAG_NAME:
+        return By.CSS_SELECTOR, value
+    if by in (By.CSS_SELECTOR, By.XPATH, By.LINK_TEXT, By.PARTIAL_LINK_TEXT):
+        return by, value
+    raise ValueError(f"Unsupported locator strategy: {by!r}")
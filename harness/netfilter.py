@@ -0,0 +1,231 @@
+"""
+Per-test request blocking through the Chrome DevTools Protocol.
+
+Pages such as demoblaze pull in images, fonts and analytics scripts that
+no assertion looks at. A NetworkFilter blocks them with
+Network.setBlockedURLs, so navigation and waits stop paying for them.
+
+Rules are URL patterns ("*" matches anything) or resource-type names:
+
+    image, font, media, stylesheet, analytics
+
+Resource types are expanded to URL patterns (file extensions, known
+analytics hosts) because setBlockedURLs filters by URL only. Tests declare
+rules with a marker, on top of the "block" rules of the selected Chrome
+profile (see harness.profiles):
+
+    @pytest.mark.network_filter("image", "font", "*://*.example-cdn.com/*")
+    def test_product_search_and_add_to_cart(...):
+
+Rules follow the test, not the lease: a browser that stays leased across
+tests (a class-scoped fixture) gets each test's rules when that test is
+set up (see set_rules).
+
+Requests that were blocked are counted from the page (elements whose load
+failed on a blocked URL). The failures are kept in a hidden window property
+rather than in the page's storage, so the application's state and session
+snapshots are not touched; they are read when the rules are lifted, so
+only the document the browser is on then counts, requests made from
+fetch()/XHR are not included and the count is a lower bound. Bytes saved
+are estimated from the stub server archive when one is active.
+"""
+import re
+import threading
+
+from selenium.common.exceptions import WebDriverException
+
+from harness import stubserver
+
+_IMAGE_EXTENSIONS = ("png", "jpg", "jpeg", "gif", "webp", "avif", "svg", "ico", "bmp")
+_FONT_EXTENSIONS = ("woff", "woff2", "ttf", "otf", "eot")
+_MEDIA_EXTENSIONS = ("mp4", "webm", "ogg", "mp3", "wav", "m4a")
+_ANALYTICS_HOSTS = (
+    "google-analytics.com", "googletagmanager.com", "doubleclick.net", "facebook.net",
+    "hotjar.com", "segment.com", "segment.io", "nr-data.net", "newrelic.com", "clarity.ms",
+)
+
+
+def _extension_patterns(extensions):
+    patterns = []
+    for extension in extensions:
+        patterns += [f"*.{extension}", f"*.{extension}?*"]
+    return tuple(patterns)
+
+
+RESOURCE_TYPES = {
+    "image": _extension_patterns(_IMAGE_EXTENSIONS),
+    "font": _extension_patterns(_FONT_EXTENSIONS),
+    "media": _extension_patterns(_MEDIA_EXTENSIONS),
+    "stylesheet": _extension_patterns(("css",)),
+    "analytics": tuple(f"*{host}/*" for host in _ANALYTICS_HOSTS),
+}
+
+# Remembers the URL of every element whose load failed in this document, so
+# blocked requests can be counted after the test. The list lives in a
+# non-enumerable window property: no storage the application (or a session
+# snapshot) could see is written.
+_RECORD_FAILURES_SCRIPT = """
+(function () {
+  if (window.__harnessFailedLoads) { return; }
+  var failed = [];
+  Object.defineProperty(window, '__harnessFailedLoads', {value: failed, configurable: true});
+  window.addEventListener('error', function (event) {
+    var el = event.target;
+    if (!el || el === window) { return; }
+    var url = el.currentSrc || el.src || el.href;
+    if (!url) { return; }
+    failed.push(url);
+    if (failed.length > 1000) { failed.shift(); }
+  }, true);
+})();
+"""
+
+# Takes the failures seen so far, so a browser kept for the next test starts empty
+_READ_FAILURES_SCRIPT = """
+var failed = window.__harnessFailedLoads;
+return failed ? failed.splice(0, failed.length) : [];
+"""
+
+
+def expand(rules):
+    """
+    Turn rules into URL patterns.
+
+    Args:
+        rules: Resource-type names and/or URL patterns
+
+    Returns:
+        list: Unique URL patterns in rule order.
+    """
+    patterns = []
+    for rule in rules:
+        for pattern in RESOURCE_TYPES.get(rule, (rule,)):
+            if pattern not in patterns:
+                patterns.append(pattern)
+    return patterns
+
+
+def matches(url, patterns):
+    """Return True if url matches one of the setBlockedURLs-style patterns."""
+    # Only "*" is a wildcard; "?" and "[" are literal, unlike fnmatch
+    return any(re.fullmatch(".*".join(map(re.escape, pattern.split("*"))), url) for pattern in patterns)
+
+
+class NetworkFilter:
+    """
+    Applies blocking rules to leased browsers and collects what was blocked.
+
+    Register it on a DriverPool (install()) and set the rules for each test
+    with set_rules(); browsers leased while no rules are set are untouched.
+    """
+
+    def __init__(self):
+        self.rules = ()
+        self.patterns = []
+        self.stats = {"tests": 0, "requests": 0, "bytes": 0}
+        self.current = None
+        self._scripts = {}
+        self._leased = {}
+        self._lock = threading.Lock()
+
+    def set_rules(self, rules):
+        """
+        Set the rules of the next test.
+
+        Browsers that are still leased (by a class- or module-scoped
+        fixture) have the previous test's rules lifted and counted, and get
+        the new ones; browsers leased later get them on acquire.
+
+        Args:
+            rules: Resource types and URL patterns (empty to disable)
+        """
+        with self._lock:
+            leased = list(self._leased.values())
+        for driver in leased:
+            self._lift(driver)
+        self.rules = tuple(rules)
+        self.patterns = expand(self.rules)
+        self.current = {"rules": list(self.rules), "requests": 0, "bytes": 0, "urls": []}
+        for driver in leased:
+            self._block(driver)
+
+    def install(self, pool):
+        pool.on_acquire.append(self.apply)
+        pool.on_release.append(self.collect)
+
+    def apply(self, driver):
+        """Block the current patterns in driver (acquire hook)."""
+        with self._lock:
+            self._leased[id(driver)] = driver
+        self._block(driver)
+
+    def _block(self, driver):
+        if not self.patterns:
+            return
+        try:
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": self.patterns})
+            script = driver.execute_cdp_cmd(
+                "Page.addScriptToEvaluateOnNewDocument", {"source": _RECORD_FAILURES_SCRIPT}
+            )
+            # The page already loaded (a browser kept between tests) records too
+            driver.execute_script(_RECORD_FAILURES_SCRIPT)
+        except (AttributeError, WebDriverException):
+            # Not a Chromium driver: run unfiltered rather than fail the test
+            return
+        with self._lock:
+            self._scripts[id(driver)] = script.get("identifier")
+
+    def collect(self, driver):
+        """Count blocked requests and lift the rules (release hook)."""
+        with self._lock:
+            self._leased.pop(id(driver), None)
+        self._lift(driver)
+
+    def _lift(self, driver):
+        with self._lock:
+            identifier = self._scripts.pop(id(driver), None)
+        if identifier is None:
+            return
+        try:
+            failed = driver.execute_script(_READ_FAILURES_SCRIPT) or []
+        except WebDriverException:
+            failed = []
+        blocked = [url for url in failed if matches(url, self.patterns)]
+        self._account(blocked)
+        try:
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": []})
+            driver.execute_cdp_cmd("Page.removeScriptToEvaluateOnNewDocument", {"identifier": identifier})
+        except WebDriverException:
+            pass
+
+    def _account(self, urls):
+        stub = stubserver.active_server()
+        size = 0
+        for url in urls:
+            recorded = stub.archive.size_of(stubserver.upstream_url(url)) if stub is not None else None
+            size += recorded or 0
+        with self._lock:
+            self.stats["tests"] += 1
+            self.stats["requests"] += len(urls)
+            self.stats["bytes"] += size
+            if self.current is not None:
+                self.current["requests"] += len(urls)
+                self.current["bytes"] += size
+                self.current["urls"] += urls
+
+
+def marker_rules(item):
+    """
+    Collect the rules of every network_filter marker on a test item.
+
+    Args:
+        item: pytest Item
+
+    Returns:
+        list: Rules in marker order (closest marker last).
+    """
+    rules = []
+    for marker in reversed(list(item.iter_markers("network_filter"))):
+        rules.extend(marker.args)
+    return rules
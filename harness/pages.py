@@ -0,0 +1,187 @@
+"""
+Page objects with lazily resolved, cached elements.
+
+Elements are declared once on a Page subclass and looked up on first use:
+
+    class LoginPage(Page):
+        username = Element(By.ID, "username")
+        submit = Element(By.XPATH, "//button[contains(text(), 'Login')]", until=CLICKABLE)
+
+    page = LoginPage(driver).open("https://acdc-app.example.com")
+    page.username.send_keys("user")    # waits and resolves the element
+    page.username.get_attribute("value")  # reuses it, no find_element
+
+The resolved WebElement is cached per page until it is invalidated:
+open() clears the cache, and so does any DOM mutation. A MutationObserver
+installed in the page counts mutations, and every resolution reads that
+count (one small script instead of a wait): if the DOM changed since the
+cached elements were found, they may have been hidden, disabled or
+outmatched by another node, so they are looked up again. A reference that
+went stale anyway raises StaleElementReferenceException, on which the
+element is re-resolved and the call retried once. Retrying is safe because
+the browser rejects a stale reference before acting on it.
+"""
+import functools
+
+from selenium.common.exceptions import StaleElementReferenceException
+from selenium.webdriver.remote.webelement import WebElement
+
+from harness import waits as EC
+from harness.waits import PushWait
+
+PRESENT = "present"
+VISIBLE = "visible"
+CLICKABLE = "clickable"
+
+# Ordered from weakest to strongest; a cached element satisfies weaker conditions
+_CONDITIONS = {
+    PRESENT: EC.presence_of_element_located,
+    VISIBLE: EC.visibility_of_element_located,
+    CLICKABLE: EC.element_to_be_clickable,
+}
+_STRENGTH = {name: rank for rank, name in enumerate(_CONDITIONS)}
+
+# Returns "<document id>:<mutation count>"; a new document gets a new id, so
+# navigation changes the value as well
+_GENERATION_SCRIPT = """
+var state = window.__harnessDomGeneration;
+if (!state) {
+  state = {id: Date.now().toString(36) + Math.random().toString(36).slice(2), count: 0};
+  Object.defineProperty(window, '__harnessDomGeneration', {value: state});
+  new MutationObserver(function () { state.count++; }).observe(document, {
+    childList: true, subtree: true, attributes: true, characterData: true
+  });
+}
+return state.id + ':' + state.count;
+"""
+
+
+class Element:
+    """Declares an element on a Page subclass."""
+
+    def __init__(self, by, value, until=VISIBLE):
+        """
+        Args:
+            by: Locator strategy (By.ID, By.XPATH, ...)
+            value: Locator value
+            until: Condition to wait for on first resolution: PRESENT, VISIBLE or CLICKABLE
+        """
+        self.locator = (by, value)
+        self.until = until
+
+    def __get__(self, page, owner=None):
+        if page is None:
+            return self
+        return page.element(self.locator, self.until)
+
+
+class LazyElement:
+    """
+    Stand-in for a WebElement that resolves through its page's cache.
+
+    Attribute access and method calls are forwarded to the real element.
+    Use resolve() where an actual WebElement is required, e.g. as a script
+    argument.
+    """
+
+    def __init__(self, page, locator, until):
+        self._page = page
+        self._locator = locator
+        self._until = until
+
+    def resolve(self, refresh=False):
+        """Return the underlying WebElement, looking it up if needed."""
+        return self._page._resolve(self._locator, self._until, refresh)
+
+    def _call(self, name, *args, **kwargs):
+        try:
+            return getattr(self.resolve(), name)(*args, **kwargs)
+        except StaleElementReferenceException:
+            return getattr(self.resolve(refresh=True), name)(*args, **kwargs)
+
+    def __getattr__(self, name):
+        if callable(getattr(WebElement, name, None)):
+            return functools.partial(self._call, name)
+        # Properties such as text or tag_name are read from the browser each time
+        try:
+            return getattr(self.resolve(), name)
+        except StaleElementReferenceException:
+            return getattr(self.resolve(refresh=True), name)
+
+    def __repr__(self):
+        return f"LazyElement({self._locator!r})"
+
+
+class Page:
+    """
+    Base class for page objects.
+
+    Attributes:
+        url: Default address for open()
+        stats: Counts of lookups, cache hits, stale re-resolutions and
+            caches dropped because the DOM mutated
+    """
+
+    url = None
+
+    def __init__(self, driver, timeout=10, wait=None):
+        """
+        Args:
+            driver: WebDriver instance
+            timeout: Seconds to wait for an element on resolution
+            wait: Object with until(condition), defaults to PushWait(driver, timeout)
+        """
+        self.driver = driver
+        self.wait = wait or PushWait(driver, timeout)
+        self.stats = {"lookups": 0, "hits": 0, "refreshed": 0, "mutated": 0}
+        self._cache = {}
+        self._generation = None
+
+    def open(self, url=None):
+        """
+        Navigate to url (or the class url) and drop cached elements.
+
+        Returns:
+            Page: self, for chaining.
+        """
+        self.invalidate()
+        self.driver.get(url or self.url)
+        return self
+
+    def invalidate(self):
+        """Forget every cached element, e.g. after an action that navigates."""
+        self._cache.clear()
+
+    def element(self, locator, until=VISIBLE):
+        """
+        Return a lazily resolved element for a locator that is not declared
+        on the class, such as one built from test data.
+
+        Args:
+            locator: (By.X, value) tuple
+            until: PRESENT, VISIBLE or CLICKABLE
+
+        Returns:
+            LazyElement: Cached by locator like declared elements.
+        """
+        return LazyElement(self, tuple(locator), until)
+
+    def _resolve(self, locator, until, refresh=False):
+        # Read before any lookup: a mutation during the lookup then only
+        # causes one more lookup next time, never a wrong hit
+        generation = self.driver.execute_script(_GENERATION_SCRIPT)
+        if generation != self._generation:
+            if self._cache:
+                self.stats["mutated"] += 1
+            self._cache.clear()
+            self._generation = generation
+        cached = self._cache.get(locator)
+        if not refresh and cached is not None and _STRENGTH[cached[1]] >= _STRENGTH[until]:
+            self.stats["hits"] += 1
+            return cached[0]
+        if refresh:
+            self.stats["refreshed"] += 1
+        element = self.wait.until(_CONDITIONS[until](locator))
+        self.stats["lookups"] += 1
+        self._cache[locator] = (element, until)
+        return element
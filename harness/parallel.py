@@ -0,0 +1,233 @@
+"""
+Parallel test runner with duration-aware sharding.
+
+Usage:
+    python -m harness.parallel -n 16 [pytest args...]
+
+The runner collects the suite once, groups tests that share expensive
+setup (by default every test in the same class), and assigns the groups
+to N workers longest-first using durations from earlier runs. Each worker
+is a separate pytest process with its own browser pool. A group longer
+than a worker's fair share is split back into single tests so no worker
+is left running long after the others have finished.
+
+With --shared-browser the workers share one Chrome: each test gets its own
+browser context in it (see harness.contexts) instead of a whole browser.
+"""
+import argparse
+import heapq
+import os
+import subprocess
+import sys
+import time
+
+from harness.artifact_store import new_run_id
+from harness.config import cache_dir
+from harness.durations import DurationStore
+
+GROUP_BY_CHOICES = ("class", "module", "none")
+
+
+def collect(pytest_args):
+    """
+    Collect node ids without running anything.
+
+    Args:
+        pytest_args: Extra arguments forwarded to pytest
+
+    Returns:
+        list: Test node ids in collection order.
+    """
+    out_file = os.path.join(cache_dir("workers"), "collected.txt")
+    env = dict(os.environ, HARNESS_COLLECT_OUT=out_file)
+    result = subprocess.run(
+        [sys.executable, "-m", "pytest", "--collect-only", *pytest_args],
+        capture_output=True, text=True, env=env,
+    )
+    if result.returncode not in (0, 5):
+        sys.stderr.write(result.stdout + result.stderr)
+        raise SystemExit(result.returncode)
+    with open(out_file) as f:
+        return [line for line in f.read().splitlines() if line]
+
+
+def group_key(nodeid, group_by):
+    """
+    Return the key of the setup group a test belongs to.
+
+    Args:
+        nodeid: Test node id such as "pysel55e.py::ACDCDeviceManagementTests::test_tc001"
+        group_by: "class", "module" or "none"
+
+    Returns:
+        str: Tests with equal keys run on the same worker.
+    """
+    path, _, rest = nodeid.partition("::")
+    if group_by == "none":
+        return nodeid
+    if group_by == "module":
+        return path
+    # Parametrised ids ("test_x[a::b]") must not be split on their brackets
+    parts = rest.split("[", 1)[0].split("::")
+    if len(parts) > 1:
+        return f"{path}::{'::'.join(parts[:-1])}"
+    return nodeid
+
+
+def plan(nodeids, durations, workers, group_by="class"):
+    """
+    Assign tests to workers using longest-processing-time-first scheduling.
+
+    Args:
+        nodeids: Test node ids in collection order
+        durations: dict of node id -> expected seconds
+        workers: Number of workers
+        group_by: How to keep tests with shared setup together
+
+    Returns:
+        list: One list of node ids per worker, each kept in collection order.
+    """
+    groups = {}
+    for nodeid in nodeids:
+        groups.setdefault(group_key(nodeid, group_by), []).append(nodeid)
+
+    total = sum(durations[nodeid] for nodeid in nodeids)
+    fair_share = total / max(workers, 1)
+
+    units = []
+    for members in groups.values():
+        cost = sum(durations[nodeid] for nodeid in members)
+        if cost > fair_share and len(members) > 1:
+            # Keeping this group together would make it the straggler
+            units.extend(([nodeid], durations[nodeid]) for nodeid in members)
+        else:
+            units.append((members, cost))
+    units.sort(key=lambda unit: unit[1], reverse=True)
+
+    heap = [(0.0, index) for index in range(workers)]
+    assignment = [[] for _ in range(workers)]
+    for members, cost in units:
+        load, index = heapq.heappop(heap)
+        assignment[index].extend(members)
+        heapq.heappush(heap, (load + cost, index))
+
+    order = {nodeid: position for position, nodeid in enumerate(nodeids)}
+    return [sorted(shard, key=order.get) for shard in assignment]
+
+
+def combine_exit_codes(codes):
+    """
+    Merge worker exit codes into the exit code of the whole run.
+
+    A worker that collected nothing (5, e.g. after ID filtering) only
+    counts when every worker did; otherwise the worst other code wins.
+
+    Args:
+        codes: pytest exit codes of the workers
+
+    Returns:
+        int: Exit code for the run.
+    """
+    codes = list(codes)
+    ran = [code for code in codes if code != 5]
+    if not ran:
+        return 5 if codes else 0
+    return max(ran)
+
+
+def run_workers(shards, pytest_args, extra_env=None):
+    """
+    Start one pytest process per non-empty shard and wait for all of them.
+
+    Args:
+        shards: Lists of node ids, one per worker
+        pytest_args: Extra arguments forwarded to every worker
+        extra_env: Environment variables added for every worker
+
+    Returns:
+        int: The combined worker exit code (see combine_exit_codes).
+    """
+    log_dir = cache_dir("workers")
+    # One run id, so the artifacts of all workers are listed together
+    run_id = os.getenv("HARNESS_RUN_ID") or new_run_id()
+    processes = []
+    for index, shard in enumerate(shards):
+        if not shard:
+            continue
+        worker_id = f"gw{index}"
+        # Workers collect with the same arguments and keep only their shard
+        shard_file = os.path.join(log_dir, f"{worker_id}.shard")
+        with open(shard_file, "w") as f:
+            f.write("\n".join(shard))
+        log = open(os.path.join(log_dir, f"{worker_id}.log"), "w")
+        env = dict(os.environ, **(extra_env or {}), HARNESS_WORKER=worker_id, HARNESS_SHARD_FILE=shard_file)
+        env.setdefault("HARNESS_POOL_SIZE", "1")
+        env.setdefault("HARNESS_RUN_ID", run_id)
+        process = subprocess.Popen(
+            [sys.executable, "-m", "pytest", *pytest_args],
+            stdout=log, stderr=subprocess.STDOUT, env=env,
+        )
+        processes.append((worker_id, process, log, time.perf_counter()))
+
+    codes = []
+    for worker_id, process, log, started in processes:
+        code = process.wait()
+        log.close()
+        print(f"[{worker_id}] exit {code} after {time.perf_counter() - started:.1f}s "
+              f"(log: {log.name})")
+        with open(log.name) as f:
+            output = f.read().rstrip().splitlines()
+        # Full output for failing workers, just the summary line otherwise
+        for line in output if code not in (0, 5) else output[-1:]:
+            print(f"[{worker_id}] {line}")
+        codes.append(code)
+    return combine_exit_codes(codes)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Run the suite on N parallel pytest workers.",
+        usage="python -m harness.parallel [-n N] [--group-by MODE] [--shared-browser] [--dry-run] "
+              "[pytest args...]",
+    )
+    parser.add_argument("-n", "--workers", default="auto",
+                        help="number of workers, or 'auto' for one per CPU")
+    parser.add_argument("--group-by", choices=GROUP_BY_CHOICES, default="class",
+                        help="keep tests sharing setup on one worker (default: class)")
+    parser.add_argument("--shared-browser", action="store_true",
+                        help="run every test in its own context of one shared Chrome")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="print the schedule without running it")
+    options, pytest_args = parser.parse_known_args(argv)
+
+    if options.workers == "auto":
+        workers = os.cpu_count() or 1
+    else:
+        workers = int(options.workers)
+    nodeids = collect(pytest_args)
+    if not nodeids:
+        print("No tests collected.")
+        return 5
+
+    durations = DurationStore().estimate(nodeids)
+    shards = plan(nodeids, durations, workers, options.group_by)
+    for index, shard in enumerate(shards):
+        expected = sum(durations[nodeid] for nodeid in shard)
+        print(f"[gw{index}] {len(shard)} tests, ~{expected:.1f}s expected")
+    if options.dry_run:
+        return 0
+    if not options.shared_browser:
+        return run_workers(shards, pytest_args)
+
+    from harness.contexts import SharedBrowser
+
+    shared = SharedBrowser(cache_dir("shared-browser"))
+    shared.start()
+    try:
+        return run_workers(shards, pytest_args, shared.environment())
+    finally:
+        shared.stop()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
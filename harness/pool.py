@@ -0,0 +1,377 @@
+"""
+Warm Chrome pool shared by the test fixtures.
+
+Launching Chrome is the most expensive thing a test does, so the pool keeps
+drivers alive between tests. When a lease ends the browser is reset to a
+blank state, and any browser that fails its health check is quit and
+replaced on the next lease.
+"""
+import atexit
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from selenium import webdriver
+from selenium.common.exceptions import NoAlertPresentException, WebDriverException
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.common.timeouts import Timeouts
+
+from harness.driver_binary import chromedriver_path
+from harness.profiles import chrome_options
+from harness.userdata import profile_templates
+
+logger = logging.getLogger(__name__)
+
+# W3C defaults, restored on every return so no test inherits another's waits
+DEFAULT_TIMEOUTS = Timeouts(implicit_wait=0, page_load=300, script=30)
+
+CLEAR_STORAGE_SCRIPT = """
+try { window.localStorage.clear(); } catch (e) {}
+try { window.sessionStorage.clear(); } catch (e) {}
+"""
+
+
+class PoolExhaustedError(RuntimeError):
+    """Raised when no browser becomes free before the lease timeout."""
+
+
+def default_chrome_options():
+    """
+    Build the Chrome options used for pooled browsers.
+
+    Returns:
+        Options: Options of the profile selected by HARNESS_PROFILE (see harness.profiles).
+    """
+    return chrome_options()
+
+
+def _start_chrome(options):
+    service = Service(chromedriver_path())
+    return webdriver.Chrome(service=service, options=options)
+
+
+def create_chrome_driver(options=None):
+    """
+    Launch a new Chrome WebDriver.
+
+    The browser runs on its own clone of a pre-initialized profile (see
+    harness.userdata) unless the options name a --user-data-dir.
+
+    Args:
+        options: Chrome options, defaults to default_chrome_options()
+
+    Returns:
+        WebDriver: A freshly started Chrome instance.
+    """
+    return profile_templates().launch(options or default_chrome_options(), _start_chrome)
+
+
+def reset_driver(driver):
+    """
+    Return a browser to a clean state between tests.
+
+    Dismisses open alerts, closes extra windows, clears cookies and
+    local/session storage, restores default timeouts and leaves the
+    browser on about:blank.
+
+    Args:
+        driver: WebDriver instance to reset
+    """
+    # An open alert blocks every other command, so it has to go first
+    try:
+        driver.switch_to.alert.dismiss()
+    except NoAlertPresentException:
+        pass
+
+    # Close every window except the first one
+    handles = driver.window_handles
+    for handle in handles[1:]:
+        driver.switch_to.window(handle)
+        driver.close()
+    driver.switch_to.window(handles[0])
+
+    # Storage is per origin, so clear it before leaving the current page
+    driver.execute_script(CLEAR_STORAGE_SCRIPT)
+
+    # CDP clears cookies for every domain, delete_all_cookies only the current one
+    try:
+        driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+    except (AttributeError, WebDriverException):
+        driver.delete_all_cookies()
+
+    driver.timeouts = DEFAULT_TIMEOUTS
+    driver.get("about:blank")
+
+
+def is_healthy(driver):
+    """
+    Check that a browser still answers commands.
+
+    Args:
+        driver: WebDriver instance to probe
+
+    Returns:
+        bool: True if the browser responded to a trivial script.
+    """
+    try:
+        return driver.execute_script("return document.readyState") is not None
+    except Exception:
+        return False
+
+
+class DriverPool:
+    """
+    Thread-safe pool of warm WebDriver instances.
+
+    Browsers are created lazily up to max_size. A returned browser is reset
+    and health-checked; if either step fails it is quit and discarded so
+    the next lease gets a fresh one.
+    """
+
+    def __init__(self, factory=create_chrome_driver, max_size=2, max_uses=None,
+                 lease_timeout=300):
+        """
+        Args:
+            factory: Callable returning a new WebDriver
+            max_size: Maximum number of live browsers
+            max_uses: Recycle a browser after this many leases (None for no limit)
+            lease_timeout: Seconds to wait for a free browser before giving up
+        """
+        self.factory = factory
+        self.max_size = max_size
+        self.max_uses = max_uses
+        self.lease_timeout = lease_timeout
+        self._idle = []
+        self._uses = {}
+        self._live = 0
+        self._spawning = 0
+        # ids of browsers launched by spawn() that were never leased
+        self._spawned = set()
+        self._closed = False
+        self._cond = threading.Condition()
+        self.stats = {"created": 0, "reused": 0, "recycled": 0}
+        # Prespawning (see harness.prespawn): leases served by a spawned
+        # browser, leases that had to launch one, spawned browsers that were
+        # never leased, seconds leases waited for a spawn in progress, and
+        # total launch time for the average start cost
+        self.spawn_stats = {"spawned": 0, "hits": 0, "misses": 0, "wasted": 0,
+                            "wait_seconds": 0.0, "launches": 0, "launch_seconds": 0.0}
+        # Callables(driver) run when a browser is leased out / before it is reset
+        self.on_acquire = []
+        self.on_release = []
+
+    def _hand_out(self, driver):
+        try:
+            for hook in self.on_acquire:
+                hook(driver)
+        except Exception:
+            self.release(driver, discard=True)
+            raise
+        return driver
+
+    def acquire(self):
+        """
+        Lease a browser, launching one only if none is idle.
+
+        Returns:
+            WebDriver: A browser in a clean state.
+        """
+        started = time.perf_counter()
+        with self._cond:
+            # A browser that is already starting arrives sooner than a new one
+            if not self._cond.wait_for(
+                lambda: self._closed or self._idle or (self._live < self.max_size and not self._spawning),
+                timeout=self.lease_timeout,
+            ):
+                raise PoolExhaustedError(
+                    f"No browser became free within {self.lease_timeout}s "
+                    f"(max_size={self.max_size})"
+                )
+            if self._closed:
+                raise RuntimeError("DriverPool is closed")
+            if self._idle:
+                driver = self._idle.pop()
+                self._uses[id(driver)] += 1
+                if id(driver) in self._spawned:
+                    self._spawned.discard(id(driver))
+                    self.spawn_stats["hits"] += 1
+                    self.spawn_stats["wait_seconds"] += time.perf_counter() - started
+                else:
+                    self.stats["reused"] += 1
+            else:
+                driver = None
+                # Reserve the slot before launching so other threads don't overshoot
+                self._live += 1
+                self.spawn_stats["misses"] += 1
+        if driver is not None:
+            return self._hand_out(driver)
+
+        driver = self._launch()
+        with self._cond:
+            self._uses[id(driver)] = 1
+        return self._hand_out(driver)
+
+    def _launch(self):
+        # The caller has reserved a slot in _live
+        started = time.perf_counter()
+        try:
+            driver = self.factory()
+        except Exception:
+            with self._cond:
+                self._live -= 1
+                self._cond.notify_all()
+            raise
+        with self._cond:
+            self.stats["created"] += 1
+            self.spawn_stats["launches"] += 1
+            self.spawn_stats["launch_seconds"] += time.perf_counter() - started
+        return driver
+
+    def spawn(self):
+        """
+        Launch a browser into the idle list ahead of demand.
+
+        Leases arriving while it starts wait for it instead of launching
+        their own.
+
+        Returns:
+            bool: False if the pool is full or closed, True once the browser is idle.
+        """
+        with self._cond:
+            if self._closed or self._live >= self.max_size:
+                return False
+            self._live += 1
+            self._spawning += 1
+        try:
+            driver = self._launch()
+        except Exception:
+            with self._cond:
+                self._spawning -= 1
+                self._cond.notify_all()
+            raise
+        # The browser must be idle by the time waiting leases see the spawn
+        # end, or one of them finds nothing idle and launches its own
+        with self._cond:
+            self._spawning -= 1
+            self._cond.notify_all()
+            if not self._closed:
+                self._uses[id(driver)] = 0
+                self._spawned.add(id(driver))
+                self._idle.append(driver)
+                self.spawn_stats["spawned"] += 1
+                return True
+            self._live -= 1
+        self._quit(driver)
+        return False
+
+    def capacity(self):
+        """
+        Describe the browsers the pool has or is starting.
+
+        Returns:
+            dict: "idle", "starting" and "live" counts, and "leases_left":
+                further leases each idle, leased or starting browser can
+                serve before it is recycled (None for no limit).
+        """
+        with self._cond:
+            if self.max_uses is None:
+                left = [None] * (len(self._uses) + self._spawning)
+            else:
+                left = [self.max_uses - uses for uses in self._uses.values()]
+                left += [self.max_uses] * self._spawning
+            return {"idle": len(self._idle), "starting": self._spawning, "live": self._live,
+                    "leases_left": left}
+
+    def release(self, driver, discard=False):
+        """
+        Return a leased browser to the pool.
+
+        Args:
+            driver: WebDriver previously returned by acquire()
+            discard: Quit the browser instead of reusing it
+        """
+        for hook in self.on_release:
+            try:
+                hook(driver)
+            except Exception as e:
+                logger.warning("Release hook %r failed: %s", hook, e)
+
+        keep = not discard and not self._closed
+        if keep and self.max_uses is not None and self._uses.get(id(driver), 0) >= self.max_uses:
+            keep = False
+        if keep:
+            try:
+                reset_driver(driver)
+                keep = is_healthy(driver)
+            except Exception as e:
+                logger.warning("Browser reset failed, recycling it: %s", e)
+                keep = False
+
+        if not keep:
+            self._quit(driver)
+
+        with self._cond:
+            if keep and not self._closed:
+                self._idle.append(driver)
+            else:
+                self._live -= 1
+                self._uses.pop(id(driver), None)
+                if not discard:
+                    self.stats["recycled"] += 1
+            self._cond.notify()
+
+    @contextmanager
+    def lease(self):
+        """
+        Context manager that acquires a browser and always returns it.
+
+        Yields:
+            WebDriver: A browser in a clean state.
+        """
+        driver = self.acquire()
+        try:
+            yield driver
+        finally:
+            self.release(driver)
+
+    def close(self):
+        """Quit every idle browser; leased ones are quit when released."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._live -= len(idle)
+            self.spawn_stats["wasted"] += len(self._spawned)
+            self._spawned.clear()
+            self._cond.notify_all()
+        for driver in idle:
+            self._quit(driver)
+
+    @staticmethod
+    def _quit(driver):
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.debug("Ignoring error while quitting browser: %s", e)
+
+
+_default_pool = None
+_default_pool_lock = threading.Lock()
+
+
+def default_pool():
+    """
+    Return the process-wide pool shared by fixtures and helper scripts.
+
+    The size can be tuned with the HARNESS_POOL_SIZE environment variable.
+
+    Returns:
+        DriverPool: The shared pool, created on first use.
+    """
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None or _default_pool._closed:
+            _default_pool = DriverPool(max_size=int(os.getenv("HARNESS_POOL_SIZE", "2")))
+            atexit.register(_default_pool.close)
+        return _default_pool
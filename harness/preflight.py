@@ -0,0 +1,369 @@
+"""
+Static pre-flight checks for generated test modules.
+
+Generated modules can be broken in ways that only show up after Chrome has
+started, or never: a truncated file aborts collection for the whole run,
+and a class without the "Test" prefix is silently skipped. This module
+reads the source and AST of each file (no import, no browser) and
+reports:
+
+    syntax              the file does not parse
+    not-collected       tests pytest will never collect (class prefix, __init__)
+    no-tests            nothing in the file is a test
+    unknown-fixture     a test argument no fixture provides (a warning when
+                        run by hand, which cannot see plugin fixtures)
+    bad-locator         empty, unbalanced or otherwise malformed locators
+    uncalled-condition  wait.until(EC.visibility_of_element_located) without a locator
+    locator-not-tuple   EC.presence_of_element_located(By.ID, "x") instead of ((By.ID, "x"))
+    fixed-sleep         time.sleep() in a test module (warning)
+    compounded-waits    implicit wait combined with WebDriverWait (warning)
+
+Files with errors are excluded from collection by the root conftest and
+listed in the terminal summary and .harness/preflight-report.json. Run it
+by hand with
+
+    python -m harness.preflight pysel*.py
+"""
+import ast
+import os
+import re
+import sys
+
+from selenium.webdriver.common.by import By
+
+from harness.locator_audit import extract_locators
+
+ERROR = "error"
+WARNING = "warning"
+
+# Modules the preflight stage guards during collection
+GENERATED_PATTERN = re.compile(r"^pysel\w*\.py$")
+
+BUILTIN_FIXTURES = {
+    "cache", "capfd", "capfdbinary", "caplog", "capsys", "capsysbinary", "doctest_namespace",
+    "monkeypatch", "pytestconfig", "pytester", "record_property", "record_testsuite_property",
+    "record_xml_attribute", "recwarn", "request", "testdir", "tmp_path", "tmp_path_factory",
+    "tmpdir", "tmpdir_factory",
+}
+
+# harness.waits / expected_conditions factories that take one locator tuple
+_LOCATOR_CONDITIONS = {
+    "presence_of_element_located", "visibility_of_element_located", "element_to_be_clickable",
+    "presence_of_all_elements_located", "visibility_of_all_elements_located",
+    "invisibility_of_element_located", "text_to_be_present_in_element",
+    "element_located_to_be_selected", "frame_to_be_available_and_switch_to_it",
+}
+_CONDITIONS = _LOCATOR_CONDITIONS | {"alert_is_present", "document_ready", "title_is", "title_contains"}
+# PushWait resolves DOM conditions in the page without find_element, so only
+# WebDriverWait polls through the implicit wait
+_COMPOUNDING_WAITS = {"WebDriverWait"}
+_PLACEHOLDER_RE = re.compile(r"\{[^{}]*\}")
+
+
+class Issue:
+    """One problem found in a file."""
+
+    def __init__(self, path, line, code, message, severity=ERROR):
+        self.path = path
+        self.line = line
+        self.code = code
+        self.message = message
+        self.severity = severity
+
+    def as_dict(self):
+        return {"path": self.path, "line": self.line, "code": self.code,
+                "message": self.message, "severity": self.severity}
+
+    def __str__(self):
+        return f"{self.path}:{self.line}: {self.severity} [{self.code}] {self.message}"
+
+
+def _balanced(value, pairs, escapes):
+    # Brackets inside quoted strings do not count; quotes must be closed too
+    stack, quote, escaped = [], None, False
+    closing = {close: open_ for open_, close in pairs}
+    for char in value:
+        if escaped:
+            escaped = False
+        elif escapes and char == "\\":
+            escaped = True
+        elif quote:
+            if char == quote:
+                quote = None
+        elif char in "'\"":
+            quote = char
+        elif char in dict(pairs):
+            stack.append(char)
+        elif char in closing:
+            if not stack or stack.pop() != closing[char]:
+                return False
+    return not stack and quote is None
+
+
+def locator_problem(by, value):
+    """
+    Check one locator value.
+
+    Args:
+        by: Selenium By strategy
+        value: Locator string (f-string placeholders already substituted)
+
+    Returns:
+        str or None: What is wrong with it, or None if it looks well formed.
+    """
+    if not value.strip():
+        return "empty locator"
+    if by == By.XPATH:
+        if not _balanced(value, ("()", "[]"), escapes=False):
+            return "unbalanced brackets, parentheses or quotes in XPath"
+        if re.search(r"(^|[^/])/{3,}|[/|]\s*$|\[\s*\]", value):
+            return "XPath has an empty step or predicate"
+    elif by == By.CSS_SELECTOR:
+        if not _balanced(value, ("()", "[]"), escapes=True):
+            return "unbalanced brackets, parentheses or quotes in CSS selector"
+        if re.search(r"[>+~,]\s*$", value):
+            return "CSS selector ends with a combinator"
+    elif by == By.CLASS_NAME and re.search(r"\s", value.strip()):
+        return "By.CLASS_NAME takes a single class; use a CSS selector for compound classes"
+    elif by in (By.ID, By.NAME) and value != value.strip():
+        return f"{by} value has surrounding whitespace"
+    return None
+
+
+def _fixture_name(node):
+    """Return the fixture name a function definition provides, or None."""
+    for decorator in node.decorator_list:
+        target = decorator.func if isinstance(decorator, ast.Call) else decorator
+        if isinstance(target, ast.Attribute) and target.attr == "fixture" or (
+            isinstance(target, ast.Name) and target.id == "fixture"
+        ):
+            if isinstance(decorator, ast.Call):
+                for keyword in decorator.keywords:
+                    if keyword.arg == "name" and isinstance(keyword.value, ast.Constant):
+                        return keyword.value.value
+            return node.name
+    return None
+
+
+def _fixtures_in(tree):
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            name = _fixture_name(node)
+            if name:
+                names.add(name)
+    return names
+
+
+def conftest_fixtures(path, root=None):
+    """
+    Collect fixture names from the conftest.py files that apply to path.
+
+    Args:
+        path: Test module
+        root: Highest directory to search (defaults to the current directory)
+    """
+    root = os.path.abspath(root or os.getcwd())
+    directory = os.path.dirname(os.path.abspath(path))
+    names = set()
+    while True:
+        conftest = os.path.join(directory, "conftest.py")
+        if os.path.exists(conftest):
+            try:
+                with open(conftest) as f:
+                    names |= _fixtures_in(ast.parse(f.read()))
+            except (OSError, SyntaxError):
+                pass
+        if directory == root or os.path.dirname(directory) == directory:
+            return names
+        directory = os.path.dirname(directory)
+
+
+def _imported_names(tree):
+    # Fixtures can be imported into a module (from shared import base_url)
+    names = set()
+    for node in tree.body:
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            names |= {(alias.asname or alias.name).split(".")[0] for alias in node.names}
+    return names
+
+
+def _declares_plugins(tree):
+    return any(
+        isinstance(node, (ast.Assign, ast.AnnAssign))
+        and any(getattr(target, "id", None) == "pytest_plugins"
+                for target in (node.targets if isinstance(node, ast.Assign) else [node.target]))
+        for node in tree.body
+    )
+
+
+def _parametrized(node):
+    names = set()
+    for decorator in node.decorator_list:
+        if (isinstance(decorator, ast.Call) and isinstance(decorator.func, ast.Attribute)
+                and decorator.func.attr == "parametrize" and decorator.args
+                and isinstance(decorator.args[0], ast.Constant)):
+            names |= {name.strip() for name in decorator.args[0].value.split(",")}
+    return names
+
+
+def _test_arguments(node, is_method):
+    args = node.args.posonlyargs + node.args.args
+    if is_method and args:
+        args = args[1:]
+    # Arguments with defaults are not fixtures
+    if node.args.defaults:
+        args = args[:-len(node.args.defaults)]
+    return [arg.arg for arg in args]
+
+
+def _call_name(node):
+    func = node.func
+    if isinstance(func, ast.Attribute):
+        return func.attr
+    if isinstance(func, ast.Name):
+        return func.id
+    return None
+
+
+def _is_by(node):
+    return (isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name)
+            and node.value.id == "By")
+
+
+class _Checker:
+    def __init__(self, path, tree, fixtures, complete=False):
+        self.path = path
+        self.tree = tree
+        self.fixtures = fixtures | BUILTIN_FIXTURES | _fixtures_in(tree) | _imported_names(tree)
+        # Only an error when every fixture the module can see is known
+        self.fixture_severity = ERROR if complete and not _declares_plugins(tree) else WARNING
+        self.issues = []
+
+    def add(self, node, code, message, severity=ERROR):
+        self.issues.append(Issue(self.path, getattr(node, "lineno", 1), code, message, severity))
+
+    def run(self):
+        tests = self.check_collection()
+        if not tests and not self.issues:
+            self.add(self.tree, "no-tests", "no test functions or Test classes", WARNING)
+        for node, is_method, class_fixtures in tests:
+            self.check_fixtures(node, is_method, class_fixtures)
+        self.check_waits()
+        return self.issues
+
+    def check_collection(self):
+        """Return (function, is_method, class fixtures) for every collectable test."""
+        tests = []
+        for node in self.tree.body:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name.startswith("test"):
+                tests.append((node, False, set()))
+            elif isinstance(node, ast.ClassDef):
+                methods = [item for item in node.body if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef))]
+                test_methods = [item for item in methods if item.name.startswith("test")]
+                if not test_methods:
+                    continue
+                if not node.name.startswith("Test"):
+                    self.add(node, "not-collected",
+                             f"class {node.name} has {len(test_methods)} test(s) but pytest only "
+                             "collects classes named Test*")
+                    continue
+                if any(item.name == "__init__" for item in methods):
+                    self.add(node, "not-collected", f"class {node.name} defines __init__, so pytest skips it")
+                    continue
+                class_fixtures = {name for name in map(_fixture_name, methods) if name}
+                tests.extend((item, True, class_fixtures) for item in test_methods)
+        return tests
+
+    def check_fixtures(self, node, is_method, class_fixtures):
+        known = self.fixtures | class_fixtures | _parametrized(node)
+        for name in _test_arguments(node, is_method):
+            if name not in known:
+                self.add(node, "unknown-fixture", f"{node.name}() asks for fixture {name!r}, which nothing provides",
+                         self.fixture_severity)
+
+    def check_waits(self):
+        uses_implicit = explicit_wait = None
+        for node in ast.walk(self.tree):
+            if not isinstance(node, ast.Call):
+                continue
+            name = _call_name(node)
+            if name == "implicitly_wait":
+                uses_implicit = uses_implicit or node
+            elif name in _COMPOUNDING_WAITS:
+                explicit_wait = explicit_wait or node
+            elif name == "sleep" and isinstance(node.func, ast.Attribute) and getattr(node.func.value, "id", None) == "time":
+                self.add(node, "fixed-sleep", "time.sleep() waits the full time; wait for a condition instead", WARNING)
+            elif name in ("until", "until_not") and node.args:
+                condition = node.args[0]
+                if isinstance(condition, (ast.Attribute, ast.Name)) and (
+                    getattr(condition, "attr", None) or getattr(condition, "id", None)
+                ) in _CONDITIONS:
+                    self.add(node, "uncalled-condition", "wait condition is passed without calling it")
+            if name in _LOCATOR_CONDITIONS and len(node.args) >= 2 and _is_by(node.args[0]):
+                self.add(node, "locator-not-tuple", f"{name}() takes one (By, value) tuple, not two arguments")
+        if uses_implicit is not None and explicit_wait is not None:
+            self.add(uses_implicit, "compounded-waits",
+                     "implicit wait is combined with WebDriverWait; a failing explicit wait can "
+                     "take explicit + implicit timeout per poll", WARNING)
+
+
+def check_file(path, fixtures=None, root=None, registered=None):
+    """
+    Run every check on one file.
+
+    Args:
+        path: Python test module
+        fixtures: Fixture names available from conftest files, found
+            automatically when None
+        root: Highest directory searched for conftest files
+        registered: Fixture names pytest has registered (plugins and
+            loaded conftests). Without them unknown fixtures are warnings,
+            since plugin fixtures cannot be seen statically.
+
+    Returns:
+        list: Issue objects, errors and warnings, in line order.
+    """
+    issues = []
+    # Locators are read from the raw text, so they are checked even when the file does not parse
+    for locator in extract_locators(path):
+        value = _PLACEHOLDER_RE.sub("x", locator.value) if locator.dynamic else locator.value
+        problem = locator_problem(locator.by, value)
+        if problem:
+            issues.append(Issue(path, locator.line, "bad-locator", f"{problem}: {locator.value!r}"))
+
+    with open(path) as f:
+        source = f.read()
+    try:
+        tree = ast.parse(source, filename=path)
+    except SyntaxError as e:
+        issues.append(Issue(path, e.lineno or 1, "syntax", e.msg))
+    else:
+        if fixtures is None:
+            fixtures = conftest_fixtures(path, root)
+        issues += _Checker(path, tree, fixtures | set(registered or ()), complete=registered is not None).run()
+    return sorted(issues, key=lambda issue: issue.line)
+
+
+def has_errors(issues):
+    return any(issue.severity == ERROR for issue in issues)
+
+
+def main(argv=None):
+    paths = sys.argv[1:] if argv is None else argv
+    if not paths:
+        print("usage: python -m harness.preflight FILE...")
+        return 2
+    failed = 0
+    for path in paths:
+        issues = check_file(path)
+        for issue in issues:
+            print(issue)
+        if has_errors(issues):
+            failed += 1
+    print(f"{failed} of {len(paths)} files would be excluded")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
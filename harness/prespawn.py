@@ -0,0 +1,226 @@
+"""
+Background browser prespawning.
+
+The pool launches Chrome when a lease finds no idle browser: for the first
+test, after a browser is recycled, and when a class-scoped fixture keeps
+one leased while the next test needs another. The Prespawner hides that
+start-up time by launching browsers into the pool ahead of demand.
+
+How many browsers to launch (K) is planned from the collected test queue
+and the durations in .harness/durations.json. The browser tests that will
+begin within one Chrome start-up time are matched, in order, against the
+leases the pool's browsers can still serve (a browser a test releases
+serves the next one, until max_uses recycles it); every test left without
+a browser needs one launched now. K is capped by the free slots in the
+pool and by free memory, and drops to 0 when the queue is empty.
+
+    HARNESS_PRESPAWN=0            disable it
+    HARNESS_BROWSER_MB=400        memory one browser is assumed to take
+    HARNESS_PRESPAWN_RESERVE_MB   memory always left free (default 1024)
+
+Hits (leases served by a prespawned browser), misses (leases that launched
+Chrome themselves) and prespawned browsers that were never used are
+reported at the end of the run.
+"""
+import logging
+import os
+import threading
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STARTUP_SECONDS = 2.0
+DEFAULT_BROWSER_MB = 400
+DEFAULT_RESERVE_MB = 1024
+# Fixtures that lease from the pool
+BROWSER_FIXTURES = ("browser_pool", "pooled_driver")
+
+
+def available_memory_mb():
+    """
+    Return MemAvailable from /proc/meminfo in MB.
+
+    Returns:
+        float or None: None where it cannot be read (not Linux).
+    """
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def needs_browser(item):
+    """
+    Guess whether a collected test will lease a browser.
+
+    Tests that are skipped unconditionally never do; otherwise a test
+    needs one if it uses a pool fixture or its module uses the default
+    pool directly.
+    """
+    for marker in item.iter_markers():
+        if marker.name == "skip" or (marker.name == "skipif" and marker.args and marker.args[0] is True):
+            return False
+    if any(name in getattr(item, "fixturenames", ()) for name in BROWSER_FIXTURES):
+        return True
+    module = getattr(item, "module", None)
+    return module is not None and hasattr(module, "default_pool")
+
+
+class Prespawner:
+    """
+    Launches browsers into a DriverPool ahead of the tests that will need them.
+    """
+
+    def __init__(self, pool, memory=available_memory_mb, browser_mb=None, reserve_mb=None):
+        """
+        Args:
+            pool: DriverPool to fill
+            memory: Callable returning free memory in MB (or None if unknown)
+            browser_mb: Memory per browser (HARNESS_BROWSER_MB, default 400)
+            reserve_mb: Memory never used for prespawning
+                (HARNESS_PRESPAWN_RESERVE_MB, default 1024)
+        """
+        self.pool = pool
+        self.memory = memory
+        self.browser_mb = browser_mb or float(os.getenv("HARNESS_BROWSER_MB", DEFAULT_BROWSER_MB))
+        self.reserve_mb = reserve_mb if reserve_mb is not None else float(
+            os.getenv("HARNESS_PRESPAWN_RESERVE_MB", DEFAULT_RESERVE_MB)
+        )
+        self.stats = {"memory_limited": 0}
+        self._queue = deque()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def enabled():
+        return os.getenv("HARNESS_PRESPAWN", "1").lower() not in ("0", "false", "no", "off")
+
+    def set_queue(self, tests):
+        """
+        Set the upcoming browser tests.
+
+        Args:
+            tests: (node id, estimated seconds) in run order
+        """
+        with self._lock:
+            self._queue = deque(tests)
+        self._wake.set()
+
+    def test_started(self, nodeid):
+        """Drop nodeid (and anything queued before it) from the queue."""
+        with self._lock:
+            if not any(queued == nodeid for queued, _ in self._queue):
+                return
+            while self._queue and self._queue.popleft()[0] != nodeid:
+                pass
+        self._wake.set()
+
+    def startup_seconds(self):
+        """Average Chrome launch time seen by the pool so far."""
+        stats = self.pool.spawn_stats
+        if stats["launches"]:
+            return stats["launch_seconds"] / stats["launches"]
+        return DEFAULT_STARTUP_SECONDS
+
+    def deficit(self):
+        """
+        Return K, the number of browsers to launch now.
+
+        Tests run one after another in a process, so each upcoming test
+        takes the next browser with leases left, starting with the one the
+        running test holds.
+        """
+        with self._lock:
+            queue = list(self._queue)
+        if not queue:
+            return 0
+        capacity = self.pool.capacity()
+        left = [float("inf") if n is None else n for n in capacity["leases_left"]]
+        fresh = float("inf") if self.pool.max_uses is None else self.pool.max_uses
+        horizon = self.startup_seconds()
+        needed, elapsed = 0, 0.0
+        for _, seconds in queue:
+            if elapsed >= horizon:
+                break
+            for index, remaining in enumerate(left):
+                if remaining > 0:
+                    left[index] -= 1
+                    break
+            else:
+                needed += 1
+                left.append(fresh - 1)
+            elapsed += seconds
+        return min(needed, self.pool.max_size - capacity["live"])
+
+    def _memory_allows(self):
+        free = self.memory()
+        if free is None:
+            return True
+        if free - self.browser_mb < self.reserve_mb:
+            self.stats["memory_limited"] += 1
+            return False
+        return True
+
+    def fill(self):
+        """
+        Launch browsers until the deficit is covered; returns how many were launched.
+
+        Runs on the calling thread; start() runs it in the background.
+        """
+        launched = 0
+        while not self._stopped.is_set() and self.deficit() > 0 and self._memory_allows():
+            try:
+                if not self.pool.spawn():
+                    break
+            except Exception as e:
+                logger.warning("Prespawning a browser failed: %s", e)
+                break
+            launched += 1
+        return launched
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wake.wait(timeout=1.0)
+            self._wake.clear()
+            self.fill()
+
+    def start(self):
+        """Fill the pool from a background thread until stop()."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="harness-prespawn", daemon=True)
+            self._thread.start()
+        self._wake.set()
+
+    def stop(self):
+        """Stop launching; a browser that is starting is still added to the pool."""
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=60)
+            self._thread = None
+
+    def summary(self):
+        """
+        Return hit and miss counts with the hit rate.
+
+        Returns:
+            dict: spawned, hits, misses, wasted, wait_seconds, hit_rate (0-1)
+                and memory_limited.
+        """
+        stats = dict(self.pool.spawn_stats)
+        leases = stats["hits"] + stats["misses"]
+        return {
+            "spawned": stats["spawned"],
+            "hits": stats["hits"],
+            "misses": stats["misses"],
+            "wasted": stats["wasted"],
+            "wait_seconds": stats["wait_seconds"],
+            "hit_rate": stats["hits"] / leases if leases else 0.0,
+            "memory_limited": self.stats["memory_limited"],
+        }
@@ -0,0 +1,122 @@
+"""
+Named Chrome option profiles.
+
+Every browser the harness launches is configured here instead of by hand
+in each test module:
+
+    fast-ci  headless, background services and throttling off, "eager"
+             page loads (return at DOMContentLoaded), analytics blocked;
+             the default
+    debug    headed window and normal page loads, for watching a test locally
+    visual   headless with deterministic rendering (fixed scale factor, no
+             scrollbars, no font hinting) and full page loads, for screenshots
+
+HARNESS_PROFILE selects the profile for pooled browsers. The window size is
+always set at launch, so tests never need set_window_size() or
+maximize_window().
+
+Measure the profiles on the current machine with
+
+    python -m harness.bench --profiles fast-ci debug visual
+
+which runs the start, navigation and workflow benchmarks for each profile
+and saves the table to .harness/bench/profiles.json.
+"""
+import os
+
+from selenium.webdriver.chrome.options import Options
+
+DEFAULT_PROFILE = "fast-ci"
+WINDOW_SIZE = (1920, 1080)
+
+# Needed in containers regardless of profile
+_BASE_ARGUMENTS = ("--no-sandbox", "--disable-dev-shm-usage")
+
+PROFILES = {
+    "fast-ci": {
+        "headless": True,
+        "page_load_strategy": "eager",
+        # Request-blocking rules applied by harness.netfilter
+        "block": ("analytics",),
+        "arguments": (
+            "--disable-background-networking",
+            "--disable-extensions",
+            "--disable-component-update",
+            "--disable-sync",
+            "--disable-default-apps",
+            "--disable-background-timer-throttling",
+            "--disable-backgrounding-occluded-windows",
+            "--disable-renderer-backgrounding",
+            "--disable-features=Translate,OptimizationHints,MediaRouter",
+            "--metrics-recording-only",
+            "--no-first-run",
+            "--mute-audio",
+        ),
+    },
+    "debug": {
+        "headless": False,
+        "page_load_strategy": "normal",
+        "block": (),
+        "arguments": (),
+    },
+    "visual": {
+        "headless": True,
+        "page_load_strategy": "normal",
+        "block": ("analytics",),
+        "arguments": (
+            "--force-device-scale-factor=1",
+            "--hide-scrollbars",
+            "--font-render-hinting=none",
+            "--disable-background-timer-throttling",
+        ),
+    },
+}
+
+
+def profile_name():
+    """Return the profile selected by HARNESS_PROFILE (default "fast-ci")."""
+    return os.getenv("HARNESS_PROFILE") or DEFAULT_PROFILE
+
+
+def _profile(profile=None):
+    name = profile or profile_name()
+    if name not in PROFILES:
+        raise ValueError(f"Unknown Chrome profile {name!r}, expected one of {sorted(PROFILES)}")
+    return PROFILES[name]
+
+
+def profile_rules(profile=None):
+    """
+    Return the request-blocking rules of a profile (see harness.netfilter).
+
+    Args:
+        profile: Profile name, defaults to profile_name()
+
+    Raises:
+        ValueError: The profile does not exist
+    """
+    return list(_profile(profile)["block"])
+
+
+def chrome_options(profile=None):
+    """
+    Build Chrome options for a named profile.
+
+    Args:
+        profile: "fast-ci", "debug" or "visual", defaults to profile_name()
+
+    Returns:
+        Options: New Chrome options; callers may add arguments to them.
+
+    Raises:
+        ValueError: The profile does not exist
+    """
+    spec = _profile(profile)
+    options = Options()
+    if spec["headless"]:
+        options.add_argument("--headless=new")
+    for argument in _BASE_ARGUMENTS + spec["arguments"]:
+        options.add_argument(argument)
+    options.add_argument("--window-size={},{}".format(*WINDOW_SIZE))
+    options.page_load_strategy = spec["page_load_strategy"]
+    return options
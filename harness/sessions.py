@@ -0,0 +1,242 @@
+"""
+Reusable authenticated-session snapshots.
+
+Logging in through the UI costs several page loads. SessionCache logs in
+once per credential set, saves the resulting cookies and local/session
+storage to disk, and injects that state into later browsers instead of
+driving the form again. A saved session expires after a TTL and is
+re-validated after every restore; if validation fails it is discarded and
+the form login runs once more.
+
+Only tests that verify the login UI itself should still go through the
+form every time.
+"""
+import hashlib
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+from selenium.common.exceptions import WebDriverException
+
+from harness.config import cache_dir
+from harness.fileutil import file_lock, read_json, write_json_atomic
+from harness.pool import reset_driver
+
+DEFAULT_TTL = 15 * 60
+
+# Fields Network.setCookies accepts; getAllCookies returns extra read-only ones
+_CDP_COOKIE_FIELDS = ("name", "value", "domain", "path", "secure", "httpOnly", "sameSite",
+                      "expires", "priority", "sourceScheme", "sourcePort", "partitionKey")
+
+_READ_STORAGE_SCRIPT = """
+function dump(storage) {
+  var out = {};
+  for (var i = 0; i < storage.length; i++) {
+    var key = storage.key(i);
+    out[key] = storage.getItem(key);
+  }
+  return out;
+}
+return {local: dump(window.localStorage), session: dump(window.sessionStorage)};
+"""
+
+_WRITE_STORAGE_SCRIPT = """
+var state = arguments[0];
+Object.keys(state.local).forEach(function (k) { window.localStorage.setItem(k, state.local[k]); });
+Object.keys(state.session).forEach(function (k) { window.sessionStorage.setItem(k, state.session[k]); });
+"""
+
+
+def origin_of(url):
+    """Return scheme://host[:port] of a URL."""
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def capture_state(driver):
+    """
+    Read cookies (all domains when CDP is available) and web storage.
+
+    Args:
+        driver: WebDriver on a page of the origin whose storage is wanted
+
+    Returns:
+        dict: Snapshot that restore_state() can inject again.
+    """
+    try:
+        cookies = driver.execute_cdp_cmd("Network.getAllCookies", {})["cookies"]
+        via_cdp = True
+    except (AttributeError, WebDriverException):
+        cookies = driver.get_cookies()
+        via_cdp = False
+    storage = driver.execute_script(_READ_STORAGE_SCRIPT)
+    return {"cookies": cookies, "cdp": via_cdp, "storage": storage, "saved_at": time.time()}
+
+
+def restore_state(driver, origin, snapshot):
+    """
+    Inject a snapshot into a browser.
+
+    Args:
+        driver: WebDriver to restore into (cookies and storage are overwritten)
+        origin: scheme://host the snapshot belongs to
+        snapshot: dict returned by capture_state()
+    """
+    now = time.time()
+    cookies = [c for c in snapshot["cookies"] if c.get("expires", c.get("expiry", now + 1)) > now
+               or c.get("session")]
+    # Storage and add_cookie both need a document of the right origin
+    driver.get(origin + "/")
+    if snapshot.get("cdp"):
+        params = [{k: c[k] for k in _CDP_COOKIE_FIELDS if k in c} for c in cookies]
+        for cookie in params:
+            # Session cookies come back with expires=-1, which setCookies rejects
+            if cookie.get("expires", 0) < 0:
+                del cookie["expires"]
+        driver.execute_cdp_cmd("Network.setCookies", {"cookies": params})
+    else:
+        for cookie in cookies:
+            driver.add_cookie(cookie)
+    driver.execute_script(_WRITE_STORAGE_SCRIPT, snapshot["storage"])
+
+
+class SessionCache:
+    """
+    Disk-backed cache of logged-in browser state, keyed by origin and user.
+
+    Files are written with owner-only permissions because they contain
+    session cookies. Passwords are never stored.
+    """
+
+    def __init__(self, directory=None, ttl=DEFAULT_TTL, reset=reset_driver):
+        """
+        Args:
+            directory: Where snapshots are stored, defaults to .harness/sessions
+            ttl: Seconds a snapshot stays usable before a fresh login
+            reset: Callable(driver) cleaning the browser before a form login
+        """
+        self.directory = directory or cache_dir("sessions")
+        self.ttl = ttl
+        self.reset = reset
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+        self.stats = {"restored": 0, "logins": 0, "rejected": 0}
+
+    def _path(self, origin, user):
+        key = hashlib.sha256(f"{origin}\0{user}".encode()).hexdigest()[:32]
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _lock_for(self, path):
+        with self._locks_guard:
+            return self._locks.setdefault(path, threading.Lock())
+
+    def capture(self, driver):
+        """Snapshot the logged-in state of driver (see capture_state)."""
+        return capture_state(driver)
+
+    def load(self, origin, user):
+        """
+        Return the saved snapshot if it exists and has not expired.
+
+        Args:
+            origin: scheme://host of the application
+            user: User name the session belongs to
+
+        Returns:
+            dict: Snapshot, or None.
+        """
+        snapshot = read_json(self._path(origin, user), default=False)
+        if not snapshot or time.time() - snapshot.get("saved_at", 0) > self.ttl:
+            return None
+        return snapshot
+
+    def save(self, origin, user, snapshot):
+        write_json_atomic(self._path(origin, user), snapshot, mode=0o600)
+
+    def invalidate(self, origin, user):
+        """Delete a saved snapshot so the next login uses the form."""
+        try:
+            os.remove(self._path(origin, user))
+        except FileNotFoundError:
+            pass
+
+    def restore(self, driver, origin, snapshot):
+        """Inject a snapshot into driver (see restore_state)."""
+        restore_state(driver, origin, snapshot)
+
+    def login(self, driver, url, user, login_via_form, is_logged_in):
+        """
+        Make driver logged in as user, reusing a saved session when possible.
+
+        Args:
+            driver: WebDriver to log in
+            url: Page to end up on (its origin keys the cache)
+            user: User name the credentials belong to
+            login_via_form: Callable(driver) that logs in through the UI
+            is_logged_in: Callable(driver) -> bool, run on url after a restore
+
+        Returns:
+            bool: True if a saved session was reused, False if the form was used.
+        """
+        origin = origin_of(url)
+        snapshot = self.load(origin, user)
+        if snapshot is not None and self._try_restore(driver, origin, url, snapshot, is_logged_in):
+            return True
+
+        path = self._path(origin, user)
+        # One form login per credential set; other threads and workers wait
+        # for it and then reuse the session it saved
+        with self._lock_for(path), file_lock(path):
+            fresh = self.load(origin, user)
+            if fresh is not None and fresh != snapshot:
+                if self._try_restore(driver, origin, url, fresh, is_logged_in):
+                    return True
+            if fresh is not None:
+                self.invalidate(origin, user)
+            self._clean(driver)
+            login_via_form(driver)
+            self.stats["logins"] += 1
+            self.save(origin, user, self.capture(driver))
+            return False
+
+    def _clean(self, driver):
+        # A rejected snapshot put cookies on every domain it held and storage
+        # on the origin; delete_all_cookies would only clear the current
+        # domain. Reset fully, but keep the timeouts the fixture configured
+        try:
+            timeouts = driver.timeouts
+        except WebDriverException:
+            timeouts = None
+        self.reset(driver)
+        if timeouts is not None:
+            driver.timeouts = timeouts
+
+    def _try_restore(self, driver, origin, url, snapshot, is_logged_in):
+        self.restore(driver, origin, snapshot)
+        driver.get(url)
+        if is_logged_in(driver):
+            self.stats["restored"] += 1
+            return True
+        self.stats["rejected"] += 1
+        return False
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def session_cache():
+    """
+    Return the process-wide session cache.
+
+    HARNESS_SESSION_TTL overrides the snapshot lifetime in seconds.
+
+    Returns:
+        SessionCache: The shared cache, created on first use.
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = SessionCache(ttl=float(os.getenv("HARNESS_SESSION_TTL", DEFAULT_TTL)))
+        return _default_cache
@@ -0,0 +1,76 @@
+"""
+Named test steps.
+
+Instrumentation (wait profiling, command tracing) attributes its
+measurements to the current step. Tests can name steps explicitly:
+
+    with step("add to cart"):
+        ...
+
+Otherwise the nearest calling function in test code is used, which for the
+generated modules is the helper method (login_to_acdc, select_device, ...).
+current_test() names the pytest test that is running.
+"""
+import contextvars
+import os
+import sys
+import sysconfig
+from contextlib import contextmanager
+
+_current_step = contextvars.ContextVar("harness_step", default=None)
+
+# Frames from the harness, the standard library and installed packages
+# (selenium, pytest, ...) are infrastructure, never a test step
+_SKIP_DIRS = tuple({
+    os.path.dirname(os.path.abspath(__file__)),
+    sysconfig.get_paths()["stdlib"],
+    sysconfig.get_paths()["purelib"],
+    sysconfig.get_paths()["platlib"],
+})
+
+
+@contextmanager
+def step(name):
+    """
+    Mark a block of test code as a named step.
+
+    Args:
+        name: Step name shown in reports
+    """
+    token = _current_step.set(name)
+    try:
+        yield
+    finally:
+        _current_step.reset(token)
+
+
+def current_step():
+    """
+    Return the explicit step name, or the calling test-code function.
+
+    Returns:
+        str: Step name, or None if no test code is on the stack.
+    """
+    name = _current_step.get()
+    if name is not None:
+        return name
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if not filename.startswith(_SKIP_DIRS):
+            return frame.f_code.co_name
+        frame = frame.f_back
+    return None
+
+
+def current_test():
+    """
+    Return the node id of the pytest test that is running.
+
+    Returns:
+        str: e.g. "pysel51a.py::TestLogin::test_successful_login", or None
+            outside a test.
+    """
+    # Set by pytest while a test runs: "path::Class::test (call)"
+    current = os.getenv("PYTEST_CURRENT_TEST")
+    return current.rsplit(" ", 1)[0] if current else None
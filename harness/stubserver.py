@@ -0,0 +1,401 @@
+"""
+Local record/replay stand-in for the sites the tests visit.
+
+Usage from tests:
+
+    driver.get(route("https://www.demoblaze.com/"))
+
+route() returns the URL unchanged unless a stub server is running, in which
+case it points at http://127.0.0.1:<port>/__stub/https/www.demoblaze.com/.
+
+Modes (HARNESS_STUB):
+    record  forward every request upstream and save the responses
+    replay  serve only from the archive; unknown requests get a 404
+    auto    replay what the archive has and record the rest
+
+Absolute URLs inside recorded HTML/CSS/JS/JSON are rewritten to
+root-relative /__stub/... paths, so subresources also come from the stub,
+and root-relative requests a page makes are mapped back to its upstream
+host through the Referer header. Responses are stored deduplicated by
+content hash in a single compressed zip archive (HARNESS_STUB_ARCHIVE).
+
+HARNESS_STUB_LATENCY (seconds before the first byte) and
+HARNESS_STUB_BANDWIDTH (bytes per second) inject network conditions, so
+replayed runs can still model a slow link reproducibly.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import urllib.error
+import urllib.request
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urljoin, urlsplit
+
+from harness.config import cache_dir
+from harness.fileutil import file_lock
+
+RECORD = "record"
+REPLAY = "replay"
+AUTO = "auto"
+MODES = (RECORD, REPLAY, AUTO)
+# Marks the 502 fetch() returns when upstream cannot be reached
+UNREACHABLE_HEADER = ("X-Harness-Stub", "upstream-unreachable")
+
+PREFIX = "/__stub/"
+
+_TEXT_TYPES = ("text/", "javascript", "json", "xml")
+_ABSOLUTE_URL_RE = re.compile(rb"(https?:)?//([A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)+(?::\d+)?)")
+# Headers that describe the upstream connection rather than the content
+_DROPPED_HEADERS = {
+    "connection", "keep-alive", "transfer-encoding", "content-encoding", "content-length",
+    "strict-transport-security", "content-security-policy", "alt-svc", "upgrade",
+}
+_CHUNK = 16 * 1024
+
+
+def _is_text(content_type):
+    return any(marker in (content_type or "") for marker in _TEXT_TYPES)
+
+
+def to_stub_path(url):
+    """Map https://host/path?q to /__stub/https/host/path?q."""
+    parts = urlsplit(url)
+    path = parts.path or "/"
+    query = f"?{parts.query}" if parts.query else ""
+    return f"{PREFIX}{parts.scheme}/{parts.netloc}{path}{query}"
+
+
+def from_stub_path(path):
+    """Map /__stub/https/host/path?q back to https://host/path?q, or None."""
+    if not path.startswith(PREFIX):
+        return None
+    scheme, _, rest = path[len(PREFIX):].partition("/")
+    host, slash, remainder = rest.partition("/")
+    if scheme not in ("http", "https") or not host:
+        return None
+    return f"{scheme}://{host}/{remainder if slash else ''}"
+
+
+def upstream_url(url):
+    """Map a full stub URL (http://127.0.0.1:port/__stub/https/host/...) back to the real URL."""
+    parts = urlsplit(url)
+    query = f"?{parts.query}" if parts.query else ""
+    return from_stub_path(parts.path + query) or url
+
+
+def _rewrite_body(body):
+    def replace(match):
+        start = match.start()
+        # Protocol-relative URLs only count inside attributes, strings or url();
+        # elsewhere "//" is usually a comment
+        if not match.group(1) and (start == 0 or body[start - 1:start] not in (b'"', b"'", b"(", b"=")):
+            return match.group(0)
+        scheme = (match.group(1) or b"https:")[:-1].decode()
+        return f"{PREFIX}{scheme}/{match.group(2).decode()}".encode()
+    return _ABSOLUTE_URL_RE.sub(replace, body)
+
+
+def _rewrite_cookie(value):
+    # The stub is plain http on 127.0.0.1, so upstream Domain/Secure/SameSite
+    # attributes would make the browser drop the cookie
+    kept = [part for part in value.split(";")
+            if part.strip().split("=")[0].lower() not in ("domain", "secure", "samesite")]
+    return ";".join(kept)
+
+
+class Archive:
+    """
+    Recorded exchanges keyed by method and upstream URL, stored in one zip.
+
+    Bodies are deduplicated by SHA-256 and deflate-compressed.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        self.bodies = {}
+        self.dirty = False
+        self._lock = threading.Lock()
+        self._recorded = set()
+        self.entries, self.bodies = self._load(path)
+
+    @staticmethod
+    def _load(path):
+        entries, bodies = {}, {}
+        if os.path.exists(path):
+            with zipfile.ZipFile(path) as archive:
+                entries = json.loads(archive.read("index.json"))
+                for name in archive.namelist():
+                    if name.startswith("bodies/"):
+                        bodies[name[len("bodies/"):]] = archive.read(name)
+        return entries, bodies
+
+    @staticmethod
+    def key(method, url, body=b""):
+        key = f"{method} {url}"
+        if body:
+            key += " " + hashlib.sha256(body).hexdigest()[:16]
+        return key
+
+    def get(self, key):
+        """Return (status, headers, body) for a recorded key, or None."""
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        return entry["status"], entry["headers"], self.bodies[entry["body"]]
+
+    def put(self, key, status, headers, body):
+        digest = hashlib.sha256(body).hexdigest()
+        with self._lock:
+            self.bodies[digest] = body
+            self.entries[key] = {"status": status, "headers": headers, "body": digest}
+            self._recorded.add(key)
+            self.dirty = True
+
+    def size_of(self, url):
+        """Return the recorded body size of a GET, or None."""
+        entry = self.entries.get(self.key("GET", url))
+        return len(self.bodies[entry["body"]]) if entry else None
+
+    def save(self):
+        """
+        Write the archive if anything new was recorded.
+
+        Parallel workers each record into their own Archive, so the file on
+        disk is re-read under a lock and this worker's recordings are merged
+        into it rather than replacing what other workers saved.
+        """
+        with self._lock:
+            if not self.dirty:
+                return
+            with file_lock(self.path):
+                entries, bodies = self._load(self.path)
+                for key in self._recorded:
+                    entries[key] = self.entries[key]
+                    bodies[self.entries[key]["body"]] = self.bodies[self.entries[key]["body"]]
+                used = {entry["body"] for entry in entries.values()}
+                tmp = f"{self.path}.{os.getpid()}.tmp"
+                with zipfile.ZipFile(tmp, "w", zipfile.ZIP_DEFLATED) as archive:
+                    archive.writestr("index.json", json.dumps(entries, indent=1, sort_keys=True))
+                    for digest in sorted(used):
+                        archive.writestr(f"bodies/{digest}", bodies[digest])
+                os.replace(tmp, self.path)
+            self.entries.update(entries)
+            self.bodies.update(bodies)
+            self._recorded.clear()
+            self.dirty = False
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _upstream_url(self):
+        url = from_stub_path(self.path)
+        if url is not None:
+            return url
+        # Root-relative request from a stubbed page: recover its host from the Referer
+        referer = self.headers.get("Referer")
+        if referer:
+            base = from_stub_path(urlsplit(referer).path)
+            if base:
+                parts = urlsplit(base)
+                return f"{parts.scheme}://{parts.netloc}{self.path}"
+        return None
+
+    def _handle(self):
+        stub = self.server.stub
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        url = self._upstream_url()
+        if url is None:
+            return self._send(404, {"Content-Type": "text/plain"}, b"Not a stubbed URL")
+
+        key = Archive.key(self.command, url, body)
+        recorded = None if stub.mode == RECORD else stub.archive.get(key)
+        if recorded is None:
+            if stub.mode == REPLAY:
+                stub.count("misses")
+                return self._send(404, {"Content-Type": "text/plain"},
+                                  f"Not recorded: {key}".encode())
+            recorded = stub.fetch(self.command, url, body, self.headers)
+            if UNREACHABLE_HEADER in recorded[1]:
+                # Not recorded: a replay would keep failing after the network is back
+                stub.count("errors")
+                return self._send(*recorded)
+            stub.archive.put(key, *recorded)
+            stub.count("recorded")
+        else:
+            stub.count("replayed")
+        self._send(*recorded)
+
+    def _send(self, status, headers, body):
+        stub = self.server.stub
+        if stub.latency:
+            time.sleep(stub.latency)
+        self.send_response(status)
+        for name, value in headers.items() if isinstance(headers, dict) else headers:
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command == "HEAD":
+            return
+        if not stub.bandwidth:
+            self.wfile.write(body)
+            return
+        for offset in range(0, len(body), _CHUNK):
+            chunk = body[offset:offset + _CHUNK]
+            self.wfile.write(chunk)
+            time.sleep(len(chunk) / stub.bandwidth)
+
+    do_GET = do_POST = do_PUT = do_DELETE = do_HEAD = do_OPTIONS = do_PATCH = _handle
+
+
+class StubServer:
+    """
+    Threaded HTTP server that records and replays upstream traffic.
+    """
+
+    def __init__(self, archive_path, mode=REPLAY, latency=0.0, bandwidth=None, port=0):
+        """
+        Args:
+            archive_path: Zip archive to replay from and record into
+            mode: "record", "replay" or "auto"
+            latency: Seconds to wait before each response
+            bandwidth: Bytes per second for response bodies (None for unlimited)
+            port: Port to listen on, 0 for any free port
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown stub mode {mode!r}, expected one of {MODES}")
+        self.mode = mode
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.archive = Archive(archive_path)
+        self.stats = {"replayed": 0, "recorded": 0, "misses": 0, "errors": 0}
+        # Handlers run on one thread per request
+        self._stats_lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        self._thread = None
+
+    def count(self, name):
+        """Add one to a stats counter; safe from concurrent handler threads."""
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url(self, upstream_url):
+        """Return the stub URL serving upstream_url."""
+        return self.base_url + to_stub_path(upstream_url)
+
+    def fetch(self, method, url, body, request_headers):
+        """
+        Forward a request upstream and return a replayable response.
+
+        Returns:
+            tuple: (status, headers as a list of pairs, body); a 502 with
+                UNREACHABLE_HEADER when upstream could not be reached.
+        """
+        headers = {
+            name: value for name, value in request_headers.items()
+            if name.lower() in ("accept", "accept-language", "content-type", "user-agent", "cookie")
+        }
+        headers["Accept-Encoding"] = "identity"
+        request = urllib.request.Request(url, data=body or None, headers=headers, method=method)
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                status, raw_headers, payload = response.status, response.getheaders(), response.read()
+        except urllib.error.HTTPError as e:
+            status, raw_headers, payload = e.code, e.headers.items(), e.read()
+        except OSError as e:
+            # URLError (DNS, refused connection) or a timeout while reading
+            reason = getattr(e, "reason", e)
+            headers = [("Content-Type", "text/plain"), UNREACHABLE_HEADER]
+            return 502, headers, f"Upstream unreachable: {reason}".encode()
+
+        response_headers = []
+        for name, value in raw_headers:
+            lower = name.lower()
+            if lower in _DROPPED_HEADERS:
+                continue
+            if lower == "location":
+                value = to_stub_path(urljoin(url, value))
+            elif lower == "set-cookie":
+                value = _rewrite_cookie(value)
+            response_headers.append((name, value))
+        content_type = dict((n.lower(), v) for n, v in response_headers).get("content-type")
+        if _is_text(content_type):
+            payload = _rewrite_body(payload)
+        return status, response_headers, payload
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving and save anything that was recorded."""
+        self._server.shutdown()
+        self._server.server_close()
+        self.archive.save()
+
+
+_active = None
+
+
+def start_from_env():
+    """
+    Start a stub server if HARNESS_STUB selects a mode.
+
+    Returns:
+        StubServer: The running server, or None when stubbing is off.
+    """
+    global _active
+    mode = os.getenv("HARNESS_STUB")
+    if not mode:
+        return None
+    bandwidth = os.getenv("HARNESS_STUB_BANDWIDTH")
+    _active = StubServer(
+        os.getenv("HARNESS_STUB_ARCHIVE") or os.path.join(cache_dir("stub"), "archive.zip"),
+        mode=mode,
+        latency=float(os.getenv("HARNESS_STUB_LATENCY", "0")),
+        bandwidth=float(bandwidth) if bandwidth else None,
+    ).start()
+    return _active
+
+
+def stop_active():
+    """Stop the server started by start_from_env(), if any."""
+    global _active
+    if _active is not None:
+        _active.stop()
+        _active = None
+
+
+def active_server():
+    """Return the running stub server, or None."""
+    return _active
+
+
+def route(url):
+    """
+    Return the URL the browser should load for url.
+
+    Args:
+        url: Real upstream URL
+
+    Returns:
+        str: The stub URL while a stub server runs, otherwise url unchanged.
+    """
+    return _active.url(url) if _active is not None else url
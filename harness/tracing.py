@@ -0,0 +1,169 @@
+"""
+Per-command WebDriver tracing.
+
+With ``pytest --trace-webdriver`` every command sent to a browser is
+recorded with its duration, locator or URL, and the test and step that
+issued it. For each test a Chrome trace-event file is written to
+.harness/traces/ (open it in chrome://tracing or https://ui.perfetto.dev),
+and the slowest commands across the run are summarised in
+.harness/trace-report.json and at the end of the terminal output.
+"""
+import os
+import re
+import threading
+import time
+
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from harness.fileutil import write_json_atomic
+from harness.steps import current_step
+
+
+def _target_of(params):
+    # find_element: "value" is the locator; get: "url"; script commands are
+    # too long to be useful as a label
+    if not params:
+        return None
+    if "using" in params:
+        return f"{params['using']}={params.get('value')}"
+    return params.get("url")
+
+
+def trace_file_name(nodeid):
+    """Return a file-system safe name for a test node id."""
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", nodeid).strip("_")[:150] + ".json"
+
+
+class CommandTracer:
+    """
+    Records every WebDriver.execute call while installed.
+
+    Only one tracer can be installed at a time; uninstall() restores the
+    original method.
+    """
+
+    def __init__(self):
+        self.current_test = None
+        self.events = []
+        self._epoch = time.perf_counter()
+        self._lock = threading.Lock()
+        self._original = None
+
+    def _patched_execute(self, original):
+        tracer = self
+
+        def execute(driver, driver_command, params=None):
+            started = time.perf_counter()
+            try:
+                return original(driver, driver_command, params)
+            finally:
+                tracer.record(driver_command, started, time.perf_counter() - started, params)
+
+        return execute
+
+    def record(self, command, started, seconds, params=None):
+        """
+        Add one command to the trace.
+
+        Args:
+            command: WebDriver command name (e.g. "findElement")
+            started: time.perf_counter() value when the command was sent
+            seconds: Duration of the round trip
+            params: Command parameters, used to extract the locator or URL
+        """
+        event = {
+            "test": self.current_test,
+            "step": current_step(),
+            "command": command,
+            "target": _target_of(params),
+            "start": started - self._epoch,
+            "seconds": seconds,
+            "thread": threading.get_ident(),
+        }
+        with self._lock:
+            self.events.append(event)
+
+    def install(self):
+        """Wrap WebDriver.execute, after any wrapper already installed."""
+        self._original = WebDriver.execute
+        WebDriver.execute = self._patched_execute(WebDriver.execute)
+
+    def uninstall(self):
+        if self._original is not None:
+            WebDriver.execute = self._original
+            self._original = None
+
+    # -- export ------------------------------------------------------------
+
+    def chrome_trace(self, test=None):
+        """
+        Build a Chrome trace-event document.
+
+        Args:
+            test: Only include commands of this node id (all when None)
+
+        Returns:
+            dict: {"traceEvents": [...]} with one complete ("X") event per command.
+        """
+        pid = os.getpid()
+        trace_events = []
+        for event in self.events:
+            if test is not None and event["test"] != test:
+                continue
+            trace_events.append({
+                "name": event["command"],
+                "cat": event["step"] or "webdriver",
+                "ph": "X",
+                "ts": round(event["start"] * 1e6),
+                "dur": round(event["seconds"] * 1e6),
+                "pid": pid,
+                "tid": event["thread"],
+                "args": {"target": event["target"], "step": event["step"], "test": event["test"]},
+            })
+        return {"traceEvents": trace_events, "displayTimeUnit": "ms"}
+
+    def export_test(self, test, directory):
+        """
+        Write the trace of one test and return its path, or None if it sent no commands.
+        """
+        trace = self.chrome_trace(test)
+        if not trace["traceEvents"]:
+            return None
+        path = os.path.join(directory, trace_file_name(test))
+        write_json_atomic(path, trace)
+        return path
+
+    def slowest(self, limit=10):
+        """Return the individual commands that took longest."""
+        return sorted(self.events, key=lambda event: event["seconds"], reverse=True)[:limit]
+
+    def hotspots(self, limit=10):
+        """
+        Aggregate commands by name and target, worst total first.
+
+        Returns:
+            list: dicts with command, target, count, seconds and max_seconds.
+        """
+        totals = {}
+        for event in self.events:
+            key = (event["command"], event["target"])
+            entry = totals.setdefault(key, {
+                "command": event["command"], "target": event["target"],
+                "count": 0, "seconds": 0.0, "max_seconds": 0.0,
+            })
+            entry["count"] += 1
+            entry["seconds"] += event["seconds"]
+            entry["max_seconds"] = max(entry["max_seconds"], event["seconds"])
+        return sorted(totals.values(), key=lambda entry: entry["seconds"], reverse=True)[:limit]
+
+    def report(self, limit=25):
+        """
+        Returns:
+            dict: Command count, total seconds, hotspots and slowest commands, ready for JSON.
+        """
+        return {
+            "commands": len(self.events),
+            "seconds": sum(event["seconds"] for event in self.events),
+            "hotspots": self.hotspots(limit),
+            "slowest": self.slowest(limit),
+        }
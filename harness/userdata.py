@@ -0,0 +1,334 @@
+"""
+Pre-initialized Chrome user-data directories, cloned onto tmpfs.
+
+Without --user-data-dir Chrome creates a new profile on disk for every
+launch and runs its first-run initialization each time (Local State,
+Preferences, databases, component and shader caches). ProfileTemplates
+does that once instead:
+
+1. A "golden" template is built per Chrome build and option set by
+   launching Chrome on an empty directory, loading a page so the caches
+   are warm and quitting. It is kept in .harness/profiles/.
+2. Once per boot the template is mirrored onto tmpfs (/dev/shm), so
+   browsers started by many workers at once do not compete for the disk.
+3. Each browser gets its own clone next to the mirror. Component
+   directories Chrome never writes to are hardlinked; everything else is
+   copied, with a copy-on-write reflink where the filesystem has them.
+   The clone is deleted when the browser quits, and clones left behind by
+   crashed processes are removed by the next run.
+
+When /dev/shm is missing or too full (Docker's default is 64 MB) clones go
+to the system temporary directory instead. Set HARNESS_PROFILE_TEMPLATE=0
+to let Chrome create its own profile as before; options that already name
+a --user-data-dir are always left alone.
+"""
+import copy
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+
+from harness.config import cache_dir
+from harness.driver_binary import installed_chrome_build
+from harness.fileutil import file_lock
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# linux/fs.h FICLONE: share the source file's extents (btrfs, xfs, ...)
+_FICLONE = 0x40049409
+
+# Versioned component data Chrome installs once and only ever replaces
+SHARED_DIRS = frozenset({
+    "AutofillStates", "CertificateRevocation", "Crowd Deny", "FileTypePolicies",
+    "FirstPartySetsPreloaded", "MEIPreload", "OnDeviceHeadSuggestModel", "OriginTrials",
+    "PKIMetadata", "SSLErrorAssistant", "SafetyTips", "Subresource Filter", "TpcdMetadata",
+    "TrustTokenKeyCommitments", "WidevineCdm", "ZxcvbnData", "hyphen-data", "pnacl",
+})
+
+# Per-run state that must not be part of the template
+_VOLATILE = ("SingletonLock", "SingletonSocket", "SingletonCookie", "lockfile", "Crashpad",
+             "BrowserMetrics", "BrowserMetrics-spare.pma", "Default/Sessions",
+             "Default/Current Session", "Default/Current Tabs", "Default/Last Session",
+             "Default/Last Tabs")
+
+# Loaded while building the template so the renderer, script and style caches exist
+_WARM_PAGE = ("data:text/html,<!doctype html><title>warm</title>"
+              "<style>body{font:14px sans-serif}</style><p>template</p>"
+              "<script>document.title=[1,2,3].map(String).join()</script>")
+
+_TEMPLATE_INFO = "harness-template.json"
+
+
+def _tmpfs_root():
+    if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK):
+        return "/dev/shm"
+    return tempfile.gettempdir()
+
+
+def _tree_size(path):
+    total = 0
+    for directory, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(directory, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+def _free_bytes(path):
+    stat = os.statvfs(path)
+    return stat.f_bavail * stat.f_frsize
+
+
+def _reflink_or_copy(src, dst):
+    if fcntl is not None:
+        try:
+            with open(src, "rb") as source, open(dst, "wb") as target:
+                fcntl.ioctl(target.fileno(), _FICLONE, source.fileno())
+            shutil.copystat(src, dst)
+            return "reflinked"
+        except OSError:
+            pass
+    shutil.copy2(src, dst)
+    return "copied"
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def has_user_data_dir(options):
+    return any(arg.startswith("--user-data-dir") for arg in options.arguments)
+
+
+def template_key(options, build):
+    """
+    Identify the template for a Chrome build and set of options.
+
+    Args:
+        options: Chrome options the browser is launched with
+        build: Installed Chrome version
+    """
+    identity = json.dumps({"build": build, "arguments": sorted(options.arguments)}, sort_keys=True)
+    return hashlib.sha256(identity.encode("utf-8")).hexdigest()[:16]
+
+
+class ProfileTemplates:
+    """
+    Builds golden user-data directories and hands out per-browser clones.
+
+    Attributes:
+        stats: Counts of "built" templates, "clones", files "linked",
+            "reflinked" and "copied", and "seconds" spent cloning
+    """
+
+    def __init__(self, directory=None, tmpfs=None, build_detector=installed_chrome_build):
+        """
+        Args:
+            directory: Where templates are built, defaults to .harness/profiles
+            tmpfs: Where mirrors and clones go, defaults to /dev/shm
+            build_detector: Callable returning the installed Chrome build
+        """
+        self.directory = directory or cache_dir("profiles")
+        self.tmpfs = tmpfs or _tmpfs_root()
+        self.build_detector = build_detector
+        self.stats = {"built": 0, "clones": 0, "linked": 0, "reflinked": 0, "copied": 0, "seconds": 0.0}
+        self._lock = threading.Lock()
+        self._build = None
+        self._swept = False
+
+    def _base(self, root):
+        # Per user, so clones of different accounts never collide
+        return os.path.join(root, f"harness-profiles-{os.getuid() if hasattr(os, 'getuid') else 0}")
+
+    def launch(self, options, start):
+        """
+        Start a browser on a fresh clone of the template for its options.
+
+        Args:
+            options: Chrome options (not modified)
+            start: Callable(options) returning a WebDriver
+
+        Returns:
+            WebDriver: The started browser; its clone is deleted on quit().
+        """
+        if not self.enabled() or has_user_data_dir(options):
+            return start(options)
+        clone = self.clone(options, start)
+        options = copy.deepcopy(options)
+        options.add_argument(f"--user-data-dir={clone}")
+        try:
+            driver = start(options)
+        except Exception:
+            shutil.rmtree(clone, ignore_errors=True)
+            raise
+        self._remove_on_quit(driver, clone)
+        return driver
+
+    @staticmethod
+    def enabled():
+        return os.getenv("HARNESS_PROFILE_TEMPLATE", "1").lower() not in ("0", "false", "no", "off")
+
+    def template(self, options, start):
+        """
+        Return the golden template for options, building it on first use.
+
+        Concurrent workers wait for one build instead of each running Chrome.
+
+        Args:
+            options: Chrome options the template is built with
+            start: Callable(options) returning a WebDriver
+        """
+        with self._lock:
+            if self._build is None:
+                self._build = self.build_detector()
+        path = os.path.join(self.directory, template_key(options, self._build))
+        if os.path.exists(os.path.join(path, _TEMPLATE_INFO)):
+            return path
+        with file_lock(path):
+            if os.path.exists(os.path.join(path, _TEMPLATE_INFO)):
+                return path
+            shutil.rmtree(path, ignore_errors=True)
+            staging = f"{path}.{os.getpid()}.build"
+            shutil.rmtree(staging, ignore_errors=True)
+            os.makedirs(staging)
+            build_options = copy.deepcopy(options)
+            build_options.add_argument(f"--user-data-dir={os.path.abspath(staging)}")
+            driver = start(build_options)
+            try:
+                driver.get("about:blank")
+                driver.get(_WARM_PAGE)
+            finally:
+                driver.quit()
+            for name in _VOLATILE:
+                target = os.path.join(staging, name)
+                if os.path.isdir(target) and not os.path.islink(target):
+                    shutil.rmtree(target, ignore_errors=True)
+                elif os.path.lexists(target):
+                    os.remove(target)
+            with open(os.path.join(staging, _TEMPLATE_INFO), "w") as f:
+                json.dump({"build": self._build, "arguments": list(options.arguments),
+                           "created": time.time()}, f, indent=2)
+            os.replace(staging, path)
+            self.stats["built"] += 1
+        return path
+
+    def _mirror(self, template):
+        # One tmpfs copy of the template per boot; clones hardlink into it
+        mirror = os.path.join(self._base(self.tmpfs), "templates", os.path.basename(template))
+        if os.path.exists(os.path.join(mirror, _TEMPLATE_INFO)):
+            return mirror
+        with file_lock(mirror):
+            if not os.path.exists(os.path.join(mirror, _TEMPLATE_INFO)):
+                shutil.rmtree(mirror, ignore_errors=True)
+                staging = f"{mirror}.{os.getpid()}.tmp"
+                shutil.rmtree(staging, ignore_errors=True)
+                shutil.copytree(template, staging, symlinks=True)
+                os.replace(staging, mirror)
+        return mirror
+
+    def clone(self, options, start):
+        """
+        Create a private user-data directory for one browser.
+
+        Args:
+            options: Chrome options of the browser
+            start: Callable(options) used if the template must be built
+
+        Returns:
+            str: Absolute path of the clone.
+        """
+        template = self.template(options, start)
+        size = _tree_size(template)
+        # Room for the mirror plus a few clones, or the clone goes to disk
+        if _free_bytes(self.tmpfs) > 4 * size:
+            source, root = self._mirror(template), self.tmpfs
+        else:
+            source, root = template, tempfile.gettempdir()
+        clones = os.path.join(self._base(root), "clones")
+        os.makedirs(clones, exist_ok=True)
+        self._sweep(clones)
+
+        started = time.perf_counter()
+        target = os.path.join(clones, f"{os.getpid()}-{uuid.uuid4().hex[:12]}")
+        counts = {"linked": 0, "reflinked": 0, "copied": 0}
+        for directory, subdirs, files in os.walk(source):
+            relative = os.path.relpath(directory, source)
+            top = relative.split(os.sep)[0]
+            os.makedirs(os.path.join(target, relative), exist_ok=True)
+            for name in files:
+                if relative == "." and name == _TEMPLATE_INFO:
+                    continue
+                src = os.path.join(directory, name)
+                dst = os.path.join(target, relative, name)
+                if top in SHARED_DIRS:
+                    try:
+                        os.link(src, dst)
+                        counts["linked"] += 1
+                        continue
+                    except OSError:
+                        pass
+                counts[_reflink_or_copy(src, dst)] += 1
+        with self._lock:
+            self.stats["clones"] += 1
+            self.stats["seconds"] += time.perf_counter() - started
+            for key, value in counts.items():
+                self.stats[key] += value
+        return target
+
+    def _sweep(self, clones):
+        # Clones of processes that died without quitting their browsers
+        if self._swept:
+            return
+        self._swept = True
+        for name in os.listdir(clones):
+            pid = name.split("-", 1)[0]
+            if pid.isdigit() and int(pid) != os.getpid() and not _pid_alive(int(pid)):
+                shutil.rmtree(os.path.join(clones, name), ignore_errors=True)
+
+    @staticmethod
+    def _remove_on_quit(driver, clone):
+        quit_browser = driver.quit
+
+        def quit():
+            try:
+                quit_browser()
+            finally:
+                shutil.rmtree(clone, ignore_errors=True)
+
+        driver.quit = quit
+
+
+_default_templates = None
+_default_templates_lock = threading.Lock()
+
+
+def profile_templates():
+    """
+    Return the process-wide template manager used by create_chrome_driver.
+
+    Returns:
+        ProfileTemplates: The shared manager, created on first use.
+    """
+    global _default_templates
+    with _default_templates_lock:
+        if _default_templates is None:
+            _default_templates = ProfileTemplates()
+        return _default_templates
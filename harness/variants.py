@@ -0,0 +1,195 @@
+"""
+Same-page variants: run many inputs against one loaded page.
+
+Validation tests typically load a form, type one set of inputs, submit and
+read the message, and most of their time goes into loading the page.
+SamePage loads it once and, between variants, puts it back into the state
+it had after loading:
+
+- every DOM change since then is undone: a MutationObserver installed at
+  load time records added and removed nodes, attribute and text changes,
+  and they are reverted newest first, so nodes keep their event listeners;
+- form fields get their loaded values, checked states and selections back;
+- focus is dropped and the page scrolled to the top.
+
+The page is loaded again (in a browser reset as between tests) only when
+in-page reset cannot be trusted: the variant navigated away or changed the
+URL, an alert is open, or the document no longer matches its loaded
+markup (e.g. markup that a timer keeps changing).
+JavaScript state outside the DOM (framework stores, flags like
+"submitted") is not reset; mark such pages reload_always=True.
+
+Each variant stays its own pytest test; share the page through a
+class-scoped fixture:
+
+    @pytest.fixture(scope="class")
+    def login_page(self, browser_pool):
+        with browser_pool.lease() as driver:
+            yield SamePage(driver, route("https://example.com/login"), ready=(By.ID, "email"))
+
+    @pytest.fixture
+    def driver(self, login_page):
+        return login_page.fresh()
+
+    def test_invalid_email_format(self, driver):
+        ...
+
+    def test_empty_credentials(self, driver):
+        ...
+"""
+import threading
+import uuid
+
+from selenium.common.exceptions import WebDriverException
+
+from harness import waits as EC
+from harness.pool import reset_driver
+from harness.waits import PushWait
+
+_INSTALL_SCRIPT = r"""
+var state = {token: arguments[0], records: [], html: document.body.innerHTML, fields: []};
+document.querySelectorAll('input, textarea, select').forEach(function (el) {
+  state.fields.push([el, el.value, el.checked, el.selectedIndex]);
+});
+state.observer = new MutationObserver(function (records) {
+  Array.prototype.push.apply(state.records, records);
+});
+state.observer.observe(document.documentElement, {
+  subtree: true, childList: true, attributes: true, attributeOldValue: true,
+  characterData: true, characterDataOldValue: true
+});
+window.__harnessSamePage = state;
+"""
+
+_RESET_SCRIPT = r"""
+var state = window.__harnessSamePage;
+if (!state || state.token !== arguments[0]) { return false; }
+// Blur first: blur handlers may change the DOM, and those changes are undone too
+if (document.activeElement && document.activeElement !== document.body && document.activeElement.blur) {
+  document.activeElement.blur();
+}
+var records = state.records.concat(state.observer.takeRecords());
+for (var i = records.length - 1; i >= 0; i--) {
+  var r = records[i];
+  if (r.type === 'attributes') {
+    if (r.oldValue === null) { r.target.removeAttribute(r.attributeName); }
+    else { r.target.setAttribute(r.attributeName, r.oldValue); }
+  } else if (r.type === 'characterData') {
+    r.target.data = r.oldValue;
+  } else {
+    for (var j = r.addedNodes.length - 1; j >= 0; j--) {
+      if (r.addedNodes[j].parentNode === r.target) { r.target.removeChild(r.addedNodes[j]); }
+    }
+    var before = r.nextSibling && r.nextSibling.parentNode === r.target ? r.nextSibling : null;
+    for (var k = 0; k < r.removedNodes.length; k++) {
+      r.target.insertBefore(r.removedNodes[k], before);
+    }
+  }
+}
+state.fields.forEach(function (f) {
+  var el = f[0], type = (el.type || '').toLowerCase();
+  if (type === 'checkbox' || type === 'radio') { el.checked = f[2]; }
+  else if (el.tagName === 'SELECT') { el.selectedIndex = f[3]; }
+  else if (type !== 'file') { el.value = f[1]; }
+  else if (el.value) { el.value = ''; }
+});
+window.scrollTo(0, 0);
+// Our own undo shows up as mutations too
+state.observer.takeRecords();
+state.records = [];
+return document.body.innerHTML === state.html;
+"""
+
+_stats = {"loads": 0, "resets": 0}
+_stats_lock = threading.Lock()
+
+
+def _count(key):
+    with _stats_lock:
+        _stats[key] += 1
+
+
+class SamePage:
+    """
+    A page loaded once and reset in place between test variants.
+
+    Attributes:
+        stats: Counts of page "loads" and in-page "resets"
+    """
+
+    def __init__(self, driver, url, ready=None, timeout=15, reload_always=False, reset=reset_driver):
+        """
+        Args:
+            driver: WebDriver, usually leased for a whole test class
+            url: Page the variants run against
+            ready: Locator that is visible once the page can be used
+            timeout: Seconds to wait for ready after a load
+            reload_always: Load the page for every variant (pages whose
+                JavaScript state cannot be reset through the DOM)
+            reset: Callable(driver) cleaning the browser before a reload
+        """
+        self.driver = driver
+        self.url = url
+        self.ready = ready
+        self.timeout = timeout
+        self.reload_always = reload_always
+        self.reset = reset
+        self.stats = {"loads": 0, "resets": 0}
+        self._token = None
+        self._loaded_url = None
+
+    def load(self):
+        """Navigate to the page, wait until it is ready and start recording changes."""
+        self.driver.get(self.url)
+        if self.ready is not None:
+            PushWait(self.driver, self.timeout).until(EC.visibility_of_element_located(self.ready))
+        self._token = uuid.uuid4().hex
+        self.driver.execute_script(_INSTALL_SCRIPT, self._token)
+        # Redirects are fine; later navigations are not
+        self._loaded_url = self.driver.current_url
+        self.stats["loads"] += 1
+        _count("loads")
+
+    def fresh(self):
+        """
+        Return the driver on the page as it was after loading.
+
+        Returns:
+            WebDriver: The page's driver.
+        """
+        if self._token is not None and not self.reload_always and self._reset_in_page():
+            self.stats["resets"] += 1
+            _count("resets")
+            return self.driver
+        if self._token is not None:
+            # The last variant navigated or left state the DOM undo cannot
+            # cover (cookies after a login, open alerts); start clean, but
+            # keep the timeouts the fixture configured
+            try:
+                timeouts = self.driver.timeouts
+            except WebDriverException:
+                timeouts = None
+            self.reset(self.driver)
+            if timeouts is not None:
+                self.driver.timeouts = timeouts
+        self.load()
+        return self.driver
+
+    def _reset_in_page(self):
+        try:
+            if self.driver.current_url != self._loaded_url:
+                return False
+            return bool(self.driver.execute_script(_RESET_SCRIPT, self._token))
+        except WebDriverException:
+            return False
+
+
+def variant_stats():
+    """
+    Return page loads and in-page resets of every SamePage in this process.
+
+    Returns:
+        dict: loads and resets.
+    """
+    with _stats_lock:
+        return dict(_stats)
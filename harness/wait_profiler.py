@@ -0,0 +1,190 @@
+"""
+Wait-budget profiler.
+
+Records, per test and per step, how long the test was blocked in implicit
+waits (element lookups while an implicit wait is set), explicit waits
+(WebDriverWait / PushWait) and time.sleep. An explicit wait started while
+the same driver has an implicit wait is flagged as compounded: every
+lookup inside the explicit wait can block for the full implicit timeout,
+so a single failure can take explicit + implicit seconds or more.
+
+Enable with ``pytest --wait-profile``; the sorted report is written to
+.harness/wait-report.json and the worst hotspots are printed at the end.
+"""
+import threading
+import time
+import weakref
+
+from selenium.webdriver.remote.command import Command
+from selenium.webdriver.remote.webdriver import WebDriver
+from selenium.webdriver.support.ui import WebDriverWait
+
+from harness.steps import current_step
+from harness.waits import DomCondition, PushWait
+
+_FIND_COMMANDS = {
+    Command.FIND_ELEMENT,
+    Command.FIND_ELEMENTS,
+    Command.FIND_CHILD_ELEMENT,
+    Command.FIND_CHILD_ELEMENTS,
+}
+
+IMPLICIT = "implicit"
+EXPLICIT = "explicit"
+SLEEP = "sleep"
+
+
+class WaitProfiler:
+    """
+    Collects wait events by patching WebDriver, the wait classes and time.sleep.
+
+    Only one profiler can be installed at a time; uninstall() restores the
+    original functions.
+    """
+
+    def __init__(self):
+        self.current_test = None
+        self.events = []
+        self.compounded = []
+        self._implicit = weakref.WeakKeyDictionary()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._originals = {}
+
+    # -- recording ---------------------------------------------------------
+
+    def _record(self, kind, seconds, **detail):
+        event = dict(test=self.current_test, step=current_step(), kind=kind,
+                     seconds=seconds, **detail)
+        with self._lock:
+            self.events.append(event)
+        return event
+
+    def _in_explicit(self):
+        return getattr(self._local, "explicit_depth", 0) > 0
+
+    def implicit_wait_of(self, driver):
+        """Return the implicit wait (seconds) last set on driver."""
+        return self._implicit.get(driver, 0.0)
+
+    # -- patched functions -------------------------------------------------
+
+    def _patched_execute(self, original):
+        profiler = self
+
+        def execute(driver, driver_command, params=None):
+            if driver_command == Command.SET_TIMEOUTS and params and "implicit" in params:
+                profiler._implicit[driver] = params["implicit"] / 1000.0
+            implicit = profiler._implicit.get(driver, 0.0)
+            if driver_command not in _FIND_COMMANDS or not implicit:
+                return original(driver, driver_command, params)
+            started = time.perf_counter()
+            try:
+                return original(driver, driver_command, params)
+            finally:
+                elapsed = time.perf_counter() - started
+                # Lookups inside an explicit wait are counted against that wait
+                if not profiler._in_explicit():
+                    profiler._record(IMPLICIT, elapsed, timeout=implicit,
+                                     locator=(params or {}).get("value"))
+                else:
+                    profiler._local.nested_implicit += elapsed
+
+        return execute
+
+    def _patched_until(self, original, wait_class):
+        profiler = self
+
+        def until(wait, method, message=""):
+            # PushWait hands non-DOM conditions to WebDriverWait, which records them
+            if wait_class is PushWait and not isinstance(method, DomCondition):
+                return original(wait, method, message)
+            driver = wait._driver
+            implicit = profiler._implicit.get(driver, 0.0)
+            # In-page DOM conditions never call find_element, so no compounding
+            compounds = implicit > 0 and not isinstance(method, DomCondition)
+            local = profiler._local
+            local.explicit_depth = getattr(local, "explicit_depth", 0) + 1
+            if local.explicit_depth == 1:
+                local.nested_implicit = 0.0
+            started = time.perf_counter()
+            try:
+                return original(wait, method, message)
+            finally:
+                elapsed = time.perf_counter() - started
+                local.explicit_depth -= 1
+                event = profiler._record(
+                    EXPLICIT, elapsed, timeout=wait._timeout, implicit=implicit,
+                    condition=repr(method), wait=wait_class.__name__,
+                    implicit_inside=round(local.nested_implicit, 4),
+                )
+                if compounds:
+                    event["worst_case"] = wait._timeout + implicit
+                    with profiler._lock:
+                        profiler.compounded.append(event)
+
+        return until
+
+    def _patched_sleep(self, original):
+        profiler = self
+
+        def sleep(seconds):
+            started = time.perf_counter()
+            try:
+                return original(seconds)
+            finally:
+                if profiler.current_test is not None:
+                    profiler._record(SLEEP, time.perf_counter() - started, requested=seconds)
+
+        return sleep
+
+    def install(self):
+        """Patch WebDriver.execute, the wait classes and time.sleep."""
+        self._originals = {
+            (WebDriver, "execute"): WebDriver.execute,
+            (WebDriverWait, "until"): WebDriverWait.until,
+            (PushWait, "until"): PushWait.until,
+            (time, "sleep"): time.sleep,
+        }
+        WebDriver.execute = self._patched_execute(WebDriver.execute)
+        WebDriverWait.until = self._patched_until(WebDriverWait.until, WebDriverWait)
+        PushWait.until = self._patched_until(PushWait.until, PushWait)
+        time.sleep = self._patched_sleep(time.sleep)
+
+    def uninstall(self):
+        """Restore everything install() patched."""
+        for (owner, name), original in self._originals.items():
+            setattr(owner, name, original)
+        self._originals = {}
+
+    # -- reporting ---------------------------------------------------------
+
+    def hotspots(self):
+        """
+        Aggregate events by test, step and kind, worst first.
+
+        Returns:
+            list: dicts with test, step, kind, count, seconds and max_seconds.
+        """
+        totals = {}
+        for event in self.events:
+            key = (event["test"], event["step"], event["kind"])
+            entry = totals.setdefault(key, {
+                "test": event["test"], "step": event["step"], "kind": event["kind"],
+                "count": 0, "seconds": 0.0, "max_seconds": 0.0,
+            })
+            entry["count"] += 1
+            entry["seconds"] += event["seconds"]
+            entry["max_seconds"] = max(entry["max_seconds"], event["seconds"])
+        return sorted(totals.values(), key=lambda entry: entry["seconds"], reverse=True)
+
+    def report(self):
+        """
+        Returns:
+            dict: hotspots, compounded waits and per-kind totals, ready for JSON.
+        """
+        by_kind = {}
+        for event in self.events:
+            by_kind[event["kind"]] = by_kind.get(event["kind"], 0.0) + event["seconds"]
+        compounded = sorted(self.compounded, key=lambda event: event["worst_case"], reverse=True)
+        return {"totals": by_kind, "hotspots": self.hotspots(), "compounded": compounded}
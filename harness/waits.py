@@ -0,0 +1,220 @@
+"""
+Push-based waits that resolve inside the browser.
+
+WebDriverWait polls: every 500 ms it sends a full WebDriver command and
+checks the answer. PushWait instead sends one asynchronous script that
+checks the condition, installs a MutationObserver plus readiness listeners,
+and calls back the moment the DOM satisfies it.
+
+The condition factories below mirror the names in
+selenium.webdriver.support.expected_conditions, so a module can switch with
+
+    from harness import waits as EC
+    wait = PushWait(driver, 15)
+
+Conditions this module cannot evaluate in the page (alerts, for example)
+fall back to ordinary WebDriverWait polling.
+"""
+import time
+
+from selenium.common.exceptions import (
+    InvalidSelectorException,
+    JavascriptException,
+    TimeoutException,
+)
+from selenium.webdriver.support import expected_conditions as _selenium_ec
+from selenium.webdriver.support.ui import WebDriverWait
+
+from harness.locators import FIND_JS, normalize
+
+# Stay below the default 30 s script timeout; longer waits are chunked
+MAX_SCRIPT_WAIT = 25.0
+
+# Visibility can change through CSS alone (stylesheets, transitions), which
+# produces no DOM mutation, so a cheap in-page timer re-checks as a backstop
+BACKSTOP_INTERVAL_MS = 100
+
+_CHECK_JS = FIND_JS + r"""
+function __harnessCheck(kind, strategy, value) {
+  if (kind === 'ready') { return document.readyState === 'complete' ? true : null; }
+  if (kind === 'all_present') {
+    var all = __harnessFind(strategy, value, true);
+    return all.length ? all : null;
+  }
+  var el = __harnessFind(strategy, value, false);
+  if (!el) { return null; }
+  if (kind === 'present') { return el; }
+  if (!__harnessVisible(el)) { return null; }
+  if (kind === 'visible') { return el; }
+  if (kind === 'clickable') { return el.disabled ? null : el; }
+  throw new Error('Unknown condition: ' + kind);
+}
+
+function __harnessSafeCheck(kind, strategy, value) {
+  try { return {value: __harnessCheck(kind, strategy, value)}; }
+  catch (e) { return {error: String(e && e.message || e)}; }
+}
+"""
+
+_CHECK_ONCE_SCRIPT = _CHECK_JS + r"""
+return __harnessSafeCheck(arguments[0], arguments[1], arguments[2]);
+"""
+
+WAIT_SCRIPT = _CHECK_JS + r"""
+var kind = arguments[0], strategy = arguments[1], value = arguments[2];
+var timeoutMs = arguments[3], backstopMs = arguments[4];
+var done = arguments[arguments.length - 1];
+
+var first = __harnessSafeCheck(kind, strategy, value);
+if (first.error || first.value) { done(first); return; }
+
+var finished = false, observer, backstop, timer;
+function finish(payload) {
+  if (finished) { return; }
+  finished = true;
+  observer.disconnect();
+  clearInterval(backstop);
+  clearTimeout(timer);
+  document.removeEventListener('readystatechange', tick);
+  window.removeEventListener('load', tick);
+  done(payload);
+}
+function tick() {
+  var result = __harnessSafeCheck(kind, strategy, value);
+  if (result.error || result.value) { finish(result); }
+}
+observer = new MutationObserver(tick);
+observer.observe(document, {childList: true, subtree: true, attributes: true, characterData: true});
+document.addEventListener('readystatechange', tick);
+window.addEventListener('load', tick);
+backstop = setInterval(tick, backstopMs);
+timer = setTimeout(function () { finish({timeout: true}); }, timeoutMs);
+"""
+
+
+class DomCondition:
+    """
+    A wait condition that can be evaluated entirely in the page.
+
+    Instances are also plain callables taking a driver, so they still work
+    with WebDriverWait (as a single in-page check per poll).
+    """
+
+    def __init__(self, kind, locator=None):
+        """
+        Args:
+            kind: One of "present", "visible", "clickable", "all_present" or "ready"
+            locator: (By.X, value) tuple; not needed for "ready"
+        """
+        self.kind = kind
+        self.locator = locator
+        self.strategy, self.value = normalize(locator) if locator else (None, None)
+
+    def __call__(self, driver):
+        result = driver.execute_script(_CHECK_ONCE_SCRIPT, self.kind, self.strategy, self.value)
+        if result.get("error"):
+            raise InvalidSelectorException(result["error"])
+        return result.get("value") or False
+
+    def __repr__(self):
+        return f"DomCondition({self.kind!r}, {self.locator!r})"
+
+
+def presence_of_element_located(locator):
+    return DomCondition("present", locator)
+
+
+def visibility_of_element_located(locator):
+    return DomCondition("visible", locator)
+
+
+def element_to_be_clickable(locator):
+    return DomCondition("clickable", locator)
+
+
+def presence_of_all_elements_located(locator):
+    return DomCondition("all_present", locator)
+
+
+def document_ready():
+    """Condition met once document.readyState is "complete"."""
+    return DomCondition("ready")
+
+
+# Conditions that cannot be observed from inside the page keep Selenium's
+# implementation and are polled
+alert_is_present = _selenium_ec.alert_is_present
+
+
+class PushWait:
+    """
+    Drop-in replacement for WebDriverWait that waits inside the browser.
+
+    DomCondition instances resolve through a single async script call per
+    chunk of up to MAX_SCRIPT_WAIT seconds; anything else is delegated to
+    WebDriverWait with the same timeout and poll frequency.
+    """
+
+    def __init__(self, driver, timeout, poll_frequency=0.5, ignored_exceptions=None):
+        """
+        Args:
+            driver: WebDriver instance
+            timeout: Seconds before TimeoutException is raised
+            poll_frequency: Poll interval for conditions that fall back to polling
+            ignored_exceptions: Passed through to WebDriverWait for fallbacks
+        """
+        self._driver = driver
+        self._timeout = timeout
+        self._poll = poll_frequency
+        self._ignored_exceptions = ignored_exceptions
+
+    def _polling(self):
+        return WebDriverWait(self._driver, self._timeout, self._poll, self._ignored_exceptions)
+
+    def until(self, method, message=""):
+        """
+        Wait until the condition is met.
+
+        Args:
+            method: DomCondition or any WebDriverWait-style callable
+            message: Text for the TimeoutException
+
+        Returns:
+            The condition's value (WebElement, list of WebElements or True).
+        """
+        if not isinstance(method, DomCondition):
+            return self._polling().until(method, message)
+
+        deadline = time.monotonic() + self._timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutException(
+                    message or f"{method!r} not met after {self._timeout}s"
+                )
+            # Drivers that share a browser session (harness.contexts) ask for
+            # short chunks so one wait does not hold the session for long
+            chunk = getattr(self._driver, "max_script_wait", MAX_SCRIPT_WAIT)
+            chunk_ms = int(min(remaining, chunk) * 1000)
+            try:
+                result = self._driver.execute_async_script(
+                    WAIT_SCRIPT, method.kind, method.strategy, method.value,
+                    chunk_ms, BACKSTOP_INTERVAL_MS,
+                )
+            except JavascriptException as e:
+                # A navigation tears down the document the observer lived in;
+                # start again on the new page
+                if "unloaded" in str(e) or "detached" in str(e):
+                    continue
+                raise
+            except TimeoutException:
+                # The session's script timeout is shorter than the chunk
+                continue
+            if result.get("error"):
+                raise InvalidSelectorException(result["error"])
+            if result.get("value"):
+                return result["value"]
+
+    def until_not(self, method, message=""):
+        """Wait until the condition stops being met (polled)."""
+        return self._polling().until_not(method, message)
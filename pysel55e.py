@@ -1,20 +1,44 @@
 import pytest
 import os
 import time
-from datetime import datetime
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
+from selenium.common.exceptions import TimeoutException
+
+from harness import waits as EC
+from harness.artifacts import default_writer
+from harness.batch import click, fill, perform
+from harness.checkpoints import Flow
+from harness.pages import CLICKABLE, PRESENT, Element, Page
+from harness.sessions import session_cache
+from harness.stubserver import route
+from harness.waits import PushWait
 
 # Skip these tests in CI environment as they require real application UI
 pytestmark = pytest.mark.skip(
     reason="Agent-generated E2E test requires real application UI; skipped in CI"
 )
 
+
+class ACDCPage(Page):
+    """
+    Elements of the ACDC single-page app used by the device management tests.
+    """
+    
+    # TODO: Replace text-based and ID locators with data-testid when available
+    username = Element(By.ID, "username")
+    password = Element(By.ID, "password")
+    login_button = Element(By.XPATH, "//button[contains(text(), 'Login')]", until=CLICKABLE)
+    dashboard_heading = Element(By.XPATH, "//h1[contains(text(), 'Dashboard')]")
+    device_management_link = Element(By.XPATH, "//a[contains(text(), 'Device Management')]", until=CLICKABLE)
+    device_management_heading = Element(By.XPATH, "//h1[contains(text(), 'Device Management')]")
+    device_search = Element(By.ID, "device-search")
+    search_button = Element(By.XPATH, "//button[contains(text(), 'Search')]", until=CLICKABLE)
+    edit_button = Element(By.XPATH, "//button[contains(text(), 'Edit')]", until=CLICKABLE)
+    serial_number = Element(By.ID, "serial-number", until=PRESENT)
+    save_button = Element(By.XPATH, "//button[contains(text(), 'Save')]", until=CLICKABLE)
+    error_message = Element(By.CLASS_NAME, "error-message")
+
+
 class ACDCDeviceManagementTests:
     """
     Test suite for ACDC device management functionality, focusing on serial number
@@ -22,35 +46,23 @@ class ACDCDeviceManagementTests:
     """
     
     @pytest.fixture
-    def driver(self):
+    def driver(self, browser_pool):
         """
         Setup and teardown for WebDriver.
-        Creates a headless Chrome browser instance and quits after test.
+        Leases a headless Chrome browser from the shared pool and returns it after test.
         """
-        # Initialize Chrome options for headless execution
-        chrome_options = Options()
-        chrome_options.add_argument("--headless")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        
-        # Setup Chrome driver with webdriver-manager
-        service = Service(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=chrome_options)
-        
-        # Set implicit wait and maximize window
-        driver.maximize_window()
-        
-        # Create a WebDriverWait instance for explicit waits
-        wait = WebDriverWait(driver, 20)
-        
-        # Add wait and driver to yield
-        driver.wait = wait
-        
-        # Yield driver to test
-        yield driver
-        
-        # Quit driver after test completes
-        driver.quit()
+        with browser_pool.lease() as driver:
+            # Create a PushWait instance for explicit waits resolved in the page
+            wait = PushWait(driver, 20)
+            
+            # Add wait and driver to yield
+            driver.wait = wait
+            
+            # Page object whose elements are looked up once and then reused
+            driver.acdc = ACDCPage(driver, wait=wait)
+            
+            # Yield driver to test
+            yield driver
     
     def capture_screenshot(self, driver, name):
         """
@@ -60,53 +72,73 @@ class ACDCDeviceManagementTests:
             driver: WebDriver instance
             name: Screenshot name prefix
         """
-        os.makedirs("screenshots", exist_ok=True)
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        driver.save_screenshot(f"screenshots/{name}_{timestamp}.png")
+        default_writer().screenshot(driver, name)
     
     def login_to_acdc(self, driver):
         """
         Login to ACDC application.
+        Reuses a saved session for these credentials when one is still valid,
+        and only drives the login form when it is missing or stale.
         
         Args:
             driver: WebDriver instance
         """
-        # Get base URL from environment or use default
-        base_url = os.getenv("ACDC_URL", "https://acdc-app.example.com")
+        # Get base URL from environment or use default (served by the stub server when one runs)
+        base_url = route(os.getenv("ACDC_URL", "https://acdc-app.example.com"))
         username = os.getenv("ACDC_USERNAME", "test_user")
         password = os.getenv("ACDC_PASSWORD", "test_password")
         
-        # Navigate to the application
-        driver.get(base_url)
+        session_cache().login(
+            driver,
+            base_url,
+            username,
+            login_via_form=lambda d: self.login_via_form(d, base_url, username, password),
+            is_logged_in=self.is_on_dashboard,
+        )
+    
+    def is_on_dashboard(self, driver):
+        """
+        Check whether the dashboard is shown, i.e. the session is logged in.
         
+        Args:
+            driver: WebDriver instance
+        """
         try:
-            # Find username field and enter username
-            # TODO: Replace with data-testid when available
-            username_field = driver.wait.until(
-                EC.visibility_of_element_located((By.ID, "username"))
+            PushWait(driver, 5).until(
+                EC.visibility_of_element_located((By.XPATH, "//h1[contains(text(), 'Dashboard')]"))
             )
-            username_field.clear()
-            username_field.send_keys(username)
-            
-            # Find password field and enter password
-            # TODO: Replace with data-testid when available
-            password_field = driver.wait.until(
-                EC.visibility_of_element_located((By.ID, "password"))
-            )
-            password_field.clear()
-            password_field.send_keys(password)
+            return True
+        except TimeoutException:
+            return False
+    
+    def login_via_form(self, driver, base_url, username, password):
+        """
+        Login to ACDC application through the login form.
+        
+        Args:
+            driver: WebDriver instance
+            base_url: Application URL
+            username: User name to log in with
+            password: Password for the user
+        """
+        page = driver.acdc
+        
+        # Navigate to the application
+        page.open(base_url)
+        
+        try:
+            # Wait for the login form to render
+            page.username.resolve()
             
-            # Click login button
-            # TODO: Replace text-based locator with stable data-testid
-            login_button = driver.wait.until(
-                EC.element_to_be_clickable((By.XPATH, "//button[contains(text(), 'Login')]")
-            )
-            login_button.click()
+            # Enter username and password and click login in a single call
+            perform(driver, [
+                fill(ACDCPage.username.locator, username),
+                fill(ACDCPage.password.locator, password),
+                click(ACDCPage.login_button.locator),
+            ])
             
             # Wait for dashboard to load
-            driver.wait.until(
-                EC.visibility_of_element_located((By.XPATH, "//h1[contains(text(), 'Dashboard')]")
-            )
+            page.dashboard_heading.resolve()
         except Exception as e:
             self.capture_screenshot(driver, "login_failure")
             raise Exception(f"Login failed: {str(e)}")
@@ -118,18 +150,13 @@ class ACDCDeviceManagementTests:
         Args:
             driver: WebDriver instance
         """
+        page = driver.acdc
         try:
             # Click on device management link/button
-            # TODO: Replace text-based locator with stable data-testid
-            device_mgmt_link = driver.wait.until(
-                EC.element_to_be_clickable((By.XPATH, "//a[contains(text(), 'Device Management')]")
-            )
-            device_mgmt_link.click()
+            page.device_management_link.click()
             
             # Wait for device management page to load
-            driver.wait.until(
-                EC.visibility_of_element_located((By.XPATH, "//h1[contains(text(), 'Device Management')]")
-            )
+            page.device_management_heading.resolve()
         except Exception as e:
             self.capture_screenshot(driver, "navigation_failure")
             raise Exception(f"Navigation to device management failed: {str(e)}")
@@ -142,28 +169,18 @@ class ACDCDeviceManagementTests:
             driver: WebDriver instance
             serial_number: Serial number of the device to select
         """
+        page = driver.acdc
         try:
             # Search for the device by serial number if search functionality exists
-            # TODO: Replace with data-testid when available
-            search_field = driver.wait.until(
-                EC.visibility_of_element_located((By.ID, "device-search"))
-            )
-            search_field.clear()
-            search_field.send_keys(serial_number)
+            page.device_search.clear()
+            page.device_search.send_keys(serial_number)
             
             # Click search button if exists
-            # TODO: Replace text-based locator with stable data-testid
-            search_button = driver.wait.until(
-                EC.element_to_be_clickable((By.XPATH, "//button[contains(text(), 'Search')]")
-            )
-            search_button.click()
+            page.search_button.click()
             
             # Wait for search results and click on the device
             # TODO: Replace with more stable locator when available
-            device_row = driver.wait.until(
-                EC.element_to_be_clickable((By.XPATH, f"//tr[contains(., '{serial_number}')]")
-            )
-            device_row.click()
+            page.element((By.XPATH, f"//tr[contains(., '{serial_number}')]"), until=CLICKABLE).click()
         except Exception as e:
             self.capture_screenshot(driver, "device_selection_failure")
             raise Exception(f"Device selection failed: {str(e)}")
@@ -181,43 +198,27 @@ class ACDCDeviceManagementTests:
                 is_editable: Boolean indicating if serial number field is editable
                 error_message: Error message displayed (if any)
         """
+        page = driver.acdc
         try:
             # Click edit button if exists
-            # TODO: Replace text-based locator with stable data-testid
-            edit_button = driver.wait.until(
-                EC.element_to_be_clickable((By.XPATH, "//button[contains(text(), 'Edit')]")
-            )
-            edit_button.click()
-            
-            # Try to find serial number field
-            # TODO: Replace with data-testid when available
-            serial_field = driver.wait.until(
-                EC.presence_of_element_located((By.ID, "serial-number"))
-            )
+            page.edit_button.click()
             
-            # Check if field is disabled
-            is_editable = not serial_field.get_attribute("disabled")
+            # Check if serial number field is disabled
+            is_editable = not page.serial_number.get_attribute("disabled")
             
-            # If editable, try to change it
+            # If editable, try to change it (the field is already resolved)
             error_message = None
             if is_editable:
-                serial_field.clear()
-                serial_field.send_keys(new_serial_number)
+                page.serial_number.clear()
+                page.serial_number.send_keys(new_serial_number)
                 
                 # Try to save changes
-                # TODO: Replace text-based locator with stable data-testid
-                save_button = driver.wait.until(
-                    EC.element_to_be_clickable((By.XPATH, "//button[contains(text(), 'Save')]")
-                )
-                save_button.click()
+                page.save_button.click()
                 
                 # Check for error messages
                 try:
-                    error_element = driver.wait.until(
-                        EC.visibility_of_element_located((By.CLASS_NAME, "error-message"))
-                    )
-                    error_message = error_element.text
-                except:
+                    error_message = page.error_message.text
+                except TimeoutException:
                     # No error message found
                     pass
             
@@ -230,12 +231,17 @@ class ACDCDeviceManagementTests:
         """
         TC-001: Verify that ACDC does not allow any serial number changes for devices.
         """
-        self.login_to_acdc(driver)
-        self.navigate_to_device_management(driver)
-        self.select_device(driver, "SN12345")
+        # Each step is checkpointed; a flaky step is retried from the last
+        # good state instead of rerunning the whole test
+        flow = Flow(driver)
+        flow.step("login", self.login_to_acdc, driver)
+        flow.step("navigate to device management", self.navigate_to_device_management, driver)
+        flow.step("select device", self.select_device, driver, "SN12345")
         
         # Attempt to edit serial number
-        is_editable, error_message = self.attempt_edit_serial_number(driver, "SN12345-NEW")
+        is_editable, error_message = flow.step(
+            "edit serial number", self.attempt_edit_serial_number, driver, "SN12345-NEW"
+        )
         
         # Assert that either the field is not editable or an error message is shown
         assert not is_editable or error_message is not None, "Serial number should not be editable"
\ No newline at end of file
@@ -8,50 +8,43 @@ pytestmark = pytest.mark.skip(
 # -------------------------------------------------------------------
 # Import necessary modules for Selenium automation
 # -------------------------------------------------------------------
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
-import time
+
+from harness import waits as EC
+from harness.pool import default_pool
+from harness.stubserver import route
+from harness.waits import PushWait
 
 # -------------------------------------------------------------------
-# Setup: Initialize the Chrome WebDriver with recommended options
+# Setup: Lease a warm Chrome WebDriver from the shared browser pool
 # -------------------------------------------------------------------
-def create_driver():
-    # Configure Chrome options for headless execution and stability
-    chrome_options = Options()
-    chrome_options.add_argument("--headless")  # Run browser in headless mode
-    chrome_options.add_argument("--no-sandbox")  # Bypass OS security model
-    chrome_options.add_argument("--disable-dev-shm-usage")  # Overcome limited resource problems
-    # Use webdriver_manager to automatically handle chromedriver binary
-    service = Service(ChromeDriverManager().install())
-    driver = webdriver.Chrome(service=service, options=chrome_options)
-    return driver
+def create_driver(pool):
+    # The pool launches headless Chrome on first use and hands out the
+    # same, reset browser on later calls instead of starting a new one;
+    # under --shared-browser it hands out a context of the runner's Chrome
+    return pool.acquire()
 
 # -------------------------------------------------------------------
 # Main Test Function: Replace with actual test steps once scenario is known
 # -------------------------------------------------------------------
-def test_placeholder_scenario():
+def test_placeholder_scenario(browser_pool):
     """
     Placeholder Selenium test.
     Replace this function's contents with actual test steps once
     the Jira ticket description or scenario is available.
     """
-    driver = create_driver()
-    wait = WebDriverWait(driver, 15)  # Explicit wait for element conditions
+    driver = create_driver(browser_pool)
+    wait = PushWait(driver, 15)  # Explicit wait for element conditions
 
     try:
         # -----------------------------------------------------------
         # Actions: Example navigation and interaction
         # -----------------------------------------------------------
         # Navigate to example page (replace with actual URL)
-        driver.get("https://example.com")
-        # Wait for the page to load completely
-        time.sleep(2)
+        driver.get(route("https://example.com"))
+        # Wait for the page to load completely (resolved in-page, no fixed sleep)
+        wait.until(EC.document_ready())
 
         # Example: Find a search box and enter a query
         # (Update locator and action as per real scenario)
@@ -62,8 +55,7 @@ def test_placeholder_scenario():
         search_box.send_keys("Selenium Test")
         # Submit the search form
         search_box.send_keys(Keys.RETURN)
-        # Wait for results to load
-        time.sleep(2)
+        # Results are awaited by the presence check below as soon as they render
 
         # -----------------------------------------------------------
         # Assertions: Example validation (replace with real checks)
@@ -84,13 +76,13 @@ def test_placeholder_scenario():
 
     finally:
         # -----------------------------------------------------------
-        # Teardown: Ensure browser is closed after test execution
+        # Teardown: Return the browser to the pool for the next test
         # -----------------------------------------------------------
-        driver.quit()
+        browser_pool.release(driver)
 
 # -------------------------------------------------------------------
 # Entry point for standalone execution
 # -------------------------------------------------------------------
 if __name__ == "__main__":
-    # Run the placeholder test function directly
-    test_placeholder_scenario()
+    # Run the placeholder test function directly on the process-wide pool
+    test_placeholder_scenario(default_pool())
@@ -1,22 +1,8 @@
 import pytest
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
 
 
 @pytest.fixture
-def driver():
-    chrome_options = Options()
-    chrome_options.add_argument("--headless=new")
-    chrome_options.add_argument("--no-sandbox")
-    chrome_options.add_argument("--disable-dev-shm-usage")
-
-    driver = webdriver.Chrome(
-        service=Service(ChromeDriverManager().install()),
-        options=chrome_options
-    )
-
-    driver.set_window_size(1920, 1080)
-    yield driver
-    driver.quit()
+def driver(pooled_driver):
+    # Browsers come from the session pool in the root conftest, already
+    # headless and sized to 1920x1080 at launch
+    return pooled_driver
@@ -0,0 +1,76 @@
+"""
+In-memory stand-ins for WebDriver objects, for unit tests that must not
+launch a real browser.
+"""
+from selenium.common.exceptions import NoAlertPresentException, WebDriverException
+
+
+class FakeSwitchTo:
+    def __init__(self, driver):
+        self._driver = driver
+
+    @property
+    def alert(self):
+        if not self._driver.alert_open:
+            raise NoAlertPresentException()
+        return FakeAlert(self._driver)
+
+    def window(self, handle):
+        self._driver.current_window_handle = handle
+
+
+class FakeAlert:
+    def __init__(self, driver):
+        self._driver = driver
+
+    def dismiss(self):
+        self._driver.alert_open = False
+
+    def accept(self):
+        self._driver.alert_open = False
+
+
+class FakeDriver:
+    """Records the commands it receives and keeps just enough state."""
+
+    def __init__(self):
+        self.commands = []
+        self.alert_open = False
+        self.window_handles = ["main"]
+        self.current_window_handle = "main"
+        self.current_url = "about:blank"
+        self.cookies = []
+        self.timeouts = None
+        self.broken = False
+        self.quit_called = False
+        self.switch_to = FakeSwitchTo(self)
+
+    def _record(self, name, *args):
+        if self.broken:
+            raise WebDriverException("browser is gone")
+        self.commands.append((name,) + args)
+
+    def close(self):
+        self._record("close", self.current_window_handle)
+        self.window_handles.remove(self.current_window_handle)
+
+    def execute_script(self, script, *args):
+        self._record("execute_script", script)
+        return "complete"
+
+    def execute_cdp_cmd(self, cmd, params):
+        self._record("execute_cdp_cmd", cmd)
+        if cmd == "Network.clearBrowserCookies":
+            self.cookies = []
+        return {}
+
+    def delete_all_cookies(self):
+        self._record("delete_all_cookies")
+        self.cookies = []
+
+    def get(self, url):
+        self._record("get", url)
+        self.current_url = url
+
+    def quit(self):
+        self.quit_called = True
@@ -0,0 +1,206 @@
+import asyncio
+import json
+import time
+
+import pytest
+from selenium.common.exceptions import NoSuchElementException, TimeoutException
+from selenium.webdriver.common.by import By
+
+from harness import waits as EC
+from harness.aio import ELEMENT_KEY, AsyncBrowserPool, AsyncDriver, AsyncWait, run_many, w3c_locator
+
+
+class FakeChromedriver:
+    """Minimal W3C endpoint on asyncio streams; navigations can be slowed down."""
+
+    def __init__(self, navigation_delay=0.0, drop=None):
+        self.navigation_delay = navigation_delay
+        # (method, command) whose first request is read and then left
+        # unanswered with the connection closed
+        self.drop = drop
+        self.requests = []
+        self.sessions = 0
+        self.server = None
+        self.url = None
+
+    async def __aenter__(self):
+        self.server = await asyncio.start_server(self._serve, "127.0.0.1", 0)
+        self.url = "http://127.0.0.1:%d" % self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def __aexit__(self, *exc):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _serve(self, reader, writer):
+        # Keep-alive: answer requests until the client hangs up
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            method, path, _ = request_line.decode().split(" ", 2)
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line == b"\r\n":
+                    break
+                name, _, value = line.decode().partition(":")
+                if name.lower() == "content-length":
+                    length = int(value)
+            body = json.loads(await reader.readexactly(length)) if length else None
+            self.requests.append((method, path, body))
+            if self.drop is not None and (method, path.rsplit("/", 1)[-1]) == self.drop:
+                self.drop = None
+                break
+            status, payload = await self._handle(method, path, body)
+            data = json.dumps({"value": payload}).encode()
+            writer.write(b"HTTP/1.1 %d OK\r\nContent-Type: application/json\r\nContent-Length: %d\r\n\r\n"
+                         % (status, len(data)) + data)
+            await writer.drain()
+        writer.close()
+
+    async def _handle(self, method, path, body):
+        if path == "/session":
+            self.sessions += 1
+            return 200, {"sessionId": f"s{self.sessions}", "capabilities": {}}
+        command = path.split("/", 3)[3] if path.count("/") >= 3 else ""
+        if command == "url" and method == "POST":
+            await asyncio.sleep(self.navigation_delay)
+            return 200, None
+        if command == "element":
+            if "missing" in body["value"]:
+                return 404, {"error": "no such element", "message": "missing", "stacktrace": ""}
+            return 200, {ELEMENT_KEY: "e1"}
+        if command == "execute/async":
+            return 200, {"value": [{ELEMENT_KEY: "e2"}]}
+        if command == "window/handles":
+            return 200, ["w1"]
+        return 200, None
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_legacy_strategies_are_sent_as_css():
+    assert w3c_locator(By.ID, "nava") == (By.CSS_SELECTOR, '[id="nava"]')
+    assert w3c_locator(By.NAME, "q") == (By.CSS_SELECTOR, '[name="q"]')
+    assert w3c_locator(By.XPATH, "//a") == (By.XPATH, "//a")
+    # Quotes and backslashes are escaped, not left to break the selector
+    assert w3c_locator(By.ID, 'a"b\\c') == (By.CSS_SELECTOR, '[id="a\\"b\\\\c"]')
+
+
+def test_commands_round_trip_with_elements():
+    async def scenario():
+        async with FakeChromedriver() as server:
+            driver = AsyncDriver(server.url, "s1")
+            element = await driver.find_element(By.ID, "nava")
+            await element.click()
+            await driver.execute_script("return arguments[0]", element)
+            await driver.quit()
+            return element, server.requests
+
+    element, requests = run(scenario())
+    assert element.id == "e1"
+    assert requests[0] == ("POST", "/session/s1/element", {"using": "css selector", "value": '[id="nava"]'})
+    assert requests[1] == ("POST", "/session/s1/element/e1/click", {})
+    assert requests[2][2]["args"] == [{ELEMENT_KEY: "e1"}]
+    assert requests[3][:2] == ("DELETE", "/session/s1")
+
+
+def test_w3c_errors_raise_selenium_exceptions():
+    async def scenario():
+        async with FakeChromedriver() as server:
+            await AsyncDriver(server.url, "s1").find_element(By.ID, "missing")
+
+    with pytest.raises(NoSuchElementException):
+        run(scenario())
+
+
+def test_wait_resolves_dom_conditions_in_the_page():
+    async def scenario():
+        async with FakeChromedriver() as server:
+            driver = AsyncDriver(server.url, "s1")
+            found = await AsyncWait(driver, 5).until(EC.presence_of_all_elements_located((By.CSS_SELECTOR, "tr")))
+            return found, server.requests
+
+    found, requests = run(scenario())
+    assert [element.id for element in found] == ["e2"]
+    assert [path for _, path, _ in requests] == ["/session/s1/execute/async"]
+
+
+def test_polled_conditions_time_out():
+    async def never(driver):
+        return False
+
+    async def scenario():
+        async with FakeChromedriver() as server:
+            await AsyncWait(AsyncDriver(server.url, "s1"), 0.2, poll_frequency=0.05).until(never)
+
+    with pytest.raises(TimeoutException):
+        run(scenario())
+
+
+def test_requests_already_sent_are_resent_only_when_idempotent():
+    async def main(method):
+        async with FakeChromedriver(drop=(method, "url")) as server:
+            driver = AsyncDriver(server.url, "s1")
+            await driver.command("GET", "/title")
+            try:
+                await driver.command(method, "/url")
+                error = None
+            except ConnectionError as e:
+                error = e
+            await driver._connection.close()
+            return [request[:2] for request in server.requests], error
+
+    # The server may already have navigated, so the POST is not repeated
+    requests, error = run(main("POST"))
+    assert isinstance(error, ConnectionError)
+    assert requests == [("GET", "/session/s1/title"), ("POST", "/session/s1/url")]
+
+    requests, error = run(main("GET"))
+    assert error is None
+    assert requests.count(("GET", "/session/s1/url")) == 2
+
+
+def test_navigations_of_different_sessions_overlap():
+    async def scenario(driver):
+        await driver.get("http://127.0.0.1/")
+
+    async def main():
+        async with FakeChromedriver(navigation_delay=0.3) as server:
+            pool = AsyncBrowserPool(max_size=4, url=server.url)
+            started = time.perf_counter()
+            results = await run_many(scenario, count=4, pool=pool)
+            elapsed = time.perf_counter() - started
+            await pool.close()
+            return results, elapsed, pool.stats
+
+    results, elapsed, stats = run(main())
+    assert all(result["error"] is None for result in results)
+    assert elapsed < 0.9  # four sequential navigations would take 1.2s
+    assert stats["created"] == 4
+
+
+def test_pool_reuses_sessions_and_reports_failures():
+    async def scenario(driver):
+        await driver.find_element(By.ID, "missing")
+
+    async def main():
+        async with FakeChromedriver() as server:
+            pool = AsyncBrowserPool(max_size=1, url=server.url)
+            results = await run_many(scenario, count=3, pool=pool)
+            await pool.close()
+            return results, pool.stats
+
+    results, stats = run(main())
+    assert all("NoSuchElementException" in result["error"] for result in results)
+    assert stats == {"created": 1, "reused": 2, "recycled": 0}
+
+
+def test_scenarios_are_found_by_name_or_path():
+    from harness import aio, aio_scenarios
+
+    assert aio.load_scenario("ecommerce") is aio_scenarios.ecommerce
+    assert aio.load_scenario("harness.aio_scenarios:acdc") is aio_scenarios.acdc
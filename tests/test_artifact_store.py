@@ -0,0 +1,82 @@
+import base64
+import os
+
+from harness.artifact_store import ArtifactStore
+from harness.artifacts import ArtifactWriter
+from harness.steps import step
+
+
+def blob_files(store):
+    return sorted(name for _, _, files in os.walk(os.path.join(store.root, "blobs")) for name in files)
+
+
+def test_identical_content_is_stored_once_and_indexed_per_test(tmp_path):
+    store = ArtifactStore(root=str(tmp_path), run="run-1")
+    first = store.put(b"<html>" * 100, "page.html", kind="page_source", test="t.py::test_a", step="login")
+    store.put(b"<html>" * 100, "page.html", kind="page_source", test="t.py::test_b", step="login")
+    store.put(b"other", "log.txt", kind="log", test="t.py::test_a")
+
+    assert len(blob_files(store)) == 2
+    assert store.stats["duplicates"] == 1
+    rows = store.artifacts(test="t.py::test_a")
+    assert [(row["name"], row["step"], row["run"]) for row in rows] == [
+        ("page.html", "login", "run-1"), ("log.txt", None, "run-1")]
+    # Text is compressed on disk and read back as written
+    assert first["encoding"] == "gzip" and first["stored_size"] < first["size"]
+    assert store.read(first) == b"<html>" * 100
+
+
+def test_streamed_writes_appear_only_when_complete(tmp_path):
+    store = ArtifactStore(root=str(tmp_path))
+    with store.open_write("trace.png", kind="screenshot") as writer:
+        writer.write(b"\x89PNG")
+        assert store.artifacts() == [] and blob_files(store) == []
+        writer.write(b"rest")
+    assert writer.artifact["encoding"] == "identity"
+    assert store.read(writer.artifact) == b"\x89PNGrest"
+
+    try:
+        with store.open_write("broken.log") as writer:
+            writer.write(b"partial")
+            raise RuntimeError("capture failed")
+    except RuntimeError:
+        pass
+    assert [row["name"] for row in store.artifacts()] == ["trace.png"]
+    assert os.listdir(os.path.join(str(tmp_path), "tmp")) == []
+
+
+def test_expired_artifacts_and_their_blobs_are_pruned(tmp_path):
+    store = ArtifactStore(root=str(tmp_path), max_age=3600)
+    old = store.put(b"old", "old.txt")
+    store.put(b"new", "new.txt")
+    assert store.prune(now=old["created"] + 7200) == 2
+    assert store.artifacts() == [] and blob_files(store) == []
+
+
+def test_oldest_runs_are_evicted_beyond_the_budget(tmp_path):
+    earlier = ArtifactStore(root=str(tmp_path), run="earlier")
+    earlier.put(os.urandom(600), "a.png")
+    current = ArtifactStore(root=str(tmp_path), run="current", max_bytes=1000)
+    current.put(os.urandom(300), "b.png")
+    assert [row["run"] for row in current.artifacts()] == ["earlier", "current"]
+    current.put(os.urandom(300), "c.png")
+    assert [row["name"] for row in current.artifacts()] == ["b.png", "c.png"]
+    assert current.stored_bytes() == 600 and current.stats["evicted"] == 1
+
+
+def test_writer_records_screenshots_with_test_and_step(tmp_path):
+    store = ArtifactStore(root=str(tmp_path))
+    writer = ArtifactWriter(store=store)
+
+    class ScreenshotDriver:
+        def get_screenshot_as_base64(self):
+            return base64.b64encode(b"png").decode()
+
+    with step("submit"):
+        name = writer.screenshot(ScreenshotDriver(), "login_failure")
+    writer.close()
+    test = os.environ["PYTEST_CURRENT_TEST"].rsplit(" ", 1)[0]
+    (row,) = store.artifacts(test=test)
+    assert name == row["name"] == "login_failure.png"
+    assert (row["kind"], row["step"]) == ("screenshot", "submit")
+    assert store.read(row) == b"png" and writer.stats["written"] == 1
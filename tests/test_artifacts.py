@@ -0,0 +1,69 @@
+import base64
+import os
+import threading
+
+from harness.artifacts import ArtifactWriter
+
+
+class ScreenshotDriver:
+    def __init__(self, png):
+        self.png = png
+
+    def get_screenshot_as_base64(self):
+        return base64.b64encode(self.png).decode()
+
+
+def test_screenshot_is_written_off_the_test_thread(tmp_path):
+    writer = ArtifactWriter(directory=str(tmp_path))
+    threads = []
+    release = threading.Event()
+
+    def produce():
+        threads.append(threading.current_thread())
+        release.wait(5)
+        return b"png"
+
+    future = writer.submit(str(tmp_path / "a.png"), produce)
+    # The caller is not blocked by the (stalled) write
+    assert not future.done()
+    release.set()
+    writer.close()
+    assert threads[0] is not threading.current_thread()
+    assert (tmp_path / "a.png").read_bytes() == b"png"
+
+
+def test_identical_images_are_stored_once(tmp_path):
+    writer = ArtifactWriter(directory=str(tmp_path))
+    first = writer.screenshot(ScreenshotDriver(b"same"), "login_failure")
+    writer.flush()
+    writer.screenshot(ScreenshotDriver(b"same"), "navigation_failure")
+    writer.screenshot(ScreenshotDriver(b"other"), "edit_serial_failure")
+    writer.close()
+    names = sorted(os.listdir(tmp_path))
+    assert len(names) == 2 and os.path.basename(first) in names
+    assert writer.stats["duplicates"] == 1 and writer.stats["written"] == 2
+
+
+def test_oldest_files_are_evicted_beyond_the_budget(tmp_path):
+    old = tmp_path / "old.png"
+    old.write_bytes(b"x" * 60)
+    os.utime(old, (1, 1))
+    writer = ArtifactWriter(directory=str(tmp_path), max_bytes=100)
+    writer.submit(str(tmp_path / "new1.png"), lambda: b"a" * 40).result()
+    assert old.exists()
+    writer.submit(str(tmp_path / "new2.png"), lambda: b"b" * 40).result()
+    writer.close()
+    assert not old.exists()
+    assert sorted(os.listdir(tmp_path)) == ["new1.png", "new2.png"]
+    assert writer.stats["evicted"] == 1
+
+
+def test_failed_writes_are_logged(tmp_path, caplog):
+    writer = ArtifactWriter(directory=str(tmp_path))
+
+    def produce():
+        raise OSError("disk full")
+
+    writer.submit(str(tmp_path / "a.png"), produce)
+    writer.close()
+    assert "Could not write artifact: disk full" in caplog.text
@@ -0,0 +1,65 @@
+import pytest
+from selenium.common.exceptions import (
+    ElementNotInteractableException,
+    InvalidSelectorException,
+    NoSuchElementException,
+)
+from selenium.webdriver.common.by import By
+
+from harness.batch import clear, click, fill, perform, read_all, texts
+
+
+class ScriptDriver:
+    def __init__(self, result):
+        self.result = result
+        self.calls = []
+
+    def execute_script(self, script, *args):
+        self.calls.append(args)
+        return self.result
+
+
+def test_read_all_is_one_script_call():
+    driver = ScriptDriver({"items": [
+        {"text": "MacBook Pro", "visible": True, "attributes": {}},
+        {"text": "", "visible": False, "attributes": {}},
+    ]})
+    assert texts(driver, (By.XPATH, "//tr[@class='success']//td[2]")) == ["MacBook Pro", ""]
+    assert driver.calls == [("xpath", "//tr[@class='success']//td[2]", [], False)]
+
+
+def test_read_all_passes_attributes_and_element_flag():
+    driver = ScriptDriver({"items": []})
+    read_all(driver, (By.ID, "cart"), attributes=("href", "disabled"), with_elements=True)
+    assert driver.calls == [("css selector", '[id="cart"]', ["href", "disabled"], True)]
+
+
+def test_read_all_reports_bad_selectors():
+    with pytest.raises(InvalidSelectorException):
+        read_all(ScriptDriver({"error": "bad xpath"}), (By.XPATH, "//tr["))
+
+
+def test_perform_sends_all_actions_at_once():
+    driver = ScriptDriver({"done": 3})
+    perform(driver, [
+        fill((By.ID, "email"), "user@example.com"),
+        clear((By.ID, "password")),
+        click((By.XPATH, "//button[@type='submit']")),
+    ])
+    (payload,), = driver.calls
+    assert [(a["type"], a["strategy"], a["text"]) for a in payload] == [
+        ("fill", "css selector", "user@example.com"),
+        ("clear", "css selector", None),
+        ("click", "xpath", None),
+    ]
+
+
+@pytest.mark.parametrize("error, exception", [
+    ("missing", NoSuchElementException),
+    ("not_interactable", ElementNotInteractableException),
+    ("invalid", InvalidSelectorException),
+])
+def test_perform_maps_script_errors(error, exception):
+    driver = ScriptDriver({"done": 1, "error": error, "message": "password"})
+    with pytest.raises(exception):
+        perform(driver, [fill((By.ID, "email"), "x"), fill((By.ID, "password"), "y")])
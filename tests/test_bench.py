@@ -0,0 +1,46 @@
+import json
+import urllib.request
+
+import pytest
+
+from harness import bench
+
+
+def test_percentiles_interpolate():
+    samples = [1.0, 2.0, 3.0, 4.0, 5.0]
+    assert bench.percentile(samples, 50) == 3.0
+    assert bench.percentile(samples, 90) == pytest.approx(4.6)
+    summary = bench.summarize(samples)
+    assert (summary["n"], summary["min"], summary["max"], summary["mean"]) == (5, 1.0, 5.0, 3.0)
+
+
+def test_select_by_prefix():
+    names = list(bench.BENCHMARKS)
+    assert bench.select(names, ["locator"]) == [n for n in names if n.startswith("locator.")]
+    assert bench.select(names, ["wait.push", "navigation"]) == ["navigation", "wait.push"]
+    assert bench.select(names, None) == names
+
+
+def test_compare_flags_regressions_beyond_threshold():
+    baseline = {"results": {"navigation": {"p50": 0.100}, "wait.push": {"p50": 0.010}, "gone": {"p50": 1}}}
+    current = {"results": {"navigation": {"p50": 0.110}, "wait.push": {"p50": 0.020}, "new": {"p50": 1}}}
+    rows = {row["name"]: row for row in bench.compare(baseline, current, threshold=0.15)}
+    assert set(rows) == {"navigation", "wait.push"}
+    assert not rows["navigation"]["regression"]
+    assert rows["wait.push"]["regression"] and rows["wait.push"]["change"] == pytest.approx(1.0)
+
+
+def test_compare_mode_exit_status(tmp_path, capsys):
+    base, now = tmp_path / "base.json", tmp_path / "now.json"
+    base.write_text(json.dumps({"results": {"navigation": {"p50": 0.1}}}))
+    now.write_text(json.dumps({"results": {"navigation": {"p50": 0.2}}}))
+    assert bench.main(["--compare", str(base), str(now)]) == 1
+    assert "REGRESSION" in capsys.readouterr().out
+    assert bench.main(["--compare", str(base), str(now), "--threshold", "1.5"]) == 0
+
+
+def test_fixture_site_serves_the_store():
+    with bench.fixture_site() as base_url:
+        with urllib.request.urlopen(base_url + "/", timeout=5) as response:
+            page = response.read().decode()
+    assert 'id="nava"' in page and 'data-index="499"' in page
@@ -0,0 +1,131 @@
+import pytest
+from selenium.common.exceptions import NoSuchElementException, TimeoutException, WebDriverException
+
+from harness import checkpoints
+from harness.checkpoints import Flow, is_retryable
+
+
+class Browser:
+    """Fake browser with a URL, CDP cookies and storage."""
+
+    def __init__(self):
+        self.current_url = "about:blank"
+        self.cookies = []
+        self.storage = {"local": {}, "session": {}}
+        self.resets = 0
+        self.alert_open = False
+
+    def get(self, url):
+        self.current_url = url
+
+    def execute_cdp_cmd(self, cmd, params):
+        if cmd == "Network.getAllCookies":
+            return {"cookies": list(self.cookies)}
+        self.cookies = list(params["cookies"])
+        return {}
+
+    def execute_script(self, script, *args):
+        if self.alert_open:
+            raise WebDriverException("unexpected alert open")
+        if args:
+            self.storage = args[0]
+            return None
+        return self.storage
+
+
+def reset(browser):
+    browser.resets += 1
+    browser.current_url, browser.cookies = "about:blank", []
+    browser.storage = {"local": {}, "session": {}}
+
+
+def flaky(failures, error=TimeoutException("slow")):
+    calls = []
+
+    def action(browser):
+        calls.append((browser.current_url, list(browser.cookies)))
+        if len(calls) <= failures:
+            raise error
+        return "done"
+    action.calls = calls
+    return action
+
+
+def login(browser):
+    browser.get("https://app.test/dashboard")
+    browser.cookies = [{"name": "sid", "value": "s1"}]
+
+
+@pytest.fixture(autouse=True)
+def stats(monkeypatch):
+    # Keep these retries out of the run's own report
+    monkeypatch.setattr(checkpoints, "_stats", {"retries": 0, "recovered": 0, "seconds_saved": 0.0})
+    monkeypatch.setattr(checkpoints, "_events", [])
+
+
+@pytest.fixture
+def browser():
+    return Browser()
+
+
+def test_failed_step_resumes_from_the_last_checkpoint(browser):
+    flow = Flow(browser, retries=1, test="t", reset=reset)
+    flow.step("login", login, browser)
+    edit = flaky(1)
+    assert flow.step("edit", edit, browser) == "done"
+    # The retry ran in a reset browser with the checkpoint restored, login did not run again
+    assert browser.resets == 1
+    assert edit.calls[1] == ("https://app.test/dashboard", [{"name": "sid", "value": "s1"}])
+    assert [name for name, _ in flow.completed] == ["login", "edit"]
+
+
+def test_retry_budget_is_per_flow(browser):
+    flow = Flow(browser, retries=1, test="t", reset=reset)
+    flow.step("first", flaky(1), browser)
+    with pytest.raises(TimeoutException):
+        flow.step("second", flaky(1), browser)
+
+
+def test_assertions_are_not_retried_even_when_wrapped(browser):
+    flow = Flow(browser, retries=3, test="t", reset=reset)
+    try:
+        try:
+            assert False, "serial number changed"
+        except AssertionError:
+            raise Exception("edit failed")
+    except Exception as wrapped:
+        error = wrapped
+    assert not is_retryable(error)
+    with pytest.raises(Exception, match="edit failed"):
+        flow.step("edit", flaky(1, error), browser)
+    assert browser.resets == 0
+
+
+def test_wrapped_webdriver_errors_are_retried():
+    try:
+        try:
+            raise NoSuchElementException("gone")
+        except NoSuchElementException as e:
+            raise Exception(f"Device selection failed: {e}")
+    except Exception as wrapped:
+        assert is_retryable(wrapped)
+
+
+def test_no_resume_past_a_step_that_could_not_be_checkpointed(browser):
+    flow = Flow(browser, retries=2, test="t", reset=reset)
+    flow.step("login", login, browser)
+    flow.step("open alert", lambda: setattr(browser, "alert_open", True))
+    browser.alert_open = False
+    with pytest.raises(TimeoutException):
+        flow.step("edit", flaky(1), browser)
+    assert browser.resets == 0
+
+
+def test_retries_are_reported_with_time_saved(browser):
+    flow = Flow(browser, retries=1, test="t", reset=reset)
+    flow.step("login", login, browser)
+    flow.completed[0] = ("login", 4.0)
+    flow.step("edit", flaky(1), browser)
+    assert checkpoints.retry_stats() == {"retries": 1, "recovered": 1, "seconds_saved": 4.0}
+    (event,) = checkpoints.retry_report()
+    assert event["step"] == "edit" and event["recovered"] and event["error"].startswith("TimeoutException")
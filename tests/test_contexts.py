@@ -0,0 +1,175 @@
+import logging
+import os
+
+import pytest
+from selenium.common.exceptions import NoSuchElementException, NoSuchWindowException, TimeoutException
+from selenium.webdriver.common.by import By
+
+from harness.contexts import ContextDriver, ContextPool
+
+
+class FakeSession:
+    """One chromedriver session, shared by every ContextDriver in a test."""
+
+    def __init__(self):
+        self.calls = []
+        self.windows = ["anchor"]
+        self.current = "anchor"
+        self.contexts = 0
+        self.ready_states = []
+        self.missing_finds = 0
+
+    def execute(self, command, params):
+        params = {k: v for k, v in params.items() if k != "sessionId"}
+        self.calls.append((self.current, command, params))
+        if command == "executeCdpCommand":
+            if params["cmd"] == "Target.createBrowserContext":
+                self.contexts += 1
+                return {"value": {"browserContextId": f"ctx{self.contexts}"}}
+            if params["cmd"] == "Target.createTarget":
+                target = f"T{len(self.windows)}"
+                self.windows.append(target)
+                return {"value": {"targetId": target}}
+            return {"value": {}}
+        if command == "w3cGetWindowHandles":
+            return {"value": list(self.windows)}
+        if command == "switchToWindow":
+            self.current = params["handle"]
+        if command == "w3cExecuteScript" and "readyState" in params["script"]:
+            state = self.ready_states.pop(0) if self.ready_states else "complete"
+            return {"value": {"fresh": True, "state": state, "href": "about:blank"}}
+        if command == "findElement":
+            if self.missing_finds:
+                self.missing_finds -= 1
+                raise NoSuchElementException("not yet")
+            return {"value": {"element-6066-11e4-a52e-4f735466cecf": "e1"}}
+        return {"value": None}
+
+    def close(self):
+        pass
+
+    def sent(self, command):
+        return [(window, params) for window, name, params in self.calls if name == command]
+
+
+@pytest.fixture
+def session(tmp_path):
+    fake = FakeSession()
+    spec = {"url": "http://127.0.0.1:9515", "session": "S", "anchor": "anchor",
+            "state": str(tmp_path / "session.json")}
+
+    def open_context(**kwargs):
+        return ContextDriver(spec, page_load_strategy="eager", command_executor=fake, **kwargs)
+
+    fake.open_context = open_context
+    fake.spec = spec
+    return fake
+
+
+def test_each_context_gets_its_own_window(session):
+    first, second = session.open_context(), session.open_context()
+    assert first.session_id == second.session_id == "S"
+    assert first.window_handles == ["T1"] and second.window_handles == ["T2"]
+    assert first.context_id != second.context_id
+
+
+def test_commands_run_in_the_context_window(session):
+    first, second = session.open_context(), session.open_context()
+    session.calls.clear()
+    first.title
+    first.title
+    second.title
+    # The session is only switched when another context used it last
+    assert [window for window, name, _ in session.calls if name == "getTitle"] == ["T1", "T1", "T2"]
+    assert len(session.sent("switchToWindow")) == 2
+
+
+def test_another_process_switching_forces_a_switch_back(session):
+    driver = session.open_context()
+    driver.title
+    session.calls.clear()
+    driver.title
+    assert session.sent("switchToWindow") == []
+    # What a worker process leaves in the lock file after switching the session
+    with open(session.spec["state"] + ".lock", "r+b") as lock:
+        lock.write(b"other-process".ljust(64))
+    session.current = "anchor"
+    driver.title
+    assert [window for window, name, _ in session.calls if name == "getTitle"] == ["T1", "T1"]
+    assert len(session.sent("switchToWindow")) == 1 and len(session.sent("setTimeouts")) == 1
+    assert not os.path.exists(session.spec["state"])
+
+
+def test_foreign_windows_are_not_reachable(session):
+    first, second = session.open_context(), session.open_context()
+    with pytest.raises(NoSuchWindowException):
+        first.switch_to.window(second.current_window_handle)
+
+
+def test_timeouts_stay_local_to_the_context(session):
+    first, second = session.open_context(), session.open_context()
+    first.implicitly_wait(2)
+    assert first.timeouts.implicit_wait == 2
+    assert second.timeouts.implicit_wait == 0
+    assert all(params.get("implicit") is None for _, params in session.sent("setTimeouts"))
+
+
+def test_implicit_wait_is_retried_on_the_client(session):
+    driver = session.open_context()
+    driver.implicitly_wait(5)
+    session.missing_finds = 2
+    assert driver.find_element(By.ID, "nava").id == "e1"
+    assert len(session.sent("findElement")) == 3
+
+
+def test_navigation_waits_for_the_new_document(session):
+    driver = session.open_context()
+    session.ready_states = ["loading", "loading", "interactive"]
+    driver.get("http://127.0.0.1:8000/")
+    assert session.ready_states == []
+    assert session.sent("get")[0][0] == "T1"
+
+
+def test_navigation_times_out_at_the_page_load_timeout(session):
+    driver = session.open_context()
+    driver.set_page_load_timeout(0)
+    session.ready_states = ["loading"] * 10
+    with pytest.raises(TimeoutException):
+        driver.get("http://127.0.0.1:8000/")
+
+
+def test_quit_disposes_the_context_and_parks_the_session(session):
+    driver = session.open_context()
+    driver.quit()
+    window, params = session.sent("executeCdpCommand")[-1]
+    assert params == {"cmd": "Target.disposeBrowserContext", "params": {"browserContextId": "ctx1"}}
+    assert window == "anchor"
+
+
+def test_context_pool_hands_out_a_fresh_context_per_lease(session):
+    pool = ContextPool(session.spec, factory=lambda spec: session.open_context())
+    acquired, released = [], []
+    pool.on_acquire.append(acquired.append)
+    pool.on_release.append(released.append)
+    with pool.lease() as first:
+        pass
+    with pool.lease() as second:
+        pass
+    assert first is not second
+    assert acquired == released == [first, second]
+    assert pool.stats["created"] == 2
+    assert first.context_id is None and second.context_id is None
+
+
+def test_failing_release_hooks_are_logged(session, caplog):
+    pool = ContextPool(session.spec, factory=lambda spec: session.open_context())
+
+    def broken(driver):
+        raise RuntimeError("hook failed")
+
+    pool.on_release.append(broken)
+    with caplog.at_level(logging.WARNING, logger="harness.contexts"):
+        with pool.lease() as driver:
+            pass
+    assert "hook failed" in caplog.text
+    assert driver.context_id is None
@@ -0,0 +1,94 @@
+import json
+import os
+
+import pytest
+
+from harness.driver_binary import UNKNOWN_BUILD, DriverBinaryResolver, DriverResolutionError
+
+
+@pytest.fixture
+def driver_file(tmp_path):
+    path = tmp_path / "chromedriver"
+    path.write_text("")
+    return str(path)
+
+
+@pytest.fixture(autouse=True)
+def no_explicit_binary(monkeypatch):
+    monkeypatch.delenv("HARNESS_CHROMEDRIVER", raising=False)
+
+
+def make_resolver(tmp_path, installer, build="126.0.6478.126"):
+    return DriverBinaryResolver(
+        cache_file=str(tmp_path / "cache" / "chromedriver.json"),
+        installer=installer,
+        build_detector=lambda: build,
+    )
+
+
+def test_resolves_once_per_process(tmp_path, driver_file):
+    calls = []
+    resolver = make_resolver(tmp_path, lambda: calls.append(1) or driver_file)
+    assert resolver.path() == driver_file
+    assert resolver.path() == driver_file
+    assert len(calls) == 1
+    assert resolver.stats["misses"] == 1
+    assert resolver.stats["hits"] == 1
+
+
+def test_disk_cache_is_keyed_by_chrome_build(tmp_path, driver_file):
+    calls = []
+    installer = lambda: calls.append(1) or driver_file
+    make_resolver(tmp_path, installer).path()
+    make_resolver(tmp_path, installer).path()
+    make_resolver(tmp_path, installer, build="127.0.0.1").path()
+    assert len(calls) == 2
+    with open(tmp_path / "cache" / "chromedriver.json") as f:
+        assert set(json.load(f)) == {"126.0.6478.126", "127.0.0.1"}
+
+
+def test_warm_cache_works_offline(tmp_path, driver_file, monkeypatch):
+    make_resolver(tmp_path, lambda: driver_file).path()
+    monkeypatch.setenv("HARNESS_OFFLINE", "1")
+
+    def no_network():
+        raise AssertionError("installer must not run offline")
+
+    resolver = make_resolver(tmp_path, no_network)
+    assert resolver.path() == driver_file
+    assert resolver.stats["hits"] == 1
+
+
+def test_cold_cache_offline_uses_explicit_binary(tmp_path, driver_file, monkeypatch):
+    monkeypatch.setenv("HARNESS_OFFLINE", "1")
+    monkeypatch.setenv("HARNESS_CHROMEDRIVER", driver_file)
+    assert make_resolver(tmp_path, None).path() == os.path.abspath(driver_file)
+
+
+def test_cold_cache_offline_without_binary_fails(tmp_path, monkeypatch):
+    monkeypatch.setenv("HARNESS_OFFLINE", "1")
+    monkeypatch.delenv("HARNESS_CHROMEDRIVER", raising=False)
+    monkeypatch.setenv("PATH", str(tmp_path))
+    with pytest.raises(DriverResolutionError):
+        make_resolver(tmp_path, None).path()
+
+
+def test_explicit_binary_overrides_the_cache_and_is_not_stored(tmp_path, driver_file, monkeypatch):
+    other = tmp_path / "other-chromedriver"
+    other.write_text("")
+    make_resolver(tmp_path, lambda: driver_file).path()
+    monkeypatch.setenv("HARNESS_CHROMEDRIVER", str(other))
+    assert make_resolver(tmp_path, None).path() == str(other)
+    with open(tmp_path / "cache" / "chromedriver.json") as f:
+        assert [entry["path"] for entry in json.load(f).values()] == [driver_file]
+    monkeypatch.delenv("HARNESS_CHROMEDRIVER")
+    assert make_resolver(tmp_path, None).path() == driver_file
+
+
+def test_undetected_chrome_build_is_not_cached(tmp_path, driver_file):
+    calls = []
+    installer = lambda: calls.append(1) or driver_file
+    make_resolver(tmp_path, installer, build=UNKNOWN_BUILD).path()
+    make_resolver(tmp_path, installer, build=UNKNOWN_BUILD).path()
+    assert len(calls) == 2
+    assert not os.path.exists(tmp_path / "cache" / "chromedriver.json")
@@ -0,0 +1,117 @@
+import json
+
+import pytest
+
+from harness.generate import Pipeline, iter_tickets, module_name, ticket_hash
+
+
+def feed(*tickets):
+    return [json.dumps(ticket) + "\n" for ticket in tickets]
+
+
+@pytest.fixture
+def pipeline(tmp_path):
+    calls = []
+
+    def generator(ticket):
+        calls.append(ticket["id"])
+        return f"# {ticket['title']}\n"
+
+    pipe = Pipeline(str(tmp_path / "out"), generator, "test-1", cache=str(tmp_path / "cache"))
+    (tmp_path / "out").mkdir()
+    pipe.calls = calls
+    return pipe
+
+
+def test_hash_ignores_key_order_but_not_generator():
+    assert ticket_hash({"id": "a", "title": "x"}, "g") == ticket_hash({"title": "x", "id": "a"}, "g")
+    assert ticket_hash({"id": "a"}, "g1") != ticket_hash({"id": "a"}, "g2")
+
+
+def test_module_names():
+    assert module_name({"id": "PROJ-12"}) == "pysel_proj_12.py"
+    assert module_name({"request_id": "x", "module": "pysel55e"}) == "pysel55e.py"
+    for unsafe in ("/tmp/pysel_x", "../pysel_x", "sub/../../pysel_x"):
+        with pytest.raises(ValueError):
+            module_name({"id": "a", "module": unsafe})
+
+
+def test_only_new_or_changed_tickets_are_generated(pipeline, tmp_path):
+    tickets = [{"id": "a", "title": "A"}, {"id": "b", "title": "B"}]
+    assert [r["action"] for r in pipeline.run(feed(*tickets))] == ["generated", "generated"]
+    assert (tmp_path / "out" / "pysel_a.py").read_text() == "# A\n"
+
+    tickets[1]["title"] = "B2"
+    assert [r["action"] for r in pipeline.run(feed(*tickets))] == ["unchanged", "generated"]
+    assert pipeline.calls == ["a", "b", "b"]
+
+
+def test_reverted_ticket_is_restored_from_cache(pipeline, tmp_path):
+    list(pipeline.run(feed({"id": "a", "title": "v1"})))
+    list(pipeline.run(feed({"id": "a", "title": "v2"})))
+    assert [r["action"] for r in pipeline.run(feed({"id": "a", "title": "v1"}))] == ["cached"]
+    assert (tmp_path / "out" / "pysel_a.py").read_text() == "# v1\n"
+    assert pipeline.calls == ["a", "a"]
+
+
+def test_deleted_output_is_rewritten_without_generating(pipeline, tmp_path):
+    list(pipeline.run(feed({"id": "a", "title": "A"})))
+    (tmp_path / "out" / "pysel_a.py").unlink()
+    assert [r["action"] for r in pipeline.run(feed({"id": "a", "title": "A"}))] == ["cached"]
+    assert pipeline.calls == ["a"]
+
+
+def test_results_stream_before_the_feed_is_exhausted(pipeline):
+    consumed = []
+
+    def lines():
+        for index in range(100):
+            consumed.append(index)
+            yield json.dumps({"id": f"t{index}", "title": "x"})
+
+    first = next(pipeline.run(lines(), jobs=2))
+    assert first["id"] == "t0"
+    assert len(consumed) <= 4
+
+
+def test_failures_are_reported_per_ticket(tmp_path):
+    def generator(ticket):
+        if ticket["id"] == "bad":
+            raise RuntimeError("generator crashed")
+        return "# ok\n"
+
+    pipe = Pipeline(str(tmp_path), generator, "test-1", cache=str(tmp_path / "cache"))
+    results = list(pipe.run(feed({"id": "bad"}, {"id": "good"})))
+    assert [r["action"] for r in results] == ["failed", "generated"]
+    assert "generator crashed" in results[0]["error"]
+    # A failed ticket is retried on the next run
+    assert [r["action"] for r in pipe.run(feed({"id": "bad"}))] == ["failed"]
+
+
+def test_prune_removes_modules_of_dropped_tickets(pipeline, tmp_path):
+    list(pipeline.run(feed({"id": "a", "title": "A"}, {"id": "b", "title": "B"})))
+    assert pipeline.prune({"a"}) == [str(tmp_path / "out" / "pysel_b.py")]
+    assert not (tmp_path / "out" / "pysel_b.py").exists()
+
+
+def test_prune_leaves_other_feeds_alone(tmp_path):
+    def pipeline(feed_name):
+        return Pipeline(str(tmp_path / "out"), lambda ticket: "# x\n", "test-1",
+                        cache=str(tmp_path / "cache"), feed=feed_name)
+
+    list(pipeline("a.jsonl").run(feed({"id": "a"})))
+    b = pipeline("b.jsonl")
+    list(b.run(feed({"id": "b"})))
+    assert b.prune({"b"}) == []
+    assert (tmp_path / "out" / "pysel_a.py").exists()
+
+
+def test_unsafe_module_paths_fail_their_ticket(pipeline, tmp_path):
+    results = list(pipeline.run(feed({"id": "x", "title": "X", "module": "../escape"}, {"id": "y", "title": "Y"})))
+    assert [r["action"] for r in results] == ["failed", "generated"]
+    assert not (tmp_path / "escape.py").exists()
+
+
+def test_malformed_lines_name_the_line():
+    with pytest.raises(ValueError, match="line 2"):
+        list(iter_tickets(['{"id": "a"}', "{not json", '{"id": "c"}']))
@@ -0,0 +1,153 @@
+import textwrap
+import threading
+import time
+
+import pytest
+
+from harness.impact import ImpactSelector, ImpactStore, UrlRecorder, page_fingerprint, source_fingerprint
+
+MODULE = """
+    import pytest
+
+    HELPER = 1
+
+    class TestShop:
+        def helper(self):
+            return HELPER
+
+        def test_cart(self):
+            assert self.helper()
+
+        @pytest.mark.slow
+        def test_checkout(self):
+            assert True
+"""
+
+
+@pytest.fixture
+def module(tmp_path):
+    path = tmp_path / "pyselx.py"
+    path.write_text(textwrap.dedent(MODULE))
+    return path
+
+
+def edit(path, old, new):
+    path.write_text(path.read_text().replace(old, new))
+
+
+def test_editing_one_test_keeps_its_neighbours_fingerprint(module):
+    cart = source_fingerprint(str(module), "test_cart", "TestShop")
+    checkout = source_fingerprint(str(module), "test_checkout", "TestShop")
+    edit(module, "assert True", "assert 1")
+    assert source_fingerprint(str(module), "test_cart", "TestShop") == cart
+    assert source_fingerprint(str(module), "test_checkout", "TestShop") != checkout
+
+
+def test_shared_code_changes_every_fingerprint(module):
+    cart = source_fingerprint(str(module), "test_cart", "TestShop")
+    edit(module, "HELPER = 1", "HELPER = 2")
+    assert source_fingerprint(str(module), "test_cart", "TestShop") != cart
+
+
+def test_page_fingerprint_covers_assets():
+    site = {
+        "https://shop.test/": b'<html><script src="/app.js"></script><link rel="stylesheet" href="s.css"></html>',
+        "https://shop.test/app.js": b"v1",
+        "https://shop.test/s.css": b"body{}",
+    }
+    before = page_fingerprint("https://shop.test/", site.__getitem__)
+    site["https://shop.test/app.js"] = b"v2"
+    assert page_fingerprint("https://shop.test/", site.__getitem__) != before
+    assert page_fingerprint("https://gone.test/", site.__getitem__) is None
+
+
+def test_store_is_shared_across_threads(tmp_path):
+    store = ImpactStore(str(tmp_path / "impact.sqlite"))
+
+    def write(index):
+        ImpactStore(store.path).record(f"t{index}", "src", {"https://a/": "h"})
+
+    threads = [threading.Thread(target=write, args=(index,)) for index in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert store.get("t7")["pages"] == {"https://a/": "h"}
+    store.forget("t7")
+    assert store.get("t7") is None
+
+
+@pytest.fixture
+def selector(tmp_path, module):
+    pages = {"https://shop.test/": b"<html>v1</html>"}
+    selector = ImpactSelector(
+        str(tmp_path), ImpactStore(str(tmp_path / "impact.sqlite")), max_age=3600, full=False,
+        fetch=pages.__getitem__,
+    )
+    selector.site = pages
+    selector.source_now = lambda: selector.source(str(module), "test_cart", "TestShop")
+    return selector
+
+
+def rerun(selector):
+    # Page hashes are cached per run; a new run starts with an empty cache
+    selector._pages.clear()
+    return selector.unchanged("pyselx.py::TestShop::test_cart", selector.source_now())
+
+
+def test_unchanged_test_is_skipped_until_its_page_changes(selector):
+    assert not rerun(selector)
+    selector.record("pyselx.py::TestShop::test_cart", selector.source_now(), {"https://shop.test/"}, True)
+    assert rerun(selector)
+    selector.site["https://shop.test/"] = b"<html>v2</html>"
+    assert not rerun(selector)
+
+
+def test_failures_and_unreachable_pages_are_not_recorded(selector):
+    selector.record("pyselx.py::TestShop::test_cart", selector.source_now(), {"https://shop.test/"}, False)
+    assert not rerun(selector)
+    selector.record("pyselx.py::TestShop::test_cart", selector.source_now(), {"https://down.test/"}, True)
+    assert not rerun(selector)
+
+
+def test_full_runs_and_old_passes_run_everything(selector):
+    selector.record("pyselx.py::TestShop::test_cart", selector.source_now(), set(), True)
+    assert rerun(selector)
+    selector.full = True
+    assert not rerun(selector)
+    selector.full = False
+    selector.store.record("pyselx.py::TestShop::test_cart", selector.source_now(), {}, time.time() - 7200)
+    assert not rerun(selector)
+
+
+def test_browser_tests_without_recorded_pages_always_run(selector):
+    selector.record("pyselx.py::TestShop::test_cart", selector.source_now(), set(), True)
+    assert not selector.unchanged("pyselx.py::TestShop::test_cart", selector.source_now(), uses_browser=True)
+
+
+def test_recorder_adds_the_page_a_leased_browser_is_on():
+    class Driver:
+        current_url = "https://shop.test/login"
+
+    recorder = UrlRecorder()
+    driver = Driver()
+    recorder.on_acquire(driver)
+    # Later tests of a class-scoped lease never navigate themselves
+    recorder.test_started("t1")
+    recorder.test_finished()
+    recorder.test_started("t2")
+    driver.current_url = "https://shop.test/account"
+    recorder.test_finished()
+    recorder.on_release(driver)
+    recorder.test_started("t3")
+    assert recorder.urls == {"t1": {"https://shop.test/login"},
+                             "t2": {"https://shop.test/login", "https://shop.test/account"}}
+
+
+def test_recorder_maps_stub_urls_back_to_real_urls():
+    recorder = UrlRecorder()
+    recorder.add("https://ignored.test/")
+    recorder.current_test = "t"
+    recorder.add("http://127.0.0.1:8123/__stub/https/www.demoblaze.com/cart.html")
+    recorder.add("about:blank")
+    assert recorder.urls == {"t": {"https://www.demoblaze.com/cart.html"}}
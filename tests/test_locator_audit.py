@@ -0,0 +1,73 @@
+import pytest
+from selenium.webdriver.common.by import By
+
+from harness.locator_audit import (
+    DYNAMIC,
+    STRING_VALUE_SCAN,
+    TEXT_MATCH,
+    analyse_static,
+    apply_suggestions,
+    extract_locators,
+    main,
+    xpath_to_css,
+)
+
+
+@pytest.mark.parametrize("xpath, css", [
+    ("//div[@class='card-block']//h4[@class='card-title']",
+     'div[class="card-block"] h4[class="card-title"]'),
+    ("//tr[@class='success']//td[2]", 'tr[class="success"] td:nth-of-type(2)'),
+    ("//*[@id='nava']", "#nava"),
+    ("//form/input[@name='q']", 'form > input[name="q"]'),
+    ("//div[contains(@class, 'error')]", 'div[class*="error"]'),
+    ("//a[starts-with(@href, '/cart')][@data-testid]", 'a[href^="/cart"][data-testid]'),
+    ("//h2[contains(text(),'Products')]", None),
+    ("//tr[contains(., 'SN1')]", None),
+    ("//*[2]", None),
+    ("//td[2][@class='x']", 'td:nth-of-type(2)[class="x"]'),
+    ("//td[@class='x'][2]", None),
+    ("/html/body", None),
+])
+def test_xpath_to_css(xpath, css):
+    assert xpath_to_css(xpath) == css
+
+
+def test_extract_flags_slow_patterns(tmp_path):
+    source = tmp_path / "pysel_test.py"
+    source.write_text(
+        "a = (By.XPATH, \"//h1[contains(text(), 'Dashboard')]\")\n"
+        "b = (By.XPATH, f\"//tr[contains(., '{serial_number}')]\")\n"
+        "c = (By.ID, 'nava')\n"
+        "broken = (\n"
+    )
+    found = extract_locators(str(source))
+    for locator in found:
+        analyse_static(locator)
+    assert [(l.line, l.by) for l in found] == [(1, By.XPATH), (2, By.XPATH), (3, By.ID)]
+    assert found[0].issues == [TEXT_MATCH]
+    assert found[1].issues == [DYNAMIC, STRING_VALUE_SCAN]
+    assert found[2].issues == []
+
+
+def test_apply_rewrites_plain_literals_only(tmp_path):
+    source = tmp_path / "pysel_test.py"
+    source.write_text(
+        "rows = (By.XPATH, \"//tr[@class='success']//td[2]\")\n"
+        "row = (By.XPATH, f\"//tr[@id='{serial}']\")\n"
+    )
+    found = extract_locators(str(source))
+    found[0].suggestion = (By.CSS_SELECTOR, 'tr[class="success"] td:nth-of-type(2)')
+    found[1].suggestion = (By.ID, "x")
+    assert apply_suggestions(str(source), found) == 1
+    assert source.read_text().splitlines() == [
+        "rows = (By.CSS_SELECTOR, 'tr[class=\"success\"] td:nth-of-type(2)')",
+        "row = (By.XPATH, f\"//tr[@id='{serial}']\")",
+    ]
+
+
+def test_apply_needs_a_snapshot_to_verify_rewrites(tmp_path):
+    source = tmp_path / "pysel_test.py"
+    source.write_text("rows = (By.XPATH, \"//tr[@class='success']//td[2]\")\n")
+    with pytest.raises(SystemExit):
+        main([str(source), "--apply"])
+    assert "By.XPATH" in source.read_text()
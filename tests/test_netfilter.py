@@ -0,0 +1,123 @@
+from fakes import FakeDriver
+from harness import stubserver
+from harness.netfilter import (
+    _READ_FAILURES_SCRIPT,
+    _RECORD_FAILURES_SCRIPT,
+    NetworkFilter,
+    expand,
+    marker_rules,
+    matches,
+)
+from harness.pool import DriverPool
+
+
+class CdpDriver(FakeDriver):
+    def __init__(self):
+        super().__init__()
+        self.cdp = []
+        self.failed_loads = []
+
+    def execute_cdp_cmd(self, cmd, params):
+        self.cdp.append((cmd, params))
+        if cmd == "Page.addScriptToEvaluateOnNewDocument":
+            return {"identifier": "7"}
+        return {}
+
+    def execute_script(self, script, *args):
+        if "__harnessFailedLoads" in script:
+            return self.failed_loads
+        return super().execute_script(script, *args)
+
+
+def test_resource_types_expand_to_url_patterns():
+    patterns = expand(["image", "*://tracker.example/*", "image"])
+    assert "*.png" in patterns and "*.png?*" in patterns
+    assert patterns.count("*.png") == 1 and patterns[-1] == "*://tracker.example/*"
+
+
+def test_only_star_is_a_wildcard():
+    assert matches("https://a.example/img/x.png?v=2", ["*.png?*"])
+    assert not matches("https://a.example/x.pngv", ["*.png?*"])
+    assert matches("https://www.google-analytics.com/analytics.js", expand(["analytics"]))
+    assert not matches("https://www.demoblaze.com/index.html", expand(["image", "font", "analytics"]))
+
+
+def test_rules_are_applied_on_lease_and_lifted_on_release():
+    driver = CdpDriver()
+    pool = DriverPool(factory=lambda: driver)
+    network = NetworkFilter()
+    network.install(pool)
+    network.set_rules(["image"])
+    with pool.lease():
+        driver.failed_loads = ["https://cdn.example/a.png", "https://cdn.example/broken.js"]
+    commands = [cmd for cmd, _ in driver.cdp]
+    assert commands[:3] == ["Network.enable", "Network.setBlockedURLs",
+                            "Page.addScriptToEvaluateOnNewDocument"]
+    assert ("Network.setBlockedURLs", {"urls": []}) in driver.cdp
+    assert ("Page.removeScriptToEvaluateOnNewDocument", {"identifier": "7"}) in driver.cdp
+    # Only failures on blocked URLs count
+    assert network.current["urls"] == ["https://cdn.example/a.png"]
+    assert network.stats["requests"] == 1
+
+
+def test_each_test_gets_its_rules_on_a_browser_kept_leased():
+    driver = CdpDriver()
+    pool = DriverPool(factory=lambda: driver)
+    network = NetworkFilter()
+    network.install(pool)
+    network.set_rules([])
+    with pool.lease():
+        assert driver.cdp == []
+        # Next test of the class, same lease
+        network.set_rules(["*://tracker.example/*"])
+        assert ("Network.setBlockedURLs", {"urls": ["*://tracker.example/*"]}) in driver.cdp
+        first = network.current
+        driver.failed_loads = ["https://tracker.example/t.js"]
+        network.set_rules(["image"])
+        assert first["urls"] == ["https://tracker.example/t.js"]
+        assert driver.cdp[-3:-1] == [("Network.enable", {}), ("Network.setBlockedURLs", {"urls": expand(["image"])})]
+        driver.failed_loads = []
+    assert [params for cmd, params in driver.cdp if cmd == "Network.setBlockedURLs"][-1] == {"urls": []}
+
+
+def test_failed_loads_are_not_kept_in_page_storage():
+    assert "Storage" not in _RECORD_FAILURES_SCRIPT and "Storage" not in _READ_FAILURES_SCRIPT
+
+
+def test_no_rules_leaves_the_browser_alone():
+    driver = CdpDriver()
+    pool = DriverPool(factory=lambda: driver)
+    network = NetworkFilter()
+    network.install(pool)
+    network.set_rules([])
+    with pool.lease():
+        pass
+    assert not any(cmd.startswith("Page.") for cmd, _ in driver.cdp)
+    assert network.stats["tests"] == 0
+
+
+def test_blocked_bytes_come_from_the_stub_archive(monkeypatch, tmp_path):
+    monkeypatch.setenv("HARNESS_STUB", "replay")
+    monkeypatch.setenv("HARNESS_STUB_ARCHIVE", str(tmp_path / "archive.zip"))
+    server = stubserver.start_from_env()
+    try:
+        server.archive.put("GET https://cdn.example/a.png", 200, [], b"x" * 1234)
+        network = NetworkFilter()
+        network.set_rules(["image"])
+        network._account([server.url("https://cdn.example/a.png")])
+    finally:
+        stubserver.stop_active()
+    assert network.stats["bytes"] == 1234
+
+
+def test_marker_rules_are_collected():
+    class Marker:
+        def __init__(self, *args):
+            self.args = args
+
+    class Item:
+        def iter_markers(self, name):
+            # Closest marker first, as pytest returns them
+            return iter([Marker("image"), Marker("analytics")])
+
+    assert marker_rules(Item()) == ["analytics", "image"]
@@ -0,0 +1,101 @@
+from selenium.common.exceptions import StaleElementReferenceException
+from selenium.webdriver.common.by import By
+
+from fakes import FakeDriver
+from harness.pages import CLICKABLE, PRESENT, Element, Page
+
+
+class FakeElement:
+    def __init__(self, name):
+        self.name = name
+        self.stale = False
+        self.clicks = 0
+
+    def _check(self):
+        if self.stale:
+            raise StaleElementReferenceException(self.name)
+
+    def click(self):
+        self._check()
+        self.clicks += 1
+
+    @property
+    def text(self):
+        self._check()
+        return self.name
+
+
+class FakeWait:
+    """Resolves conditions from a dict of locator -> FakeElement."""
+
+    def __init__(self):
+        self.dom = {}
+        self.conditions = []
+
+    def until(self, condition):
+        self.conditions.append((condition.kind, condition.locator))
+        return self.dom[condition.locator]
+
+
+class LoginPage(Page):
+    heading = Element(By.TAG_NAME, "h1", until=PRESENT)
+    submit = Element(By.ID, "submit", until=CLICKABLE)
+
+
+def make_page():
+    wait = FakeWait()
+    wait.dom = {(By.TAG_NAME, "h1"): FakeElement("Dashboard"), (By.ID, "submit"): FakeElement("Login")}
+    return LoginPage(FakeDriver(), wait=wait), wait
+
+
+def test_elements_resolve_lazily_and_once():
+    page, wait = make_page()
+    heading = page.heading
+    assert wait.conditions == []
+    assert heading.text == "Dashboard"
+    assert page.heading.text == "Dashboard"
+    page.submit.click()
+    page.submit.click()
+    assert wait.conditions == [("present", (By.TAG_NAME, "h1")), ("clickable", (By.ID, "submit"))]
+    assert page.stats == {"lookups": 2, "hits": 2, "refreshed": 0, "mutated": 0}
+
+
+def test_stale_element_is_re_resolved_and_call_retried():
+    page, wait = make_page()
+    page.submit.click()
+    old = wait.dom[(By.ID, "submit")]
+    old.stale = True
+    wait.dom[(By.ID, "submit")] = FakeElement("Login")
+    page.submit.click()
+    assert wait.dom[(By.ID, "submit")].clicks == 1
+    assert page.stats["refreshed"] == 1
+
+
+def test_stronger_condition_is_not_served_from_weaker_cache():
+    page, wait = make_page()
+    page.element((By.ID, "submit"), until=PRESENT).resolve()
+    page.submit.resolve()
+    page.element((By.ID, "submit"), until=PRESENT).resolve()
+    assert [kind for kind, _ in wait.conditions] == ["present", "clickable"]
+
+
+def test_open_drops_the_cache():
+    page, wait = make_page()
+    page.heading.resolve()
+    page.open("https://example.com/")
+    page.heading.resolve()
+    assert len(wait.conditions) == 2
+    assert page.driver.current_url == "https://example.com/"
+
+
+def test_dom_mutation_drops_the_cache():
+    page, wait = make_page()
+    generation = ["doc:0"]
+    page.driver.execute_script = lambda script, *args: generation[0]
+    page.submit.click()
+    page.submit.click()
+    # e.g. the click disabled the button or rendered another match
+    generation[0] = "doc:1"
+    page.submit.click()
+    assert [kind for kind, _ in wait.conditions] == ["clickable", "clickable"]
+    assert page.stats["mutated"] == 1 and page.stats["hits"] == 1
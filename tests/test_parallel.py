@@ -0,0 +1,55 @@
+from harness.durations import DurationStore
+from harness.parallel import combine_exit_codes, group_key, plan
+
+
+def test_group_key_keeps_classes_together():
+    nodeid = "pysel55e.py::ACDCDeviceManagementTests::test_tc001_prevent_serial_number_change"
+    assert group_key(nodeid, "class") == "pysel55e.py::ACDCDeviceManagementTests"
+    assert group_key(nodeid, "module") == "pysel55e.py"
+    assert group_key(nodeid, "none") == nodeid
+    assert group_key("pysel9ay.py::test_placeholder_scenario", "class") == \
+        "pysel9ay.py::test_placeholder_scenario"
+    assert group_key("a.py::test_x[a::b]", "class") == "a.py::test_x[a::b]"
+
+
+def test_plan_schedules_longest_first_and_balances():
+    nodeids = [f"t.py::test_{i}" for i in range(6)]
+    durations = dict(zip(nodeids, [1, 1, 1, 1, 4, 4]))
+    shards = plan(nodeids, durations, workers=2)
+    loads = sorted(sum(durations[n] for n in shard) for shard in shards)
+    assert loads == [6, 6]
+
+
+def test_plan_keeps_setup_groups_on_one_worker():
+    nodeids = [
+        "a.py::TestCart::test_add", "a.py::TestCart::test_checkout",
+        "b.py::TestLogin::test_ok", "b.py::TestLogin::test_bad",
+        "c.py::test_smoke",
+    ]
+    durations = dict.fromkeys(nodeids, 1.0)
+    shards = plan(nodeids, durations, workers=2)
+    by_worker = {nodeid: index for index, shard in enumerate(shards) for nodeid in shard}
+    assert by_worker["a.py::TestCart::test_add"] == by_worker["a.py::TestCart::test_checkout"]
+    assert by_worker["b.py::TestLogin::test_ok"] == by_worker["b.py::TestLogin::test_bad"]
+
+
+def test_plan_splits_group_that_would_straggle():
+    nodeids = [f"a.py::TestSlow::test_{i}" for i in range(4)] + ["b.py::test_fast"]
+    durations = dict.fromkeys(nodeids, 5.0)
+    shards = plan(nodeids, durations, workers=2)
+    assert all(shard for shard in shards)
+
+
+def test_duration_store_smooths_and_estimates(tmp_path):
+    store = DurationStore(str(tmp_path / "durations.json"))
+    store.update({"a": 2.0, "b": 4.0})
+    store.update({"a": 4.0})
+    assert store.load() == {"a": 3.0, "b": 4.0}
+    assert store.estimate(["a", "c"]) == {"a": 3.0, "c": 3.5}
+
+
+def test_workers_without_tests_do_not_decide_the_exit_code():
+    assert combine_exit_codes([0, 5]) == 0
+    assert combine_exit_codes([1, 5]) == 1
+    assert combine_exit_codes([5, 5]) == 5
+    assert combine_exit_codes([]) == 0
@@ -0,0 +1,119 @@
+import threading
+
+import pytest
+
+from fakes import FakeDriver
+from harness.pool import DEFAULT_TIMEOUTS, DriverPool, PoolExhaustedError
+
+
+def make_pool(**kwargs):
+    created = []
+
+    def factory():
+        created.append(FakeDriver())
+        return created[-1]
+
+    return DriverPool(factory=factory, **kwargs), created
+
+
+def test_released_driver_is_reused():
+    pool, created = make_pool()
+    with pool.lease() as first:
+        pass
+    with pool.lease() as second:
+        pass
+    assert first is second
+    assert len(created) == 1
+    assert pool.stats == {"created": 1, "reused": 1, "recycled": 0}
+
+
+def test_release_resets_browser_state():
+    pool, _ = make_pool()
+    with pool.lease() as driver:
+        driver.alert_open = True
+        driver.window_handles.append("popup")
+        driver.cookies.append({"name": "session"})
+        driver.timeouts = "leftover implicit wait"
+        driver.current_url = "https://example.com/login"
+    assert not driver.alert_open
+    assert driver.window_handles == ["main"]
+    assert driver.cookies == []
+    assert driver.timeouts is DEFAULT_TIMEOUTS
+    assert driver.current_url == "about:blank"
+
+
+def test_unhealthy_driver_is_recycled():
+    pool, created = make_pool()
+    with pool.lease() as driver:
+        driver.broken = True
+    assert driver.quit_called
+    with pool.lease() as replacement:
+        pass
+    assert replacement is not driver
+    assert len(created) == 2
+    assert pool.stats["recycled"] == 1
+
+
+def test_max_uses_recycles_driver():
+    pool, created = make_pool(max_uses=2)
+    for _ in range(3):
+        with pool.lease():
+            pass
+    assert len(created) == 2
+
+
+def test_acquire_blocks_until_release():
+    pool, created = make_pool(max_size=1, lease_timeout=5)
+    driver = pool.acquire()
+    leased = []
+    waiter = threading.Thread(target=lambda: leased.append(pool.acquire()))
+    waiter.start()
+    pool.release(driver)
+    waiter.join(timeout=5)
+    assert leased == [driver]
+    assert len(created) == 1
+
+
+def test_acquire_times_out_when_exhausted():
+    pool, _ = make_pool(max_size=1, lease_timeout=0.05)
+    pool.acquire()
+    with pytest.raises(PoolExhaustedError):
+        pool.acquire()
+
+
+def test_close_quits_idle_and_returned_drivers():
+    pool, _ = make_pool()
+    idle = pool.acquire()
+    leased = pool.acquire()
+    pool.release(idle)
+    pool.close()
+    assert idle.quit_called
+    pool.release(leased)
+    assert leased.quit_called
+
+
+def test_hooks_run_on_acquire_and_before_reset():
+    pool, _ = make_pool()
+    seen = []
+    pool.on_acquire.append(lambda driver: seen.append(("acquire", len(driver.commands))))
+    pool.on_release.append(lambda driver: seen.append(("release", driver.current_url)))
+    with pool.lease() as driver:
+        driver.get("https://example.com")
+    assert seen == [("acquire", 0), ("release", "https://example.com")]
+    assert driver.current_url == "about:blank"
+
+
+def test_failing_acquire_hook_discards_the_browser():
+    pool, created = make_pool()
+
+    def broken(driver):
+        raise RuntimeError("cdp unavailable")
+
+    pool.on_acquire.append(broken)
+    with pytest.raises(RuntimeError):
+        pool.acquire()
+    assert created[0].quit_called
+    pool.on_acquire.clear()
+    with pool.lease():
+        pass
+    assert len(created) == 2
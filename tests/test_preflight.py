@@ -0,0 +1,144 @@
+import textwrap
+
+import pytest
+from selenium.webdriver.common.by import By
+
+from harness.preflight import ERROR, WARNING, check_file, has_errors, locator_problem
+
+
+def codes(tmp_path, source, conftest=None):
+    if conftest is not None:
+        (tmp_path / "conftest.py").write_text(textwrap.dedent(conftest))
+    path = tmp_path / "pyselx.py"
+    path.write_text(textwrap.dedent(source))
+    return [issue.code for issue in check_file(str(path), root=str(tmp_path))]
+
+
+def test_syntax_errors_are_reported_with_their_line(tmp_path):
+    path = tmp_path / "pyselx.py"
+    path.write_text('def test_a():\n    """unterminated\n')
+    issues = check_file(str(path), root=str(tmp_path))
+    assert [(issue.code, issue.line) for issue in issues] == [("syntax", 2)]
+    assert has_errors(issues)
+
+
+def test_classes_without_test_prefix_are_not_collected(tmp_path):
+    assert codes(tmp_path, """
+        class ACDCDeviceManagementTests:
+            def test_tc001(self):
+                pass
+    """) == ["not-collected"]
+
+
+def test_fixtures_must_be_provided(tmp_path):
+    source = """
+        import pytest
+
+        class TestLogin:
+            @pytest.fixture
+            def wait(self, driver):
+                return None
+
+            def test_ok(self, driver, wait, tmp_path):
+                pass
+
+            @pytest.mark.parametrize("user", ["a"])
+            def test_param(self, browser_pool, user):
+                pass
+
+            def test_typo(self, drvier):
+                pass
+    """
+    conftest = """
+        import pytest
+
+        @pytest.fixture
+        def driver():
+            pass
+
+        @pytest.fixture(name="browser_pool")
+        def _pool():
+            pass
+    """
+    assert codes(tmp_path, source, conftest) == ["unknown-fixture"]
+
+
+def test_unknown_fixtures_are_errors_only_when_registered_fixtures_are_known(tmp_path):
+    path = tmp_path / "pyselx.py"
+    path.write_text(textwrap.dedent("""
+        from shared import base_url
+
+        def test_plugin(mocker, base_url):
+            pass
+
+        def test_typo(drvier):
+            pass
+    """))
+
+    def unknown(registered):
+        issues = check_file(str(path), root=str(tmp_path), registered=registered)
+        return [(issue.line, issue.severity) for issue in issues if issue.code == "unknown-fixture"]
+
+    # Run by hand, plugin fixtures (mocker) cannot be told from typos
+    assert unknown(None) == [(4, WARNING), (7, WARNING)]
+    assert unknown({"mocker"}) == [(7, ERROR)]
+
+
+@pytest.mark.parametrize("by, value", [
+    (By.XPATH, "//button[contains(text(), 'Login')"),
+    (By.XPATH, "//a[contains(text(),'Laptops']"),
+    (By.XPATH, "//div/"),
+    (By.CSS_SELECTOR, "div[class='x'"),
+    (By.CSS_SELECTOR, "ul >"),
+    (By.CLASS_NAME, "btn btn-primary"),
+    (By.ID, ""),
+])
+def test_malformed_locators(by, value):
+    assert locator_problem(by, value)
+
+
+@pytest.mark.parametrize("by, value", [
+    (By.XPATH, "//tr[contains(., 'SN(1)')]"),
+    (By.CSS_SELECTOR, 'tr[class="success"] td:nth-of-type(2)'),
+    (By.CSS_SELECTOR, r"a\[b"),
+    (By.CLASS_NAME, "error-message"),
+])
+def test_well_formed_locators(by, value):
+    assert locator_problem(by, value) is None
+
+
+def test_locators_are_checked_in_f_strings(tmp_path):
+    assert codes(tmp_path, """
+        from selenium.webdriver.common.by import By
+
+        def test_row(driver):
+            driver.find_element(By.XPATH, f"//tr[contains(., '{serial}')")
+    """, conftest="import pytest\n@pytest.fixture\ndef driver(): pass\n") == ["bad-locator"]
+
+
+def test_wait_misuse(tmp_path):
+    source = """
+        import time
+        from selenium.webdriver.common.by import By
+        from harness import waits as EC
+        from selenium.webdriver.support.ui import WebDriverWait
+
+        def test_waits(driver):
+            driver.implicitly_wait(10)
+            wait = WebDriverWait(driver, 15)
+            wait.until(EC.alert_is_present)
+            wait.until(EC.presence_of_element_located(By.ID, "nava"))
+            time.sleep(2)
+    """
+    found = codes(tmp_path, source, conftest="import pytest\n@pytest.fixture\ndef driver(): pass\n")
+    assert found == ["compounded-waits", "uncalled-condition", "locator-not-tuple", "fixed-sleep"]
+    # PushWait resolves DOM conditions in the page, so nothing compounds
+    found = codes(tmp_path, source.replace("from selenium.webdriver.support.ui import WebDriverWait",
+                                           "from harness.waits import PushWait")
+                  .replace("WebDriverWait(", "PushWait("),
+                  conftest="import pytest\n@pytest.fixture\ndef driver(): pass\n")
+    assert "compounded-waits" not in found
+    # Warnings alone do not exclude a file
+    path = tmp_path / "pyselx.py"
+    path.write_text("def test_a():\n    import time\n    time.sleep(1)\n")
+    assert not has_errors(check_file(str(path), root=str(tmp_path)))
@@ -0,0 +1,140 @@
+import threading
+import time
+
+import pytest
+
+from fakes import FakeDriver
+from harness.pool import DriverPool
+from harness.prespawn import Prespawner, needs_browser
+
+
+def make_pool(delay=0.0, **kwargs):
+    created = []
+
+    def factory():
+        time.sleep(delay)
+        created.append(FakeDriver())
+        return created[-1]
+
+    return DriverPool(factory=factory, **kwargs), created
+
+
+def spawner(pool, tests, memory=None):
+    prespawner = Prespawner(pool, memory=lambda: memory, browser_mb=400, reserve_mb=1024)
+    prespawner.set_queue(tests)
+    return prespawner
+
+
+def test_first_browser_is_ready_before_the_first_test():
+    pool, created = make_pool()
+    prespawner = spawner(pool, [("a", 5.0), ("b", 5.0)])
+    assert prespawner.deficit() == 1
+    assert prespawner.fill() == 1
+    # Later tests reuse the browser the previous one releases
+    assert prespawner.deficit() == 0
+    with pool.lease():
+        pass
+    assert len(created) == 1
+    assert prespawner.summary()["hits"] == 1 and prespawner.summary()["misses"] == 0
+
+
+def test_recycled_browsers_are_replaced_ahead_of_time():
+    pool, created = make_pool(max_uses=1, max_size=4)
+    prespawner = spawner(pool, [("a", 0.5), ("b", 0.5), ("c", 0.5), ("d", 30.0), ("e", 1.0)])
+    # Tests a-d start within the default 2s start-up time, each browser serves one lease
+    assert prespawner.deficit() == 4
+    prespawner.set_queue([("a", 30.0), ("b", 1.0)])
+    assert prespawner.deficit() == 1
+
+
+def test_deficit_is_capped_by_pool_size_and_queue():
+    pool, _ = make_pool(max_uses=1, max_size=2)
+    assert spawner(pool, [(str(i), 0.1) for i in range(10)]).deficit() == 2
+    prespawner = spawner(pool, [("a", 0.1)])
+    prespawner.test_started("a")
+    assert prespawner.deficit() == 0
+
+
+def test_lease_waits_for_a_browser_that_is_starting():
+    pool, created = make_pool(delay=0.3)
+    thread = threading.Thread(target=pool.spawn)
+    thread.start()
+    time.sleep(0.05)
+    with pool.lease():
+        pass
+    thread.join()
+    assert len(created) == 1
+    assert pool.spawn_stats["hits"] == 1 and pool.spawn_stats["misses"] == 0
+
+
+def test_spawned_browser_is_idle_when_the_spawn_ends():
+    pool, created = make_pool(delay=0.2, max_size=2)
+    real_cond = pool._cond
+
+    class PausingCondition:
+        """Holds the spawner thread back each time it leaves the lock."""
+
+        def __enter__(self):
+            return real_cond.__enter__()
+
+        def __exit__(self, *exc):
+            real_cond.__exit__(*exc)
+            if threading.current_thread() is thread and created:
+                time.sleep(0.2)
+
+        def __getattr__(self, name):
+            return getattr(real_cond, name)
+
+    pool._cond = PausingCondition()
+    thread = threading.Thread(target=pool.spawn)
+    thread.start()
+    time.sleep(0.05)
+    with pool.lease():
+        pass
+    thread.join()
+    assert len(created) == 1
+    assert pool.spawn_stats["hits"] == 1 and pool.spawn_stats["misses"] == 0
+
+
+def test_low_memory_holds_prespawning_back():
+    pool, created = make_pool()
+    prespawner = spawner(pool, [("a", 1.0)], memory=1200)
+    assert prespawner.fill() == 0 and not created
+    assert prespawner.summary()["memory_limited"] == 1
+
+
+def test_unused_prespawned_browsers_are_reported():
+    pool, _ = make_pool()
+    spawner(pool, [("a", 1.0)]).fill()
+    pool.close()
+    assert pool.spawn_stats["wasted"] == 1
+
+
+def test_background_thread_fills_the_pool():
+    pool, created = make_pool()
+    prespawner = spawner(pool, [("a", 1.0)])
+    prespawner.start()
+    deadline = time.time() + 2
+    while not created and time.time() < deadline:
+        time.sleep(0.01)
+    prespawner.stop()
+    assert len(created) == 1
+
+
+class Item:
+    def __init__(self, fixturenames=(), markers=(), module=None):
+        self.fixturenames = fixturenames
+        self._markers = markers
+        self.module = module
+
+    def iter_markers(self):
+        return iter(self._markers)
+
+
+@pytest.mark.parametrize("item, expected", [
+    (Item(fixturenames=("browser_pool", "request")), True),
+    (Item(fixturenames=("browser_pool",), markers=(pytest.mark.skip(reason="ci").mark,)), False),
+    (Item(fixturenames=("tmp_path",)), False),
+])
+def test_browser_tests_are_recognised(item, expected):
+    assert needs_browser(item) is expected
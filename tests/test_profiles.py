@@ -0,0 +1,43 @@
+import pytest
+
+from harness.pool import default_chrome_options
+from harness.profiles import PROFILES, chrome_options, profile_rules
+
+
+def test_fast_ci_is_the_default(monkeypatch):
+    monkeypatch.delenv("HARNESS_PROFILE", raising=False)
+    options = default_chrome_options()
+    assert "--headless=new" in options.arguments
+    assert "--disable-background-networking" in options.arguments
+    assert "--disable-background-timer-throttling" in options.arguments
+    assert options.page_load_strategy == "eager"
+
+
+def test_profile_is_selected_by_environment(monkeypatch):
+    monkeypatch.setenv("HARNESS_PROFILE", "debug")
+    options = default_chrome_options()
+    assert not any(arg.startswith("--headless") for arg in options.arguments)
+    assert options.page_load_strategy == "normal"
+
+
+@pytest.mark.parametrize("name", sorted(PROFILES))
+def test_every_profile_sets_the_window_size_at_launch(name):
+    options = chrome_options(name)
+    assert "--window-size=1920,1080" in options.arguments
+    assert "--no-sandbox" in options.arguments
+
+
+def test_profiles_return_independent_options():
+    chrome_options("fast-ci").add_argument("--lang=de")
+    assert "--lang=de" not in chrome_options("fast-ci").arguments
+
+
+def test_unknown_profile_is_rejected():
+    with pytest.raises(ValueError):
+        chrome_options("turbo")
+
+
+def test_unknown_profile_has_no_rules(monkeypatch):
+    monkeypatch.setenv("HARNESS_PROFILE", "fastci")
+    with pytest.raises(ValueError, match="fastci"):
+        profile_rules()
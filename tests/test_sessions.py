@@ -0,0 +1,139 @@
+import os
+import stat
+
+import pytest
+from fakes import FakeSwitchTo
+
+from harness import fileutil
+from harness.sessions import SessionCache, origin_of
+
+URL = "https://acdc-app.example.com/dashboard"
+ORIGIN = "https://acdc-app.example.com"
+
+
+class Browser:
+    """Fake browser whose login state is the presence of a 'sid' cookie."""
+
+    def __init__(self, server_sessions):
+        self.server_sessions = server_sessions
+        self.cookies = []
+        self.storage = {"local": {}, "session": {}}
+        self.visited = []
+        self.alert_open = False
+        self.window_handles = ["main"]
+        self.current_window_handle = "main"
+        self.switch_to = FakeSwitchTo(self)
+        self.timeouts = "fixture timeouts"
+
+    def get(self, url):
+        self.visited.append(url)
+
+    def execute_cdp_cmd(self, cmd, params):
+        if cmd == "Network.getAllCookies":
+            return {"cookies": [dict(c, size=10, session=True, expires=-1) for c in self.cookies]}
+        if cmd == "Network.clearBrowserCookies":
+            self.cookies = []
+            return {}
+        assert cmd == "Network.setCookies"
+        assert all("size" not in c and "expires" not in c for c in params["cookies"])
+        self.cookies = [{"name": c["name"], "value": c["value"]} for c in params["cookies"]]
+
+    def execute_script(self, script, *args):
+        if "clear()" in script:
+            self.storage = {"local": {}, "session": {}}
+            return None
+        if args:
+            self.storage = args[0]
+            return None
+        return self.storage
+
+    def delete_all_cookies(self):
+        # Only the current page's domain, like WebDriver
+        self.cookies = [c for c in self.cookies if c.get("domain", ORIGIN) != ORIGIN]
+
+    def logged_in(self):
+        return any(c["value"] in self.server_sessions for c in self.cookies)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return SessionCache(directory=str(tmp_path), ttl=60)
+
+
+def form_login(server_sessions):
+    def login(browser):
+        browser.cookies = [{"name": "sid", "value": "s1"}]
+        browser.storage = {"local": {"token": "t"}, "session": {}}
+        server_sessions.add("s1")
+    return login
+
+
+def test_form_login_runs_once_then_state_is_injected(cache):
+    server = set()
+    first, second = Browser(server), Browser(server)
+    assert cache.login(first, URL, "test_user", form_login(server), Browser.logged_in) is False
+    assert cache.login(second, URL, "test_user", form_login(server), Browser.logged_in) is True
+    assert second.storage["local"] == {"token": "t"}
+    assert second.visited == [ORIGIN + "/", URL]
+    assert cache.stats == {"restored": 1, "logins": 1, "rejected": 0}
+
+
+def test_rejected_session_falls_back_to_form(cache):
+    server = set()
+    cache.login(Browser(server), URL, "test_user", form_login(server), Browser.logged_in)
+    server.clear()  # the server expired the session
+    browser = Browser(server)
+    assert cache.login(browser, URL, "test_user", form_login(server), Browser.logged_in) is False
+    assert browser.logged_in()
+    assert cache.stats["rejected"] == 1
+
+
+def test_form_login_starts_from_a_clean_browser(cache):
+    server = set()
+    cache.login(Browser(server), URL, "test_user", form_login(server), Browser.logged_in)
+    server.clear()
+    browser = Browser(server)
+    browser.cookies = [{"name": "tracker", "value": "x", "domain": "sso.example.com"}]
+    seen = {}
+
+    def login(b):
+        seen["cookies"], seen["storage"] = list(b.cookies), dict(b.storage)
+        form_login(server)(b)
+
+    cache.login(browser, URL, "test_user", login, Browser.logged_in)
+    # The rejected snapshot's cookies on other domains and its storage are gone
+    assert seen == {"cookies": [], "storage": {"local": {}, "session": {}}}
+    assert browser.timeouts == "fixture timeouts"
+
+
+def test_snapshot_file_is_created_private(cache, monkeypatch):
+    created = []
+    real_open = os.open
+
+    def spy(path, flags, mode=0o777, *args, **kwargs):
+        created.append((path, mode))
+        return real_open(path, flags, mode, *args, **kwargs)
+
+    monkeypatch.setattr(fileutil.os, "open", spy)
+    cache.save(ORIGIN, "test_user", {"saved_at": 0})
+    (path, mode), = created
+    assert path.endswith(".tmp") and mode == 0o600
+
+
+def test_expired_snapshot_is_ignored(cache):
+    server = set()
+    cache.login(Browser(server), URL, "test_user", form_login(server), Browser.logged_in)
+    cache.ttl = -1
+    assert cache.load(ORIGIN, "test_user") is None
+
+
+def test_snapshots_are_private_and_per_user(cache, tmp_path):
+    server = set()
+    cache.login(Browser(server), URL, "alice", form_login(server), Browser.logged_in)
+    (path,) = tmp_path.glob("*.json")
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+    assert cache.load(ORIGIN, "bob") is None
+
+
+def test_origin_of():
+    assert origin_of("http://localhost:8000/a/b?c=d") == "http://localhost:8000"
@@ -0,0 +1,172 @@
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from harness import stubserver
+from harness.stubserver import StubServer, from_stub_path, to_stub_path
+
+
+class Upstream(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    hits = []
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        Upstream.hits.append(self.path)
+        host = self.headers["Host"]
+        if self.path == "/":
+            body = (f'<a href="http://{host}/next">next</a>'
+                    f'<script src="/app.js"></script><!-- //not.a.url -->').encode()
+            content_type = "text/html"
+        elif self.path == "/app.js":
+            body, content_type = b"// comment.example\nvar x = 1;", "application/javascript"
+        else:
+            body, content_type = b"\x89PNG", "image/png"
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Set-Cookie", f"sid=1; Domain={host}; Secure; Path=/")
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def upstream():
+    Upstream.hits = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Upstream)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def get(url, **headers):
+    request = urllib.request.Request(url, headers=headers)
+    with urllib.request.urlopen(request, timeout=5) as response:
+        return response.read(), dict(response.getheaders())
+
+
+def test_stub_path_round_trip():
+    url = "https://www.demoblaze.com/cart.html?x=1"
+    assert to_stub_path(url) == "/__stub/https/www.demoblaze.com/cart.html?x=1"
+    assert from_stub_path(to_stub_path(url)) == url
+    assert from_stub_path("/index.html") is None
+
+
+def test_record_then_replay_without_upstream(upstream, tmp_path):
+    archive = str(tmp_path / "archive.zip")
+    recorder = StubServer(archive, mode="record").start()
+    try:
+        page, headers = get(recorder.url(upstream + "/"))
+        # Root-relative subresource, resolved through the Referer
+        script, _ = get(recorder.base_url + "/app.js", Referer=recorder.url(upstream + "/"))
+    finally:
+        recorder.stop()
+
+    host = upstream.split("//")[1]
+    assert f'href="/__stub/http/{host}/next"'.encode() in page
+    assert b"//not.a.url" in page
+    assert script.startswith(b"// comment.example")
+    assert "Domain" not in headers["Set-Cookie"] and "Secure" not in headers["Set-Cookie"]
+    assert Upstream.hits == ["/", "/app.js"]
+
+    replayer = StubServer(archive, mode="replay").start()
+    try:
+        assert get(replayer.url(upstream + "/"))[0] == page
+        with pytest.raises(urllib.error.HTTPError) as missing:
+            get(replayer.url(upstream + "/never-recorded"))
+        assert missing.value.code == 404
+    finally:
+        replayer.stop()
+    assert Upstream.hits == ["/", "/app.js"]
+    assert replayer.stats == {"replayed": 1, "recorded": 0, "misses": 1, "errors": 0}
+
+
+def test_auto_mode_records_only_misses(upstream, tmp_path):
+    server = StubServer(str(tmp_path / "archive.zip"), mode="auto").start()
+    try:
+        get(server.url(upstream + "/logo.png"))
+        get(server.url(upstream + "/logo.png"))
+    finally:
+        server.stop()
+    assert Upstream.hits == ["/logo.png"]
+    assert server.stats["recorded"] == 1 and server.stats["replayed"] == 1
+    assert server.archive.size_of(upstream + "/logo.png") == 4
+
+
+def test_concurrent_requests_are_all_counted(upstream, tmp_path):
+    server = StubServer(str(tmp_path / "archive.zip"), mode="auto").start()
+    try:
+        get(server.url(upstream + "/logo.png"))
+        threads = [threading.Thread(target=get, args=(server.url(upstream + "/logo.png"),)) for _ in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        server.stop()
+    assert server.stats["replayed"] == 16
+
+
+def test_parallel_workers_merge_their_recordings(upstream, tmp_path):
+    archive = str(tmp_path / "archive.zip")
+    first = StubServer(archive, mode="auto").start()
+    second = StubServer(archive, mode="auto").start()
+    try:
+        get(first.url(upstream + "/a.png"))
+        get(second.url(upstream + "/b.png"))
+    finally:
+        first.stop()
+        second.stop()
+    replayer = StubServer(archive, mode="replay")
+    assert replayer.archive.size_of(upstream + "/a.png") == 4
+    assert replayer.archive.size_of(upstream + "/b.png") == 4
+
+
+def test_unreachable_upstream_is_a_502_and_not_recorded(tmp_path):
+    server = StubServer(str(tmp_path / "archive.zip"), mode="record").start()
+    try:
+        with pytest.raises(urllib.error.HTTPError) as failed:
+            # Port 9 (discard) is closed on loopback
+            get(server.url("http://127.0.0.1:9/page"))
+        assert failed.value.code == 502
+    finally:
+        server.stop()
+    assert server.stats["errors"] == 1 and server.stats["recorded"] == 0
+    assert not (tmp_path / "archive.zip").exists()
+
+
+def test_latency_is_injected(upstream, tmp_path):
+    server = StubServer(str(tmp_path / "archive.zip"), mode="auto", latency=0.2).start()
+    try:
+        started = time.perf_counter()
+        get(server.url(upstream + "/logo.png"))
+        assert time.perf_counter() - started >= 0.2
+    finally:
+        server.stop()
+
+
+def test_route_is_identity_without_a_server(monkeypatch, tmp_path):
+    monkeypatch.delenv("HARNESS_STUB", raising=False)
+    assert stubserver.start_from_env() is None
+    assert stubserver.route("https://example.com") == "https://example.com"
+
+    monkeypatch.setenv("HARNESS_STUB", "replay")
+    monkeypatch.setenv("HARNESS_STUB_ARCHIVE", str(tmp_path / "archive.zip"))
+    server = stubserver.start_from_env()
+    try:
+        assert stubserver.route("https://example.com/a") == server.base_url + "/__stub/https/example.com/a"
+    finally:
+        stubserver.stop_active()
+    assert stubserver.route("https://example.com") == "https://example.com"
+
+
+def test_unknown_mode_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        StubServer(str(tmp_path / "archive.zip"), mode="live")
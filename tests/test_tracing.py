@@ -0,0 +1,72 @@
+import json
+import time
+
+from selenium.webdriver.remote.command import Command
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from harness.steps import step
+from harness.tracing import CommandTracer, trace_file_name
+
+
+def fake_execute(driver, command, params=None):
+    time.sleep(0.02 if command == Command.GET else 0.001)
+    return {"value": None}
+
+
+def run_commands(tracer):
+    execute = tracer._patched_execute(fake_execute)
+    tracer.current_test = "pysel52b.py::TestECommerceWorkflow::test_product_search_and_add_to_cart"
+    with step("open store"):
+        execute(None, Command.GET, {"url": "https://www.demoblaze.com/"})
+    with step("add to cart"):
+        for _ in range(3):
+            execute(None, Command.FIND_ELEMENT, {"using": "xpath", "value": "//a[text()='Add to cart']"})
+    tracer.current_test = "other.py::test_other"
+    execute(None, Command.FIND_ELEMENT, {"using": "css selector", "value": "#cartur"})
+
+
+def test_commands_are_recorded_with_target_and_step():
+    tracer = CommandTracer()
+    run_commands(tracer)
+    first = tracer.events[0]
+    assert (first["command"], first["target"], first["step"]) == (
+        Command.GET, "https://www.demoblaze.com/", "open store"
+    )
+    assert tracer.events[1]["target"] == "xpath=//a[text()='Add to cart']"
+    assert first["seconds"] >= 0.02
+
+
+def test_chrome_trace_is_written_per_test(tmp_path):
+    tracer = CommandTracer()
+    run_commands(tracer)
+    test = tracer.events[0]["test"]
+    path = tracer.export_test(test, str(tmp_path))
+    assert path.endswith(trace_file_name(test))
+    with open(path) as f:
+        events = json.load(f)["traceEvents"]
+    assert len(events) == 4
+    assert {event["ph"] for event in events} == {"X"}
+    assert events[0]["dur"] >= 20000 and events[1]["ts"] >= events[0]["ts"] + events[0]["dur"]
+    assert tracer.export_test("never.py::ran", str(tmp_path)) is None
+
+
+def test_hotspots_aggregate_by_command_and_target():
+    tracer = CommandTracer()
+    run_commands(tracer)
+    top = tracer.hotspots()
+    assert top[0]["command"] == Command.GET
+    finds = [entry for entry in top if entry["target"] == "xpath=//a[text()='Add to cart']"]
+    assert finds[0]["count"] == 3
+    report = tracer.report()
+    assert report["commands"] == 5 and report["slowest"][0]["command"] == Command.GET
+
+
+def test_install_wraps_and_restores_execute():
+    original = WebDriver.execute
+    tracer = CommandTracer()
+    tracer.install()
+    try:
+        assert WebDriver.execute is not original
+    finally:
+        tracer.uninstall()
+    assert WebDriver.execute is original
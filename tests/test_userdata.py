@@ -0,0 +1,98 @@
+import os
+
+import pytest
+from selenium.webdriver.chrome.options import Options
+
+from harness.userdata import ProfileTemplates
+
+
+class Chrome:
+    """Fake browser that initializes its --user-data-dir like a first run."""
+
+    launches = []
+
+    def __init__(self, options):
+        self.profile = next(arg.split("=", 1)[1] for arg in options.arguments if arg.startswith("--user-data-dir="))
+        Chrome.launches.append(self.profile)
+        if not os.path.exists(os.path.join(self.profile, "Local State")):
+            os.makedirs(os.path.join(self.profile, "Default"), exist_ok=True)
+            os.makedirs(os.path.join(self.profile, "ZxcvbnData", "3"), exist_ok=True)
+            for name in ("Local State", "Default/Preferences", "ZxcvbnData/3/ranked_dicts", "SingletonLock"):
+                with open(os.path.join(self.profile, name), "w") as f:
+                    f.write(name)
+        self.visited = []
+
+    def get(self, url):
+        self.visited.append(url)
+
+    def quit(self):
+        pass
+
+
+@pytest.fixture
+def templates(tmp_path):
+    Chrome.launches = []
+    return ProfileTemplates(str(tmp_path / "templates"), str(tmp_path / "shm"), build_detector=lambda: "126.0")
+
+
+def options(*arguments):
+    opts = Options()
+    for argument in ("--headless=new",) + arguments:
+        opts.add_argument(argument)
+    return opts
+
+
+def test_template_is_built_once_and_cloned_per_browser(templates, tmp_path):
+    os.makedirs(templates.tmpfs)
+    first = templates.launch(options(), Chrome)
+    second = templates.launch(options(), Chrome)
+    # One build launch plus one launch per browser
+    assert len(Chrome.launches) == 3 and templates.stats["built"] == 1
+    assert first.profile != second.profile
+    assert first.profile.startswith(templates.tmpfs)
+    assert os.path.exists(os.path.join(first.profile, "Default", "Preferences"))
+    assert not os.path.exists(os.path.join(first.profile, "SingletonLock"))
+
+
+def test_component_files_are_linked_and_the_rest_copied(templates):
+    os.makedirs(templates.tmpfs)
+    driver = templates.launch(options(), Chrome)
+    shared = [os.stat(os.path.join(d.profile, "ZxcvbnData", "3", "ranked_dicts")).st_ino
+              for d in (driver, templates.launch(options(), Chrome))]
+    private = [os.stat(os.path.join(d.profile, "Local State")).st_ino
+               for d in (driver, templates.launch(options(), Chrome))]
+    assert shared[0] == shared[1]
+    assert private[0] != private[1]
+
+
+def test_clone_is_removed_when_the_browser_quits(templates):
+    os.makedirs(templates.tmpfs)
+    driver = templates.launch(options(), Chrome)
+    driver.quit()
+    assert not os.path.exists(driver.profile)
+
+
+def test_options_get_their_own_template_and_are_not_modified(templates):
+    os.makedirs(templates.tmpfs)
+    opts = options()
+    templates.launch(opts, Chrome)
+    templates.launch(options("--mute-audio"), Chrome)
+    assert templates.stats["built"] == 2
+    assert not any(arg.startswith("--user-data-dir") for arg in opts.arguments)
+
+
+def test_explicit_profile_and_opt_out_bypass_templates(templates, tmp_path, monkeypatch):
+    own = str(tmp_path / "own")
+    assert templates.launch(options(f"--user-data-dir={own}"), Chrome).profile == own
+    monkeypatch.setenv("HARNESS_PROFILE_TEMPLATE", "0")
+    with pytest.raises(StopIteration):
+        templates.launch(options(), Chrome)
+    assert templates.stats["built"] == 0
+
+
+def test_clones_of_dead_processes_are_swept(templates):
+    os.makedirs(templates.tmpfs)
+    stale = os.path.join(templates._base(templates.tmpfs), "clones", "999999999-abc")
+    os.makedirs(stale)
+    templates.launch(options(), Chrome)
+    assert not os.path.exists(stale)
@@ -0,0 +1,97 @@
+import pytest
+from selenium.common.exceptions import UnexpectedAlertPresentException
+
+from harness import variants
+from harness.variants import SamePage
+
+URL = "https://example.com/login"
+
+
+class Page:
+    """Fake browser: execute_script answers the install and reset scripts."""
+
+    def __init__(self, redirect=None):
+        self.redirect = redirect
+        self.current_url = "about:blank"
+        self.timeouts = "custom"
+        self.loads = []
+        self.resets = 0
+        self.installed = None
+        self.intact = True
+        self.alert_open = False
+
+    def get(self, url):
+        self.loads.append(url)
+        self.current_url = self.redirect or url
+
+    def execute_script(self, script, *args):
+        if self.alert_open:
+            raise UnexpectedAlertPresentException("alert")
+        if script == variants._INSTALL_SCRIPT:
+            self.installed = args[0]
+            return None
+        assert script == variants._RESET_SCRIPT
+        return args[0] == self.installed and self.intact
+
+
+def reset(page):
+    page.resets += 1
+    page.timeouts = "default"
+    page.current_url = "about:blank"
+    page.installed = None
+
+
+@pytest.fixture(autouse=True)
+def stats(monkeypatch):
+    monkeypatch.setattr(variants, "_stats", {"loads": 0, "resets": 0})
+
+
+def test_page_is_loaded_once_and_reset_in_place():
+    page = Page()
+    same = SamePage(page, URL, reset=reset)
+    for _ in range(5):
+        assert same.fresh() is page
+    assert page.loads == [URL]
+    assert same.stats == {"loads": 1, "resets": 4}
+    assert variants.variant_stats() == {"loads": 1, "resets": 4}
+
+
+def test_navigation_triggers_a_clean_reload():
+    page = Page()
+    same = SamePage(page, URL, reset=reset)
+    same.fresh()
+    page.current_url = "https://example.com/dashboard"
+    same.fresh()
+    assert page.loads == [URL, URL]
+    assert page.resets == 1
+    # The fixture's timeouts survive the browser reset
+    assert page.timeouts == "custom"
+
+
+def test_redirect_at_load_time_is_not_a_navigation():
+    page = Page(redirect="https://example.com/login?next=/")
+    same = SamePage(page, URL, reset=reset)
+    same.fresh()
+    same.fresh()
+    assert page.loads == [URL]
+
+
+@pytest.mark.parametrize("break_page", [
+    lambda page: setattr(page, "intact", False),
+    lambda page: setattr(page, "alert_open", True),
+])
+def test_unrecoverable_dom_state_falls_back_to_reload(break_page):
+    page = Page()
+    same = SamePage(page, URL, reset=lambda p: (reset(p), setattr(p, "alert_open", False)))
+    same.fresh()
+    break_page(page)
+    same.fresh()
+    assert len(page.loads) == 2
+
+
+def test_reload_always_skips_in_page_reset():
+    page = Page()
+    same = SamePage(page, URL, reload_always=True, reset=reset)
+    same.fresh()
+    same.fresh()
+    assert len(page.loads) == 2 and same.stats["resets"] == 0
@@ -0,0 +1,76 @@
+import time
+
+import pytest
+from selenium.webdriver.common.by import By
+from selenium.webdriver.remote.command import Command
+from selenium.webdriver.support.ui import WebDriverWait
+
+from harness import waits as EC
+from harness.steps import step
+from harness.wait_profiler import EXPLICIT, IMPLICIT, SLEEP, WaitProfiler
+from harness.waits import PushWait
+
+
+class Driver:
+    def execute_async_script(self, script, *args):
+        return {"value": "element"}
+
+
+@pytest.fixture
+def profiler():
+    profiler = WaitProfiler()
+    profiler.install()
+    profiler.current_test = "t.py::test_x"
+    yield profiler
+    profiler.uninstall()
+
+
+def test_lookups_under_implicit_wait_are_recorded():
+    profiler = WaitProfiler()
+    execute = profiler._patched_execute(lambda driver, command, params: time.sleep(0.01))
+    driver = Driver()
+    execute(driver, Command.FIND_ELEMENT, {"using": "xpath", "value": "//h1"})
+    assert profiler.events == []
+
+    execute(driver, Command.SET_TIMEOUTS, {"implicit": 10000})
+    assert profiler.implicit_wait_of(driver) == 10.0
+    with step("login"):
+        execute(driver, Command.FIND_ELEMENT, {"using": "xpath", "value": "//h1"})
+    (event,) = profiler.events
+    assert (event["kind"], event["step"], event["locator"]) == (IMPLICIT, "login", "//h1")
+    assert event["seconds"] >= 0.01
+
+
+def test_polling_wait_with_implicit_wait_is_flagged(profiler):
+    driver = Driver()
+    profiler._implicit[driver] = 10.0
+    WebDriverWait(driver, 15).until(lambda d: True)
+    (event,) = profiler.compounded
+    assert event["kind"] == EXPLICIT
+    assert event["worst_case"] == 25.0
+
+
+def test_in_page_wait_is_not_compounded(profiler):
+    driver = Driver()
+    profiler._implicit[driver] = 10.0
+    PushWait(driver, 15).until(EC.presence_of_element_located((By.ID, "nava")))
+    assert [event["wait"] for event in profiler.events] == ["PushWait"]
+    assert profiler.compounded == []
+
+
+def test_sleeps_are_attributed_to_the_running_test(profiler):
+    time.sleep(0.01)
+    profiler.current_test = None
+    time.sleep(0)
+    (event,) = profiler.events
+    assert (event["kind"], event["test"], event["requested"]) == (SLEEP, "t.py::test_x", 0.01)
+
+
+def test_hotspots_are_sorted_worst_first(profiler):
+    profiler._record(SLEEP, 2.0)
+    profiler._record(SLEEP, 2.0)
+    profiler._record(IMPLICIT, 3.0)
+    hotspots = profiler.hotspots()
+    assert [(entry["kind"], entry["seconds"], entry["count"]) for entry in hotspots] == [
+        (SLEEP, 4.0, 2), (IMPLICIT, 3.0, 1),
+    ]
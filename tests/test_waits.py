@@ -0,0 +1,75 @@
+import pytest
+from selenium.common.exceptions import (
+    InvalidSelectorException,
+    JavascriptException,
+    TimeoutException,
+)
+from selenium.webdriver.common.by import By
+
+from harness import waits as EC
+from harness.locators import normalize
+from harness.waits import PushWait
+
+
+class ScriptedDriver:
+    """Answers execute_async_script calls from a queue of canned results."""
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.calls = []
+
+    def execute_async_script(self, script, *args):
+        self.calls.append(args)
+        # The last canned result repeats once the queue runs dry
+        result = self.results.pop(0) if len(self.results) > 1 else self.results[0]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+def test_normalize_rewrites_to_css_like_the_remote_driver():
+    assert normalize((By.ID, "email")) == (By.CSS_SELECTOR, '[id="email"]')
+    assert normalize((By.NAME, "q")) == (By.CSS_SELECTOR, '[name="q"]')
+    assert normalize((By.CLASS_NAME, "error-message")) == (By.CSS_SELECTOR, ".error-message")
+    assert normalize((By.XPATH, "//h1")) == (By.XPATH, "//h1")
+
+
+def test_condition_resolves_in_one_script_call():
+    driver = ScriptedDriver({"value": "element"})
+    assert PushWait(driver, 15).until(EC.element_to_be_clickable((By.ID, "cartur"))) == "element"
+    kind, strategy, value, timeout_ms, _ = driver.calls[0]
+    assert (kind, strategy, value) == ("clickable", By.CSS_SELECTOR, '[id="cartur"]')
+    assert 14900 < timeout_ms <= 15000
+
+
+def test_long_waits_are_chunked_below_script_timeout():
+    driver = ScriptedDriver({"timeout": True}, {"value": "element"})
+    PushWait(driver, 40).until(EC.presence_of_element_located((By.ID, "nava")))
+    assert driver.calls[0][3] == int(EC.MAX_SCRIPT_WAIT * 1000)
+    assert len(driver.calls) == 2
+
+
+def test_navigation_restarts_the_wait():
+    unloaded = JavascriptException("javascript error: document unloaded while waiting for result")
+    driver = ScriptedDriver(unloaded, {"value": "element"})
+    assert PushWait(driver, 5).until(EC.visibility_of_element_located((By.ID, "x"))) == "element"
+
+
+def test_timeout_raises_timeout_exception():
+    driver = ScriptedDriver({"timeout": True})
+    with pytest.raises(TimeoutException, match="Dashboard"):
+        PushWait(driver, 0.01).until(
+            EC.visibility_of_element_located((By.ID, "x")), "Dashboard never appeared"
+        )
+
+
+def test_invalid_selector_is_reported():
+    driver = ScriptedDriver({"error": "not a valid XPath expression"})
+    with pytest.raises(InvalidSelectorException):
+        PushWait(driver, 5).until(EC.presence_of_element_located((By.XPATH, "//tr[")))
+
+
+def test_other_conditions_fall_back_to_polling():
+    driver = ScriptedDriver()
+    assert PushWait(driver, 1).until(lambda d: "ready") == "ready"
+    assert driver.calls == []